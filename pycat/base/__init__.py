@@ -4,7 +4,7 @@ from .base_sprite import BaseSprite, RotationMode
 from .base_window import BaseWindow
 from .color import Color
 from .graphics_batch import GraphicsBatch
-from .image import Animation, AnimationFrame, Image, Texture
+from .image import Animation, AnimationFrame, Image, Texture, TextureManager
 from .numpy_image import ImageFormat, NumpyImage
 
 __all__ = [
@@ -19,6 +19,7 @@ __all__ = [
     'AnimationFrame',
     'Image',
     'Texture',
+    'TextureManager',
     'ImageFormat',
     'NumpyImage',
 ]
@@ -2,16 +2,21 @@
 
 from enum import Enum, auto
 from random import uniform
-from typing import List, Optional, Set, Tuple, Union
+from typing import Dict, List, Optional, Set, Tuple, Union
+from weakref import WeakValueDictionary
 
 from pycat.base.color import Color
+from pycat.collider import (ALL_COLLISION_LAYERS, BOX_COLLIDER,
+                            DEFAULT_COLLISION_LAYER, Collider)
 from pycat.base.event.window_event_subscriber import WindowEventSubscriber
-from pycat.base.image import Animation, Image, Texture
+from pycat.base.image import Animation, Image, Texture, TextureManager
+from pycat.geometry.oriented_box import OrientedBox
 from pycat.geometry.point import Point
 from pycat.math import (get_degrees_from_direction,
                         get_direction_from_degrees,
-                        get_distance, get_rotated_point)
+                        get_distance)
 
+from pyglet.graphics import Batch
 from pyglet.sprite import Sprite as PygletSprite
 
 # Compatibility import for pyglet 2.0+
@@ -27,6 +32,38 @@ except ImportError:
     def _create_ordered_group(order):
         return OrderedGroup(order=order)
 
+# one group per layer, shared by every sprite and label on that layer.
+# Groups are dropped once nothing is drawn on their layer.
+_layer_groups: 'WeakValueDictionary[int, OrderedGroup]' = WeakValueDictionary()
+
+
+def _get_layer_group(layer: int) -> OrderedGroup:
+    """Return the shared group drawing a layer.
+
+    Sprites on the same layer with the same texture are drawn together,
+    pyglet merges their sprite groups.
+    """
+    group = _layer_groups.get(layer)
+    if group is None:
+        group = _create_ordered_group(layer)
+        _layer_groups[layer] = group
+    return group
+
+
+class _PygletSprite(PygletSprite):
+    """A pyglet sprite that dispatches `on_animation_frame` on each frame.
+
+    The frames of an animation can have different sizes and anchors.
+    """
+
+    def _animate(self, dt: float):
+        super()._animate(dt)
+        if self._vertex_list is not None:
+            self.dispatch_event('on_animation_frame')
+
+
+_PygletSprite.register_event_type('on_animation_frame')
+
 
 class RotationMode(Enum):
     """Sets the behavior of a sprite's image rotation.
@@ -50,25 +87,47 @@ class BaseSprite(WindowEventSubscriber):
     a window's `add_window_event_subscriber()`
     """
 
+    # if True, changes to the position, rotation and scale are stored and
+    # written to the vertices once before drawing, see `flush_transform`
+    defer_transforms = False
+
     _default_image = Image.get_solid_color_texture(1, 1)
+    # shared by every new sprite, never evicted
+    TextureManager.acquire(_default_image)
 
     def __init__(self,
                  image: Union[Animation, Texture] = _default_image,
                  x: float = 0,
                  y: float = 0,
-                 layer: int = 0):
+                 layer: int = 0,
+                 batch: Optional[Batch] = None):
         """Instantiate a new Sprite."""
         self.__layer = layer
         self.rotation_mode = RotationMode.ALL_AROUND
-        self._sprite = PygletSprite(image,
-                                    x, y,
-                                    subpixel=True,
-                                    group=_create_ordered_group(layer))
+        self._sprite = _PygletSprite(image,
+                                     x, y,
+                                     subpixel=True,
+                                     batch=batch,
+                                     group=_get_layer_group(layer))
+        # a new frame invalidates the cached geometry like a new image
+        self._sprite.push_handlers(
+            on_animation_frame=self._on_transform_changed)
+        TextureManager.acquire(image)
+        self.__is_image_released = False
+        self.__is_visible = True
+        self.__is_culled = False
         self.__tags: Set[str] = set()
         self.__image_file = ""
         self.__rotation = 0.0
         self.__is_right_facing = True
         self.__forward_direction = get_direction_from_degrees(self.__rotation)
+        # pyglet sprite attribute -> value not yet written to the vertices
+        self.__pending_transform: Optional[Dict[str, float]] = None
+        self.__transform_version = 0
+        self.__oriented_box: Optional[OrientedBox] = None
+        self.__collider: Collider = BOX_COLLIDER
+        self.__collision_layer = DEFAULT_COLLISION_LAYER
+        self.__collision_mask = ALL_COLLISION_LAYERS
 
     @classmethod
     def create_from_file(cls,
@@ -112,33 +171,35 @@ class BaseSprite(WindowEventSubscriber):
     @property
     def x(self) -> float:
         """The sprite's x coordinate."""
-        return self._sprite.x
+        return self.__get_transform_value('x')
 
     @x.setter
     def x(self, x: float):
-        self._sprite.x = x
+        self.__set_transform_value('x', x)
+        self._on_transform_changed()
 
     @property
     def y(self) -> float:
         """The sprite's y coordinate."""
-        return self._sprite.y
+        return self.__get_transform_value('y')
 
     @y.setter
     def y(self, y: float):
-        self._sprite.y = y
+        self.__set_transform_value('y', y)
+        self._on_transform_changed()
 
     @property
     def position(self) -> Point:
         """The sprite's center (x,y) position."""
-        return Point(self._sprite.x, self._sprite.y)
+        return Point(self.__get_transform_value('x'),
+                     self.__get_transform_value('y'))
 
     @position.setter
     def position(self, p: Union[Point, Tuple[float, float]]):
         if isinstance(p, Point):
-            self._sprite.x = p.x
-            self._sprite.y = p.y
+            self.set_transform(x=p.x, y=p.y)
         else:
-            self._sprite.x, self._sprite.y = p
+            self.set_transform(x=p[0], y=p[1])
 
     def limit_position_to_area(
             self,
@@ -199,15 +260,98 @@ class BaseSprite(WindowEventSubscriber):
                 self.scale_y *= -1
                 self.__is_right_facing = True
 
+    def set_transform(self,
+                      x: Optional[float] = None,
+                      y: Optional[float] = None,
+                      rotation: Optional[float] = None,
+                      scale: Optional[float] = None,
+                      scale_x: Optional[float] = None,
+                      scale_y: Optional[float] = None):
+        """Set several transform values with one vertex update.
+
+        Values that are None are left unchanged.
+        """
+        image_rotation = None
+        if rotation is not None:
+            if self.rotation_mode is RotationMode.ALL_AROUND:
+                self.__rotation = rotation
+                self.__forward_direction = get_direction_from_degrees(rotation)
+                # rotation is clock-wise positive in pyglet
+                image_rotation = -rotation
+            else:
+                # other modes flip the image, see the rotation setter
+                self.rotation = rotation
+        values = {'x': x, 'y': y, 'rotation': image_rotation, 'scale': scale,
+                  'scale_x': scale_x, 'scale_y': scale_y}
+        if self.defer_transforms:
+            for name, value in values.items():
+                if value is not None:
+                    self.__set_transform_value(name, value)
+        else:
+            self.flush_transform()
+            self.__write_transform(**values)
+        self._on_transform_changed()
+
+    def flush_transform(self):
+        """Write the transform changes deferred by `defer_transforms`.
+
+        A window flushes its sprites before drawing them.
+        """
+        pending = self.__pending_transform
+        if pending is not None:
+            self.__pending_transform = None
+            self.__write_transform(**pending)
+
+    def __write_transform(self,
+                          x: Optional[float] = None,
+                          y: Optional[float] = None,
+                          rotation: Optional[float] = None,
+                          scale: Optional[float] = None,
+                          scale_x: Optional[float] = None,
+                          scale_y: Optional[float] = None):
+        """Write the given values of the pyglet sprite to its vertices."""
+        sprite = self._sprite
+        if x is not None or y is not None:
+            # one write of the translation for both coordinates
+            sprite.position = (sprite.x if x is None else x,
+                               sprite.y if y is None else y,
+                               sprite.z)
+        if rotation is not None:
+            sprite.rotation = rotation
+        if scale is not None:
+            sprite.scale = scale
+        if scale_x is not None:
+            sprite.scale_x = scale_x
+        if scale_y is not None:
+            sprite.scale_y = scale_y
+
+    def __get_transform_value(self, name: str) -> float:
+        pending = self.__pending_transform
+        if pending is not None and name in pending:
+            return pending[name]
+        return getattr(self._sprite, name)
+
+    def __set_transform_value(self, name: str, value: float):
+        if self.defer_transforms:
+            pending = self.__pending_transform
+            if pending is None:
+                pending = self.__pending_transform = {}
+                self._on_transform_deferred()
+            pending[name] = value
+        else:
+            self.flush_transform()
+            setattr(self._sprite, name, value)
+
     @property
     def image_rotation(self) -> float:
         # rotation is clock-wise positive in pyglet
-        return -self._sprite.rotation
+        return -self.__get_transform_value('rotation')
 
     @image_rotation.setter
     def image_rotation(self, degrees: float):
         # rotation is clock-wise positive in pyglet
-        self._sprite.rotation = -degrees
+        self.__set_transform_value('rotation', -degrees)
+        self._on_transform_changed()
 
     @property
     def layer(self) -> int:
@@ -216,9 +360,8 @@ class BaseSprite(WindowEventSubscriber):
     @layer.setter
     def layer(self, layer: int):
         self.__layer = layer
-        self._sprite.group = _create_ordered_group(layer)
-        if self._sprite.batch:
-            self._sprite.batch.invalidate()
+        # only moves this sprite's vertices to the layer's group
+        self._sprite.group = _get_layer_group(layer)
 
     ##################################################################
     # Tags
@@ -230,6 +373,7 @@ class BaseSprite(WindowEventSubscriber):
                   '" but it already exists')
         else:
             self.__tags.add(tag)
+            self._on_tag_added(tag)
 
     def remove_tag(self, tag: str):
         if tag not in self.__tags:
@@ -237,8 +381,11 @@ class BaseSprite(WindowEventSubscriber):
                   '" but it does not exist')
         else:
             self.__tags.remove(tag)
+            self._on_tag_removed(tag)
 
     def clear_tags(self):
+        for tag in self.__tags:
+            self._on_tag_removed(tag)
         self.__tags.clear()
 
     @property
@@ -257,11 +404,12 @@ class BaseSprite(WindowEventSubscriber):
         If the sprite's current scale is 1 then its size on screen
         will match the pixel dimensions of its image.
         """
-        return self._sprite.scale
+        return self.__get_transform_value('scale')
 
     @scale.setter
     def scale(self, scale: float):
-        self._sprite.scale = scale
+        self.__set_transform_value('scale', scale)
+        self._on_transform_changed()
 
     def scale_to_width(self, new_width: float):
         self.scale *= new_width/self.width
@@ -277,11 +425,12 @@ class BaseSprite(WindowEventSubscriber):
         along the sprite's horizontal axis. Negative values will flip
         the image across it's vertical axis
         """
-        return self._sprite.scale_x
+        return self.__get_transform_value('scale_x')
 
     @scale_x.setter
     def scale_x(self, scale_x: float):
-        self._sprite.scale_x = scale_x
+        self.__set_transform_value('scale_x', scale_x)
+        self._on_transform_changed()
 
     @property
     def scale_y(self) -> float:
@@ -291,20 +440,35 @@ class BaseSprite(WindowEventSubscriber):
         along the sprite's vertical axis. Negative values will flip
         the image across it's horizontal axis
         """
-        return self._sprite.scale_y
+        return self.__get_transform_value('scale_y')
 
     @scale_y.setter
     def scale_y(self, scale_y: float):
-        self._sprite.scale_y = scale_y
+        self.__set_transform_value('scale_y', scale_y)
+        self._on_transform_changed()
 
     @property
     def is_visible(self) -> bool:
         """If `is_visible` is False, the sprite will not be drawn."""
-        return self._sprite.visible
+        return self.__is_visible
 
     @is_visible.setter
     def is_visible(self, is_visible: bool):
-        self._sprite.visible = is_visible
+        self.__is_visible = is_visible
+        self._sprite.visible = is_visible and not self.__is_culled
+
+    @property
+    def is_culled(self) -> bool:
+        """True while the window skips drawing the sprite because it is
+        outside the view, see `Window.view_culling`.
+
+        A culled sprite keeps its `is_visible` value and still collides.
+        """
+        return self.__is_culled
+
+    def _set_culled(self, is_culled: bool):
+        self.__is_culled = is_culled
+        self._sprite.visible = self.__is_visible and not is_culled
 
     @property
     def color(self) -> Color.RGB:
@@ -343,7 +507,11 @@ class BaseSprite(WindowEventSubscriber):
         The `width` property is updated if the sprite's
         `scale` is modified
         """
-        return self._sprite.width
+        if self.__pending_transform is None:
+            return self._sprite.width
+        # the size with the deferred scale, like pyglet computes it
+        return (self.__get_frame_texture().width
+                * abs(self.scale * self.scale_x))
 
     @width.setter
     def width(self, new_width: float):
@@ -356,7 +524,11 @@ class BaseSprite(WindowEventSubscriber):
         The `height` property is updated if the sprite's
         `scale` is modified
         """
-        return self._sprite.height
+        if self.__pending_transform is None:
+            return self._sprite.height
+        # the size with the deferred scale, like pyglet computes it
+        return (self.__get_frame_texture().height
+                * abs(self.scale * self.scale_y))
 
     @height.setter
     def height(self, new_height: float):
@@ -383,17 +555,60 @@ class BaseSprite(WindowEventSubscriber):
     @texture.setter
     def texture(self, texture: Texture):
         if texture is None:
-            self._sprite.image = BaseSprite._default_image
+            self.__set_image(BaseSprite._default_image)
         else:
-            self._sprite.image = texture
+            self.__set_image(texture)
+
+    def __get_frame_texture(self) -> Texture:
+        """The texture currently shown, the animation frame if animated."""
+        image = self._sprite.image
+        if isinstance(image, Animation):
+            return image.frames[self._sprite.frame_index].image
+        return image
 
     def set_image(self, image: Union[Animation, Texture]):
         """Set the Sprite's Texture or Animation"""
-        self._sprite.image = image
+        self.__set_image(image)
 
     def set_image_from_file(self, file: str):
         """Set the Sprite's Texture or Animation from file"""
-        self._sprite.image = Image.get_image_from_file(file)
+        self.__set_image(Image.get_image_from_file(file))
+
+    def __set_image(self, image: Union[Animation, Texture]):
+        if not self.__is_image_released:
+            TextureManager.acquire(image)
+            TextureManager.release(self._sprite.image)
+        self._sprite.image = image
+        self._on_transform_changed()
+
+    def _release_image(self):
+        """Tell the TextureManager the sprite's image is no longer used."""
+        if not self.__is_image_released:
+            self.__is_image_released = True
+            TextureManager.release(self._sprite.image)
+
+    def _reset(self):
+        """Restore the state of a new sprite, keeping its vertex list."""
+        self.__set_image(BaseSprite._default_image)
+        self.__image_file = ""
+        self.rotation_mode = RotationMode.ALL_AROUND
+        self.__rotation = 0.0
+        self.__is_right_facing = True
+        self.__forward_direction = get_direction_from_degrees(self.__rotation)
+        self.__pending_transform = None
+        self.__write_transform(x=0, y=0, rotation=0, scale=1, scale_x=1,
+                               scale_y=1)
+        self._sprite.color = (255, 255, 255, 255)
+        self.__is_visible = True
+        self.__is_culled = False
+        self._sprite.visible = True
+        self.layer = 0
+        # tags were removed from the window when the sprite was deleted
+        self.__tags.clear()
+        self.__collider = BOX_COLLIDER
+        self.__collision_layer = DEFAULT_COLLISION_LAYER
+        self.__collision_mask = ALL_COLLISION_LAYERS
+        self._on_transform_changed()
 
     def change_animation_frame_duration(self, dt: float):
         """Change the animation speed if animated"""
@@ -410,10 +625,92 @@ class BaseSprite(WindowEventSubscriber):
 
     def contains_point(self, p: Point) -> bool:
         """Returns True if point is on the Sprite's image, otherwise False."""
-        d = Point(self.width, self.height) / 2
-        c = self.position
-        q = get_rotated_point(p - c, self._sprite.rotation)
-        return (-d.x < q.x < d.x) and (-d.y < q.y < d.y)
+        box = self.get_oriented_box()
+        dx = p.x - box.x
+        dy = p.y - box.y
+        # distances along the box's width and height axes
+        qx = dx * box.ux + dy * box.uy
+        qy = dx * box.vx + dy * box.vy
+        return abs(qx) < box.width / 2 and abs(qy) < box.height / 2
+
+    ##################################################################
+    # Cached geometry
+    ##################################################################
+
+    @property
+    def transform_version(self) -> int:
+        """Incremented whenever the position, rotation, scale or image change.
+
+        Can be used as a cache key for values computed from the sprite's
+        transform.
+        """
+        return self.__transform_version
+
+    def get_oriented_box(self) -> OrientedBox:
+        """The rotated rectangle covered by the sprite's image.
+
+        The box is cached until the sprite's transform changes,
+        do not modify it.
+        """
+        box = self.__oriented_box
+        if box is None:
+            box = OrientedBox(self.x, self.y,
+                              self.width, self.height, self.image_rotation)
+            self.__oriented_box = box
+        return box
+
+    def get_basis_vectors(self) -> Tuple[Point, Point]:
+        """The unit vectors along the sprite's width and height, cached."""
+        return self.get_oriented_box().basis
+
+    def get_vertices(self) -> Tuple[Point, Point, Point, Point]:
+        """The four corners of the sprite's rotated image, cached."""
+        return self.get_oriented_box().vertices
+
+    def get_bounding_box(self) -> Tuple[float, float, float, float]:
+        """Return the (min_x, min_y, max_x, max_y) of the rotated image."""
+        return self.get_oriented_box().bounding_box
+
+    @property
+    def collider(self) -> Collider:
+        """The shape used to test this sprite for collision.
+
+        Defaults to a `BoxCollider`, see `pycat.collider`.
+        """
+        return self.__collider
+
+    @collider.setter
+    def collider(self, collider: Collider):
+        self.__collider = collider
+        self._on_transform_changed()
+
+    @property
+    def collision_layer(self) -> int:
+        """The collision layers this sprite is on, as a bitfield.
+
+        Defaults to the first layer, see `pycat.collider`.
+        """
+        return self.__collision_layer
+
+    @collision_layer.setter
+    def collision_layer(self, layer: int):
+        if not 0 <= layer <= ALL_COLLISION_LAYERS:
+            raise ValueError('collision_layer must be a 32 bit field')
+        self.__collision_layer = layer
+
+    @property
+    def collision_mask(self) -> int:
+        """The collision layers this sprite collides with, as a bitfield.
+
+        Defaults to every layer, set it to 0 to never collide.
+        """
+        return self.__collision_mask
+
+    @collision_mask.setter
+    def collision_mask(self, mask: int):
+        if not 0 <= mask <= ALL_COLLISION_LAYERS:
+            raise ValueError('collision_mask must be a 32 bit field')
+        self.__collision_mask = mask
 
     ##################################################################
     # Scratch language
@@ -425,7 +722,9 @@ class BaseSprite(WindowEventSubscriber):
         The forward direction is based on a sprite's `self.rotation`.
         If `self.rotation = 0` then forward is facing right.
         """
-        self.position += step_size * self.__forward_direction
+        direction = self.__forward_direction
+        self.set_transform(x=self.x + step_size * direction.x,
+                           y=self.y + step_size * direction.y)
 
     def goto(self, other_sprite: 'BaseSprite'):
         """Go to another Sprite's position."""
@@ -463,6 +762,24 @@ class BaseSprite(WindowEventSubscriber):
     # Framework
     ##################################################################
 
+    def _on_transform_changed(self):
+        """Called after the position, rotation, scale or image changes."""
+        self.__transform_version += 1
+        self.__oriented_box = None
+
+    def _on_transform_deferred(self):
+        """Called when a deferred transform change is first stored."""
+        pass
+
+    def _on_tag_added(self, tag: str):
+        """Called after a tag is added."""
+        pass
+
+    def _on_tag_removed(self, tag: str):
+        """Called after a tag is removed."""
+        pass
+
     def draw(self):
         """Draws the sprite in a window's draw function"""
+        self.flush_transform()
         self._sprite.draw()
@@ -19,10 +19,9 @@ class GraphicsBatch:
         """Removes a sprite from the batch.
 
         Deletes the vertex list from video memory.
-        The sprite's texture is kept in video memory
-        If it is safe to remove a sprite's texture from
-        video memory you can use sprite._sprite.delete(),
-        which will also automatically remove it from the batch
+        The sprite's texture is kept in video memory,
+        call sprite._release_image() to let the TextureManager
+        evict it once no other sprite uses it.
         """
         null_batch = PygletBatch()
         self._batch.migrate(vertex_list=sprite._sprite._vertex_list,
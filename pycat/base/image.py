@@ -1,6 +1,9 @@
 """The image module contains functions for loading or creating image data."""
-from typing import Tuple, Union, List
+import os
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple, Union
 
+import pyglet.resource
 from pyglet.image import (
     Animation,
     AnimationFrame,
@@ -15,7 +18,140 @@ from pyglet.resource import image as pyglet_image
 from pycat.debug.print import print_failure as debug_failure
 
 
+def _get_root_textures(image: Union[Animation, Texture]) -> List[Texture]:
+    """Return the textures owning an image's video memory."""
+    if isinstance(image, Animation):
+        images = [frame.image for frame in image.frames]
+    else:
+        images = [image]
+    roots = []
+    for texture in images:
+        while getattr(texture, 'owner', None) is not None:
+            texture = texture.owner
+        roots.append(texture)
+    return roots
+
+
+class TextureManager:
+    """Implements static methods for tracking the textures sprites use.
+
+    Sprites acquire their image when it is set and release it when they
+    are deleted or their image changes. Textures are counted by the
+    texture owning their video memory, e.g. the atlas or sprite sheet they
+    are a region of.
+
+    Textures that no sprite uses are kept in a least recently used list.
+    When their total size is over `get_budget()` bytes the oldest are
+    evicted: the manager drops its reference, so a texture nothing else
+    references is freed from video memory. Textures still referenced, e.g.
+    one returned by `NumpyImage.get_texture_from_array` or a cached sprite
+    sheet region, stay valid and can be used again. Acquire a texture to
+    keep it while no sprite uses it.
+    """
+    __budget = 64 * 1024 * 1024
+    __refcounts: Dict[Texture, int] = {}
+    # unused textures, least recently used first
+    __unused: 'OrderedDict[Texture, int]' = OrderedDict()
+    __unused_bytes = 0
+    __evicted = 0
+
+    @staticmethod
+    def acquire(image: Union[Animation, Texture]):
+        """Add one user of a texture, or of every frame of an animation."""
+        for texture in _get_root_textures(image):
+            if texture.id is None:
+                raise ValueError('texture was deleted from video memory')
+            count = TextureManager.__refcounts.get(texture, 0)
+            if count == 0:
+                size = TextureManager.__unused.pop(texture, None)
+                if size is not None:
+                    TextureManager.__unused_bytes -= size
+            TextureManager.__refcounts[texture] = count + 1
+
+    @staticmethod
+    def release(image: Union[Animation, Texture]):
+        """Remove one user of a texture, ignoring textures never acquired."""
+        for texture in _get_root_textures(image):
+            count = TextureManager.__refcounts.get(texture)
+            if count is None:
+                continue
+            if count > 1:
+                TextureManager.__refcounts[texture] = count - 1
+                continue
+            del TextureManager.__refcounts[texture]
+            size = TextureManager.get_texture_bytes(texture)
+            TextureManager.__unused[texture] = size
+            TextureManager.__unused_bytes += size
+        TextureManager.__evict(TextureManager.__budget)
+
+    @staticmethod
+    def get_refcount(image: Union[Animation, Texture]) -> int:
+        """Number of users of the texture owning an image."""
+        return TextureManager.__refcounts.get(_get_root_textures(image)[0], 0)
+
+    @staticmethod
+    def get_texture_bytes(texture: Texture) -> int:
+        """Approximate video memory of a texture, 4 bytes per pixel."""
+        texture = _get_root_textures(texture)[0]
+        return texture.width * texture.height * 4
+
+    @staticmethod
+    def get_budget() -> int:
+        return TextureManager.__budget
+
+    @staticmethod
+    def set_budget(budget: int):
+        """Set how many bytes of unused textures are kept."""
+        if budget < 0:
+            raise ValueError('budget must not be negative')
+        TextureManager.__budget = budget
+        TextureManager.__evict(budget)
+
+    @staticmethod
+    def evict_unused():
+        """Evict every texture that no sprite uses."""
+        TextureManager.__evict(0)
+
+    @staticmethod
+    def get_used_bytes() -> int:
+        """Video memory of the textures in use."""
+        return sum(TextureManager.get_texture_bytes(texture)
+                   for texture in TextureManager.__refcounts)
+
+    @staticmethod
+    def get_unused_bytes() -> int:
+        """Video memory of the unused textures that are still kept."""
+        return TextureManager.__unused_bytes
+
+    @staticmethod
+    def get_used_count() -> int:
+        return len(TextureManager.__refcounts)
+
+    @staticmethod
+    def get_unused_count() -> int:
+        return len(TextureManager.__unused)
+
+    @staticmethod
+    def get_evicted_count() -> int:
+        """Number of textures evicted so far."""
+        return TextureManager.__evicted
+
+    @staticmethod
+    def __evict(budget: int):
+        unused = TextureManager.__unused
+        while TextureManager.__unused_bytes > budget:
+            # pyglet frees the video memory once the texture is collected
+            _, size = unused.popitem(last=False)
+            TextureManager.__unused_bytes -= size
+            TextureManager.__evicted += 1
+
+
 class Image():
+    # images loaded from files are packed into shared atlas textures,
+    # so sprites with different images can still be drawn together.
+    # Only affects images that have not been loaded yet.
+    use_atlas: bool = True
+
     @staticmethod
     def get_solid_color_texture(
         width: int = 2,
@@ -55,7 +191,7 @@ class Image():
     @staticmethod
     def get_texture_from_file(img_file: str) -> Texture:
         try:
-            texture: Texture = pyglet_image(img_file)
+            texture: Texture = pyglet_image(img_file, atlas=Image.use_atlas)
             texture.anchor_x = texture.width / 2
             texture.anchor_y = texture.height / 2
         except ResourceNotFoundException:
@@ -63,6 +199,31 @@ class Image():
             texture = Image.get_checker_texture()
         return texture
 
+    @staticmethod
+    def preload_directory(
+        directory: str,
+        extensions: Iterable[str] = ('.png', '.jpg', '.jpeg', '.bmp')
+    ) -> Dict[str, Texture]:
+        """Load every image in a resource directory, e.g. at startup.
+
+        Loading the images together packs them into as few atlas pages
+        as possible. Returns the textures by resource name, e.g.
+        `'img/eye.png'`, later calls to `get_texture_from_file` return the
+        same textures.
+        """
+        extensions = tuple(ext.lower() for ext in extensions)
+        names = set()
+        for path in pyglet.resource.path:
+            if not os.path.isabs(path):
+                path = os.path.join(pyglet.resource.get_script_home(), path)
+            full_directory = os.path.join(path, directory)
+            if os.path.isdir(full_directory):
+                for file in os.listdir(full_directory):
+                    if file.lower().endswith(extensions):
+                        names.add(directory.rstrip('/') + '/' + file)
+
+        return {name: Image.get_texture_from_file(name) for name in sorted(names)}
+
     @staticmethod
     def get_animation_from_file(gif_file: str, dt: float = 0.1) -> Animation:
         try:
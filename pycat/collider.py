@@ -0,0 +1,83 @@
+"""The collider module defines the shapes used to test sprites for collision.
+
+Set a sprite's `collider` property to change its shape:
+
+- `BoxCollider` (the default) collides with the sprite's rotated image
+- `CircleCollider` collides with a circle at the sprite's center
+- `PolygonCollider` collides with a convex polygon, by default the convex
+  hull of the image's non-transparent pixels
+
+Colliders may reach beyond the sprite's image, collision queries use the
+bounds of both, see `pycat.collision.get_collider_bounding_box`.
+
+Sprites also have a `collision_layer` and a `collision_mask`, bitfields of
+up to 32 layers. Two sprites can only collide if each one's layer is in the
+other one's mask.
+"""
+
+from typing import Optional, Sequence, Tuple
+
+
+class Collider:
+    """Base class of all collider shapes.
+
+    Colliders only describe a shape, so one collider can be shared by
+    many sprites.
+    """
+    pass
+
+
+class BoxCollider(Collider):
+    """Collide with the sprite's rotated image rectangle."""
+
+    def __repr__(self):
+        return 'BoxCollider()'
+
+
+class CircleCollider(Collider):
+    """Collide with a circle centered on the sprite.
+
+    `radius` is in image pixels and is scaled with the sprite. If it is
+    None, the circle fits the smaller side of the sprite's image.
+    """
+
+    def __init__(self, radius: Optional[float] = None):
+        self.radius = radius
+
+    def __repr__(self):
+        return 'CircleCollider(radius=' + str(self.radius) + ')'
+
+
+class PolygonCollider(Collider):
+    """Collide with a convex polygon that moves with the sprite.
+
+    `points` are (x, y) image pixels relative to the image's anchor
+    (the sprite's center) and are scaled and rotated with the sprite.
+    If `points` is None, the convex hull of the image's non-transparent
+    pixels is used, it is computed once per texture.
+    """
+
+    def __init__(self,
+                 points: Optional[Sequence[Tuple[float, float]]] = None):
+        if points is not None:
+            if len(points) < 3:
+                raise ValueError('a polygon needs at least 3 points')
+            points = tuple((float(x), float(y)) for x, y in points)
+        self.points: Optional[Tuple[Tuple[float, float], ...]] = points
+
+    def __repr__(self):
+        return 'PolygonCollider(points=' + str(self.points) + ')'
+
+
+# colliders are stateless, sprites share this default instance
+BOX_COLLIDER = BoxCollider()
+
+DEFAULT_COLLISION_LAYER = 1
+ALL_COLLISION_LAYERS = 0xFFFFFFFF
+
+
+def get_collision_layer(index: int) -> int:
+    """Return the bit of layer number `index`, from 0 to 31."""
+    if not 0 <= index < 32:
+        raise ValueError('collision layer index must be in [0, 31]')
+    return 1 << index
@@ -1,9 +1,19 @@
 """The collision module defines functions to test for Sprite collision."""
-from typing import List, Tuple
+from math import ceil, floor
+from typing import (Callable, Dict, List, NamedTuple, Optional, Sequence,
+                    Tuple)
+from weakref import WeakKeyDictionary
+
+import numpy
 
 from pycat.base.base_sprite import BaseSprite
+from pycat.base.image import Animation, Texture
+from pycat.base.numpy_image import NumpyImage
+from pycat.collider import (ALL_COLLISION_LAYERS, BOX_COLLIDER, BoxCollider,
+                            CircleCollider, Collider, PolygonCollider)
+from pycat.geometry.intersection import line_intersection
+from pycat.geometry.oriented_box import OrientedBox
 from pycat.geometry.point import Point
-from pycat.math import dot, get_direction_from_degrees, project_p_onto_q
 
 
 def is_aabb_collision(a: BaseSprite, b: BaseSprite) -> bool:
@@ -29,73 +39,670 @@ def is_buffered_aabb_collision(a: BaseSprite,
             and a.y - ah <= b.y + bh and a.y + ah >= b.y - bh)
 
 
+def _get_oriented_box(a: BaseSprite) -> OrientedBox:
+    if isinstance(a, BaseSprite):
+        return a.get_oriented_box()
+    # duck-typed sprites are not cached
+    p = a.position
+    return OrientedBox(p.x, p.y, a.width, a.height, a.image_rotation)
+
+
 def _get_sprite_basis_vectors(a: BaseSprite) -> Tuple[Point, Point]:
-    u = get_direction_from_degrees(a.image_rotation)
-    v = Point(u.y, -u.x)
-    return u, v
+    return _get_oriented_box(a).basis
 
 
 def _get_sprite_vertices(a: BaseSprite, basis: Tuple[Point, Point]) -> Tuple:
+    box = _get_oriented_box(a)
+    if basis is box.basis:
+        return box.vertices
     u = basis[0] * a.width / 2
     v = basis[1] * a.height / 2
     p = a.position
     return p + u + v, p - u + v, p - u - v, p + u - v
 
 
-def _get_projection_lengths(q, verts, origin) -> List[float]:
-    lengths = []
-    for vertex in verts:
-        p = vertex - origin
-        projection = project_p_onto_q(p, q)
-        lengths.append(dot(projection, q))
-    return lengths
+class RaycastHit(NamedTuple):
+    """A sprite hit by a ray, where it was hit and how far along the ray."""
+    sprite: BaseSprite
+    point: Point
+    distance: float
 
 
-def is_rotated_box_collision(a: BaseSprite, b: BaseSprite):
+def get_segment_intersection(a: BaseSprite,
+                             start: Point,
+                             end: Point) -> Optional[Point]:
+    """Return the first point where a segment enters the sprite's box.
 
-    a_basis = _get_sprite_basis_vectors(a)
-    a_vertices = _get_sprite_vertices(a, a_basis)
-    b_basis = _get_sprite_basis_vectors(b)
-    b_vertices = _get_sprite_vertices(b, b_basis)
+    Returns `start` if it is already inside the sprite and None if the
+    segment misses.
+    """
+    if a.contains_point(start):
+        return Point(start.x, start.y)
+    c = _get_oriented_box(a).corners
+    closest = None
+    closest_distance = 0.0
+    for k in range(0, 8, 2):
+        p = line_intersection(start.x, start.y, end.x, end.y,
+                              c[k - 2], c[k - 1], c[k], c[k + 1])
+        if p is not None:
+            dx = p.x - start.x
+            dy = p.y - start.y
+            distance = dx * dx + dy * dy
+            if closest is None or distance < closest_distance:
+                closest = p
+                closest_distance = distance
+    return closest
 
-    p = _get_projection_lengths(a_basis[0], b_vertices, a_vertices[2])
-    if max(p) < 0 or min(p) > a.width:
-        return False
-    p = _get_projection_lengths(a_basis[1], b_vertices, a_vertices[2])
-    if max(p) < 0 or min(p) > a.height:
-        return False
-    p = _get_projection_lengths(b_basis[0], a_vertices, b_vertices[2])
-    if max(p) < 0 or min(p) > b.width:
-        return False
-    p = _get_projection_lengths(b_basis[1], a_vertices, b_vertices[2])
-    if max(p) < 0 or min(p) > b.height:
-        return False
-    return True
+
+def is_rotated_box_collision(a: BaseSprite, b: BaseSprite) -> bool:
+    """Separating axis test of two rotated sprites.
+
+    Uses each sprite's cached `OrientedBox`, so sprites that have not
+    moved since their last test do no trigonometry.
+    """
+    a_box = _get_oriented_box(a)
+    b_box = _get_oriented_box(b)
+    return (a_box.projection_overlaps(b_box)
+            and b_box.projection_overlaps(a_box))
 
 
 def is_buffered_rotated_box_collision(a: BaseSprite, b: BaseSprite,
                                       x_buffer: float,
                                       y_buffer: float) -> bool:
+    a_box = _get_oriented_box(a)
+    b_box = _get_oriented_box(b)
+    return (a_box.projection_overlaps(b_box, x_buffer, y_buffer)
+            and b_box.projection_overlaps(a_box, x_buffer, y_buffer))
+
+
+# texture -> bit-packed alpha mask, built once per texture
+_alpha_masks: 'WeakKeyDictionary[Texture, numpy.ndarray]' = WeakKeyDictionary()
 
-    a_basis = _get_sprite_basis_vectors(a)
-    a_vertices = _get_sprite_vertices(a, a_basis)
-    b_basis = _get_sprite_basis_vectors(b)
-    b_vertices = _get_sprite_vertices(b, b_basis)
+# number of sample points tested at once by is_pixel_perfect_collision
+_PIXEL_SAMPLE_BLOCK = 1 << 16
 
-    p = _get_projection_lengths(a_basis[0], b_vertices, a_vertices[2])
-    if max(p) < x_buffer or min(p) > a.width - x_buffer:
+
+def get_alpha_mask(texture: Texture) -> numpy.ndarray:
+    """Return a texture's non-transparent pixels as a bit-packed mask.
+
+    The mask has one row per texture row, bottom row first, packed with
+    `numpy.packbits` along each row. Masks are cached per texture.
+    """
+    mask = _alpha_masks.get(texture)
+    if mask is None:
+        pixels = NumpyImage.get_array_from_texture(texture)
+        # regions flipped with get_transform() share the unflipped pixels
+        tex_coords = texture.tex_coords
+        if tex_coords[0] > tex_coords[3]:
+            pixels = pixels[:, ::-1]
+        if tex_coords[1] > tex_coords[10]:
+            pixels = pixels[::-1]
+        channels = pixels.shape[2]
+        if channels == 4:
+            opaque = pixels[..., 3] > 0
+        elif channels == 2:
+            opaque = pixels[..., 1] > 0
+        else:
+            opaque = numpy.ones(pixels.shape[:2], dtype=bool)
+        mask = numpy.packbits(opaque, axis=1)
+        _alpha_masks[texture] = mask
+    return mask
+
+
+def _get_current_texture(a: BaseSprite) -> Texture:
+    image = a._sprite.image
+    if isinstance(image, Animation):
+        return image.frames[a._sprite.frame_index].image.get_texture()
+    return image
+
+
+def _sample_alpha_mask(a: BaseSprite,
+                       texture: Texture,
+                       mask: numpy.ndarray,
+                       x: numpy.ndarray,
+                       y: numpy.ndarray) -> numpy.ndarray:
+    """Look up the sprite's alpha mask at world points (x, y)."""
+    box = a.get_oriented_box()
+    dx = x - box.x
+    dy = y - box.y
+    # world -> unrotated, unscaled texture pixel coordinates
+    scale_x = a.scale * a.scale_x
+    scale_y = a.scale * a.scale_y
+    col = (dx * box.ux + dy * box.uy) / scale_x + texture.anchor_x
+    row = (dy * box.ux - dx * box.uy) / scale_y + texture.anchor_y
+    col = numpy.floor(col).astype(numpy.int64)
+    row = numpy.floor(row).astype(numpy.int64)
+    inside = ((col >= 0) & (col < texture.width)
+              & (row >= 0) & (row < texture.height))
+    hits = numpy.zeros(x.shape, dtype=bool)
+    col = col[inside]
+    row = row[inside]
+    bits = mask[row, col >> 3] >> (7 - (col & 7))
+    hits[inside] = (bits & 1).astype(bool)
+    return hits
+
+
+def is_pixel_perfect_collision(a: BaseSprite, b: BaseSprite) -> bool:
+    """Test if the non-transparent pixels of two sprites overlap.
+
+    Sprites are first rejected with `is_rotated_box_collision`. Then the
+    sprites' alpha masks are sampled at every pixel center of the region
+    where their bounding boxes overlap. This works for any rotation,
+    scale and flip.
+    """
+    if not is_rotated_box_collision(a, b):
         return False
-    p = _get_projection_lengths(a_basis[1], b_vertices, a_vertices[2])
-    if max(p) < y_buffer or min(p) > a.height - y_buffer:
+    if a.scale * a.scale_x * a.scale_y * b.scale * b.scale_x * b.scale_y == 0:
         return False
-    p = _get_projection_lengths(b_basis[0], a_vertices, b_vertices[2])
-    if max(p) < x_buffer or min(p) > b.width - x_buffer:
+
+    a_texture = _get_current_texture(a)
+    b_texture = _get_current_texture(b)
+    a_mask = get_alpha_mask(a_texture)
+    b_mask = get_alpha_mask(b_texture)
+
+    a_min_x, a_min_y, a_max_x, a_max_y = a.get_bounding_box()
+    b_min_x, b_min_y, b_max_x, b_max_y = b.get_bounding_box()
+    min_x = max(a_min_x, b_min_x)
+    min_y = max(a_min_y, b_min_y)
+    max_x = min(a_max_x, b_max_x)
+    max_y = min(a_max_y, b_max_y)
+
+    # sample pixel centers, at least one sample along each axis
+    x0 = floor(min_x)
+    y0 = floor(min_y)
+    xs = numpy.arange(x0, max(ceil(max_x), x0 + 1)) + 0.5
+    ys = numpy.arange(y0, max(ceil(max_y), y0 + 1)) + 0.5
+
+    # test blocks of rows to bound memory use and exit early on a hit
+    rows_per_block = max(1, _PIXEL_SAMPLE_BLOCK // len(xs))
+    for start in range(0, len(ys), rows_per_block):
+        x, y = numpy.meshgrid(xs, ys[start:start + rows_per_block])
+        if numpy.any(_sample_alpha_mask(a, a_texture, a_mask, x, y)
+                     & _sample_alpha_mask(b, b_texture, b_mask, x, y)):
+            return True
+    return False
+
+
+##################################################################
+# Collider shapes
+##################################################################
+
+# texture -> convex hull of its non-transparent pixels
+_convex_hulls: 'WeakKeyDictionary[Texture, Tuple]' = WeakKeyDictionary()
+
+# sprite -> (transform version, texture, world polygon)
+_world_polygons: 'WeakKeyDictionary[BaseSprite, Tuple]' = WeakKeyDictionary()
+
+
+def _get_collider(a: BaseSprite) -> Collider:
+    if isinstance(a, BaseSprite):
+        return a.collider
+    return BOX_COLLIDER
+
+
+def _cross(o: Tuple[float, float],
+           a: Tuple[float, float],
+           b: Tuple[float, float]) -> float:
+    return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+
+def _get_hull(points: Sequence[Tuple[float, float]]
+              ) -> Tuple[Tuple[float, float], ...]:
+    """Monotone chain convex hull, counter-clockwise."""
+    points = sorted(set(points))
+    if len(points) < 3:
+        return tuple(points)
+    lower: List[Tuple[float, float]] = []
+    for p in points:
+        while len(lower) >= 2 and _cross(lower[-2], lower[-1], p) <= 0:
+            lower.pop()
+        lower.append(p)
+    upper: List[Tuple[float, float]] = []
+    for p in reversed(points):
+        while len(upper) >= 2 and _cross(upper[-2], upper[-1], p) <= 0:
+            upper.pop()
+        upper.append(p)
+    return tuple(lower[:-1] + upper[:-1])
+
+
+def get_convex_hull(texture: Texture) -> Tuple[Tuple[float, float], ...]:
+    """Return the convex hull of a texture's non-transparent pixels.
+
+    Points are in pixels relative to the texture's anchor, counter-clockwise.
+    A fully transparent texture has an empty hull. Hulls are cached
+    per texture.
+    """
+    hull = _convex_hulls.get(texture)
+    if hull is None:
+        opaque = numpy.unpackbits(get_alpha_mask(texture),
+                                  axis=1)[:, :texture.width].astype(bool)
+        rows = numpy.nonzero(opaque.any(axis=1))[0]
+        left = opaque[rows].argmax(axis=1)
+        right = texture.width - opaque[rows, ::-1].argmax(axis=1)
+        # only the outer corners of the first and last pixel of each row
+        # can be on the hull
+        points = []
+        for r, x0, x1 in zip(rows.tolist(), left.tolist(), right.tolist()):
+            points += [(x0, r), (x0, r + 1), (x1, r), (x1, r + 1)]
+        ax = texture.anchor_x
+        ay = texture.anchor_y
+        hull = tuple((x - ax, y - ay) for x, y in _get_hull(points))
+        _convex_hulls[texture] = hull
+    return hull
+
+
+def _get_circle(a: BaseSprite,
+                collider: CircleCollider) -> Tuple[float, float, float]:
+    """Return the world (x, y, radius) of a circle collider."""
+    box = _get_oriented_box(a)
+    if collider.radius is None:
+        return box.x, box.y, min(box.width, box.height) / 2
+    scale = abs(a.scale) * max(abs(a.scale_x), abs(a.scale_y))
+    return box.x, box.y, collider.radius * scale
+
+
+def _get_polygon(a: BaseSprite) -> Tuple[float, ...]:
+    """Return the world corners of a sprite's collider as flat (x, y) pairs."""
+    collider = _get_collider(a)
+    box = _get_oriented_box(a)
+    if not isinstance(collider, PolygonCollider):
+        return box.corners
+
+    texture = _get_current_texture(a)
+    cached = _world_polygons.get(a)
+    if (cached is not None and cached[0] == a.transform_version
+            and cached[1] is texture and cached[2] is collider.points):
+        return cached[3]
+    points = collider.points
+    if points is None:
+        points = get_convex_hull(texture)
+    # image pixels -> world, same mapping as _sample_alpha_mask
+    scale_x = a.scale * a.scale_x
+    scale_y = a.scale * a.scale_y
+    ux = box.ux
+    uy = box.uy
+    polygon: List[float] = []
+    for px, py in points:
+        lx = px * scale_x
+        ly = py * scale_y
+        polygon += [box.x + lx * ux - ly * uy, box.y + lx * uy + ly * ux]
+    polygon = tuple(polygon)
+    _world_polygons[a] = (a.transform_version, texture, collider.points,
+                          polygon)
+    return polygon
+
+
+def get_collider_bounding_box(a: BaseSprite
+                              ) -> Tuple[float, float, float, float]:
+    """Return the (min_x, min_y, max_x, max_y) of a sprite's image and collider.
+
+    The same as `get_bounding_box()`, unless a circle or polygon collider
+    reaches beyond the sprite's image.
+    """
+    bounds = _get_oriented_box(a).bounding_box
+    collider = _get_collider(a)
+    if isinstance(collider, CircleCollider):
+        x, y, r = _get_circle(a, collider)
+        extent = (x - r, y - r, x + r, y + r)
+    elif isinstance(collider, PolygonCollider):
+        polygon = _get_polygon(a)
+        if not polygon:
+            return bounds
+        xs = polygon[0::2]
+        ys = polygon[1::2]
+        extent = (min(xs), min(ys), max(xs), max(ys))
+    else:
+        return bounds
+    return (min(bounds[0], extent[0]), min(bounds[1], extent[1]),
+            max(bounds[2], extent[2]), max(bounds[3], extent[3]))
+
+
+def _polygons_overlap_on_axes(a: Sequence[float], b: Sequence[float]) -> bool:
+    """Half of a separating axis test, using the edge normals of a."""
+    n = len(a)
+    for k in range(0, n, 2):
+        # normal of the edge from point k - 1 to point k
+        nx = a[k + 1] - a[k - 1]
+        ny = a[k - 2] - a[k]
+        a_min = a_max = a[0] * nx + a[1] * ny
+        for m in range(2, n, 2):
+            p = a[m] * nx + a[m + 1] * ny
+            if p < a_min:
+                a_min = p
+            elif p > a_max:
+                a_max = p
+        b_min = b_max = b[0] * nx + b[1] * ny
+        for m in range(2, len(b), 2):
+            p = b[m] * nx + b[m + 1] * ny
+            if p < b_min:
+                b_min = p
+            elif p > b_max:
+                b_max = p
+        if a_max < b_min or b_max < a_min:
+            return False
+    return True
+
+
+def is_polygon_collision(a: Sequence[float], b: Sequence[float]) -> bool:
+    """Separating axis test of two convex polygons given as flat (x, y) pairs."""
+    if len(a) < 6 or len(b) < 6:
         return False
-    p = _get_projection_lengths(b_basis[1], a_vertices, b_vertices[2])
-    if max(p) < y_buffer or min(p) > b.height - y_buffer:
+    return _polygons_overlap_on_axes(a, b) and _polygons_overlap_on_axes(b, a)
+
+
+def is_circle_polygon_collision(x: float,
+                                y: float,
+                                radius: float,
+                                polygon: Sequence[float]) -> bool:
+    """Test a circle against a convex polygon given as flat (x, y) pairs."""
+    n = len(polygon)
+    if n < 6:
         return False
+    # axis from the closest corner to the circle's center
+    closest = 0
+    closest_distance = None
+    for k in range(0, n, 2):
+        dx = polygon[k] - x
+        dy = polygon[k + 1] - y
+        distance = dx * dx + dy * dy
+        if closest_distance is None or distance < closest_distance:
+            closest = k
+            closest_distance = distance
+    axes = [(polygon[closest] - x, polygon[closest + 1] - y)]
+    for k in range(0, n, 2):
+        axes.append((polygon[k + 1] - polygon[k - 1],
+                     polygon[k - 2] - polygon[k]))
+    for nx, ny in axes:
+        length = (nx * nx + ny * ny) ** 0.5
+        if length == 0:
+            continue
+        center = x * nx + y * ny
+        p_min = p_max = polygon[0] * nx + polygon[1] * ny
+        for m in range(2, n, 2):
+            p = polygon[m] * nx + polygon[m + 1] * ny
+            if p < p_min:
+                p_min = p
+            elif p > p_max:
+                p_max = p
+        if p_max < center - radius * length or center + radius * length < p_min:
+            return False
     return True
 
 
-def is_pixel_perfect_collision(a: BaseSprite, b: BaseSprite):
-    pass
+def is_circle_box_collision(x: float,
+                            y: float,
+                            radius: float,
+                            box: OrientedBox) -> bool:
+    """Test a circle against an oriented box."""
+    dx = x - box.x
+    dy = y - box.y
+    # circle center in the box's frame, clamped to the box
+    qx = dx * box.ux + dy * box.uy
+    qy = dx * box.vx + dy * box.vy
+    hw = box.width / 2
+    hh = box.height / 2
+    ex = qx - max(-hw, min(hw, qx))
+    ey = qy - max(-hh, min(hh, qy))
+    return ex * ex + ey * ey <= radius * radius
+
+
+def _get_collision_layer(a: BaseSprite) -> int:
+    if isinstance(a, BaseSprite):
+        return a.collision_layer
+    return ALL_COLLISION_LAYERS
+
+
+def _get_collision_mask(a: BaseSprite) -> int:
+    if isinstance(a, BaseSprite):
+        return a.collision_mask
+    return ALL_COLLISION_LAYERS
+
+
+def can_collide(a: BaseSprite, b: BaseSprite) -> bool:
+    """Test if each sprite's collision layer is in the other one's mask."""
+    return bool(_get_collision_layer(a) & _get_collision_mask(b)
+                and _get_collision_layer(b) & _get_collision_mask(a))
+
+
+class CollisionCache:
+    """Implements static methods for an opt-in cache of `is_collision`.
+
+    While enabled, the result of `is_collision(a, b)` is stored for the
+    pair and reused for `is_collision(a, b)` and `is_collision(b, a)`
+    until either sprite's `transform_version` changes, so each pair is
+    tested at most once per frame. Windows clear the cache at the start
+    of every frame.
+    """
+    __is_enabled = False
+    # (a, b) ordered by id -> (a version, b version, result)
+    __results: Dict[Tuple[BaseSprite, BaseSprite],
+                    Tuple[int, int, bool]] = {}
+    __hits = 0
+    __misses = 0
+
+    @staticmethod
+    def enable():
+        CollisionCache.__is_enabled = True
+
+    @staticmethod
+    def disable():
+        CollisionCache.__is_enabled = False
+        CollisionCache.__results.clear()
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return CollisionCache.__is_enabled
+
+    @staticmethod
+    def clear():
+        """Forget all stored results, the counts are kept."""
+        CollisionCache.__results.clear()
+
+    @staticmethod
+    def get_hit_count() -> int:
+        """Number of `is_collision` calls answered from the cache."""
+        return CollisionCache.__hits
+
+    @staticmethod
+    def get_miss_count() -> int:
+        """Number of `is_collision` calls that had to test the pair."""
+        return CollisionCache.__misses
+
+    @staticmethod
+    def reset_counts():
+        CollisionCache.__hits = 0
+        CollisionCache.__misses = 0
+
+    @staticmethod
+    def _get_collision(a: BaseSprite, b: BaseSprite) -> bool:
+        if id(b) < id(a):
+            a, b = b, a
+        a_version = a.transform_version
+        b_version = b.transform_version
+        key = (a, b)
+        cached = CollisionCache.__results.get(key)
+        if (cached is not None and cached[0] == a_version
+                and cached[1] == b_version):
+            CollisionCache.__hits += 1
+            return cached[2]
+        CollisionCache.__misses += 1
+        result = _is_collider_collision(a, b)
+        CollisionCache.__results[key] = (a_version, b_version, result)
+        return result
+
+
+def is_collision(a: BaseSprite, b: BaseSprite) -> bool:
+    """Test two sprites for collision using their colliders.
+
+    Sprites with the default `BoxCollider` use `is_rotated_box_collision`.
+    Circles are tested against other shapes directly and polygons with a
+    separating axis test on their edges.
+
+    Results are reused within a frame if `CollisionCache` is enabled.
+    """
+    if (CollisionCache.is_enabled() and isinstance(a, BaseSprite)
+            and isinstance(b, BaseSprite)):
+        return CollisionCache._get_collision(a, b)
+    return _is_collider_collision(a, b)
+
+
+def _is_collider_collision(a: BaseSprite, b: BaseSprite) -> bool:
+    a_collider = _get_collider(a)
+    b_collider = _get_collider(b)
+    a_is_box = isinstance(a_collider, BoxCollider)
+    b_is_box = isinstance(b_collider, BoxCollider)
+    if a_is_box and b_is_box:
+        return is_rotated_box_collision(a, b)
+
+    if isinstance(a_collider, CircleCollider):
+        ax, ay, ar = _get_circle(a, a_collider)
+        if isinstance(b_collider, CircleCollider):
+            bx, by, br = _get_circle(b, b_collider)
+            dx = bx - ax
+            dy = by - ay
+            return dx * dx + dy * dy <= (ar + br) * (ar + br)
+        if b_is_box:
+            return is_circle_box_collision(ax, ay, ar, _get_oriented_box(b))
+        return is_circle_polygon_collision(ax, ay, ar, _get_polygon(b))
+    if isinstance(b_collider, CircleCollider):
+        return _is_collider_collision(b, a)
+
+    return is_polygon_collision(_get_polygon(a), _get_polygon(b))
+
+
+# max number of pair tests broadcast at once by get_colliding_pairs
+_PAIR_BLOCK = 1 << 20
+
+
+def _get_box_arrays(sprites: Sequence[BaseSprite]) -> numpy.ndarray:
+    """Stack the sprites' oriented boxes into a (n, 10) float array.
+
+    Columns are x, y, ux, uy, half width, half height, min_x, min_y,
+    max_x, max_y.
+    """
+    rows = []
+    for sprite in sprites:
+        box = _get_oriented_box(sprite)
+        rows.append((box.x, box.y, box.ux, box.uy,
+                     box.width / 2, box.height / 2, *box.bounding_box))
+    return numpy.array(rows, dtype=float).reshape(-1, 10)
+
+
+def get_colliding_box_pairs(a_boxes: numpy.ndarray,
+                            b_boxes: numpy.ndarray,
+                            a_layers: Optional[numpy.ndarray] = None,
+                            b_layers: Optional[numpy.ndarray] = None
+                            ) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """Batch rotated-box test between two arrays of boxes.
+
+    Boxes are rows of the array layout returned by `_get_box_arrays`.
+    If given, `a_layers` and `b_layers` are (n, 2) integer arrays of each
+    box's collision layer and mask, and pairs that cannot collide are
+    discarded before any geometry test.
+    Returns the index arrays (i, j) of every colliding pair a[i], b[j].
+    """
+    i, j = _get_overlapping_bounds(a_boxes, b_boxes, a_layers, b_layers)
+    colliding = _get_rotated_box_overlaps(a_boxes[i], b_boxes[j])
+    return i[colliding], j[colliding]
+
+
+def _get_overlapping_bounds(a_boxes: numpy.ndarray,
+                            b_boxes: numpy.ndarray,
+                            a_layers: Optional[numpy.ndarray],
+                            b_layers: Optional[numpy.ndarray]
+                            ) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """Broadphase: the (i, j) pairs whose axis-aligned bounds overlap."""
+    found_i = []
+    found_j = []
+    n_b = len(b_boxes)
+    if n_b == 0 or len(a_boxes) == 0:
+        empty = numpy.empty(0, dtype=numpy.intp)
+        return empty, empty
+
+    # in blocks of a to bound memory use
+    block = max(1, _PAIR_BLOCK // n_b)
+    for start in range(0, len(a_boxes), block):
+        a = a_boxes[start:start + block]
+        overlap = ((a[:, None, 6] <= b_boxes[None, :, 8])
+                   & (a[:, None, 8] >= b_boxes[None, :, 6])
+                   & (a[:, None, 7] <= b_boxes[None, :, 9])
+                   & (a[:, None, 9] >= b_boxes[None, :, 7]))
+        if a_layers is not None and b_layers is not None:
+            layers = a_layers[start:start + block]
+            overlap &= ((layers[:, None, 0] & b_layers[None, :, 1]) != 0)
+            overlap &= ((b_layers[None, :, 0] & layers[:, None, 1]) != 0)
+        i, j = numpy.nonzero(overlap)
+        found_i.append(i + start)
+        found_j.append(j)
+    return numpy.concatenate(found_i), numpy.concatenate(found_j)
+
+
+def _get_rotated_box_overlaps(a: numpy.ndarray,
+                              b: numpy.ndarray) -> numpy.ndarray:
+    """Narrowphase: separating axis test on rows a[k], b[k] of two arrays."""
+    tx = b[:, 0] - a[:, 0]
+    ty = b[:, 1] - a[:, 1]
+    a_ux, a_uy, a_hw, a_hh = a[:, 2], a[:, 3], a[:, 4], a[:, 5]
+    b_ux, b_uy, b_hw, b_hh = b[:, 2], b[:, 3], b[:, 4], b[:, 5]
+    colliding = numpy.ones(len(a), dtype=bool)
+    # the width axis of a box is (ux, uy) and its height axis (uy, -ux)
+    for lx, ly in ((a_ux, a_uy), (a_uy, -a_ux), (b_ux, b_uy), (b_uy, -b_ux)):
+        a_radius = (a_hw * numpy.abs(a_ux * lx + a_uy * ly)
+                    + a_hh * numpy.abs(a_uy * lx - a_ux * ly))
+        b_radius = (b_hw * numpy.abs(b_ux * lx + b_uy * ly)
+                    + b_hh * numpy.abs(b_uy * lx - b_ux * ly))
+        colliding &= numpy.abs(tx * lx + ty * ly) <= a_radius + b_radius
+    return colliding
+
+
+def _get_layer_arrays(sprites: Sequence[BaseSprite],
+                      get_mask: Callable[[BaseSprite], int]
+                      ) -> numpy.ndarray:
+    """Stack the sprites' collision layers and masks into a (n, 2) array."""
+    return numpy.array([(_get_collision_layer(s), get_mask(s))
+                        for s in sprites], dtype=numpy.int64).reshape(-1, 2)
+
+
+def get_colliding_pairs(a_sprites: Sequence[BaseSprite],
+                        b_sprites: Sequence[BaseSprite],
+                        get_mask: Callable[[BaseSprite], int]
+                        = _get_collision_mask
+                        ) -> List[Tuple[int, int]]:
+    """Return the (i, j) indices of every colliding a_sprites[i], b_sprites[j].
+
+    Gives the same result as calling `can_collide` and `is_collision` on
+    every pair, but tests all pairs of rotated boxes with a few NumPy
+    array operations. Pairs where a sprite has a circle or polygon
+    collider are found using the bounds of its image and collider, see
+    `get_collider_bounding_box`, then tested one by one. Pairs are sorted
+    by i, then j.
+
+    `get_mask(sprite)` returns the collision mask used for each sprite,
+    the window uses it to apply its collision matrix.
+    """
+    a_boxes = _get_box_arrays(a_sprites)
+    b_boxes = _get_box_arrays(b_sprites)
+    a_shaped = _get_shaped(a_sprites, a_boxes)
+    b_shaped = _get_shaped(b_sprites, b_boxes)
+    i, j = _get_overlapping_bounds(a_boxes, b_boxes,
+                                   _get_layer_arrays(a_sprites, get_mask),
+                                   _get_layer_arrays(b_sprites, get_mask))
+    shaped = a_shaped[i] | b_shaped[j]
+    colliding = numpy.empty(len(i), dtype=bool)
+    boxes = ~shaped
+    colliding[boxes] = _get_rotated_box_overlaps(a_boxes[i[boxes]],
+                                                 b_boxes[j[boxes]])
+    for k in numpy.nonzero(shaped)[0].tolist():
+        colliding[k] = is_collision(a_sprites[i[k]], b_sprites[j[k]])
+    return list(zip(i[colliding].tolist(), j[colliding].tolist()))
+
+
+def _get_shaped(sprites: Sequence[BaseSprite],
+                boxes: numpy.ndarray) -> numpy.ndarray:
+    """Flag the sprites without a box collider and widen their bounds."""
+    shaped = numpy.zeros(len(sprites), dtype=bool)
+    for k, sprite in enumerate(sprites):
+        if not isinstance(_get_collider(sprite), BoxCollider):
+            shaped[k] = True
+            boxes[k, 6:] = get_collider_bounding_box(sprite)
+    return shaped
@@ -2,7 +2,6 @@ from typing import Iterable, Tuple
 from pyglet.shapes import Line
 from pyglet.graphics import Batch
 
-from pycat.collision import _get_sprite_basis_vectors, _get_sprite_vertices
 from pycat.base.base_sprite import BaseSprite as Sprite
 
 
@@ -12,9 +11,8 @@ def draw_sprite_rects(sprites: Iterable[Sprite],
     b = Batch()
     lines = []
     for sprite in sprites:
-        axis = _get_sprite_basis_vectors(sprite)
-        v = _get_sprite_vertices(sprite, axis)
-        for i in range(-1, 3):
-            line = Line(v[i].x, v[i].y, v[i+1].x, v[i+1].y, width, color, b)
+        c = sprite.get_oriented_box().corners
+        for i in range(-2, 6, 2):
+            line = Line(c[i], c[i+1], c[i+2], c[i+3], width, color, b)
             lines.append(line)
     b.draw()
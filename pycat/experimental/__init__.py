@@ -1,5 +1,6 @@
 from .draggable_sprite import DraggableSprite
 from .grid_layout import GridLayout, GridCell
 from .ldtk import LdtkFile, LdtkImageTile, LdtkTagTile
+from .tile_collision_map import TileCollisionMap
 
-__all__ = ['DraggableSprite', 'GridLayout', 'GridCell', 'LdtkFile', 'LdtkImageTile', 'LdtkTagTile']
+__all__ = ['DraggableSprite', 'GridLayout', 'GridCell', 'LdtkFile', 'LdtkImageTile', 'LdtkTagTile', 'TileCollisionMap']
@@ -1,3 +1,5 @@
+from weakref import WeakSet
+
 from pycat.core import Window, Sprite, Point
 from pycat.base import MouseEvent
 
@@ -6,12 +8,32 @@ class DraggableSprite(Sprite):
     currently_dragged = None
     top_layer = 0
 
+    # windows that route drag events to the currently dragged sprite
+    __routing_windows: 'WeakSet[Window]' = WeakSet()
+
     def __init__(self, window):
         super().__init__(window)
         self.mouse_offset = Point(0, 0)
         self.layer = DraggableSprite.top_layer
         DraggableSprite.top_layer += 1
         self.is_draggable = True
+        # subscribe once per window instead of once per sprite, so a drag
+        # event is only dispatched to the dragged sprite
+        if window not in DraggableSprite.__routing_windows:
+            DraggableSprite.__routing_windows.add(window)
+            window.subscribe(
+                on_mouse_drag=DraggableSprite.__route_mouse_drag,
+                on_mouse_release=DraggableSprite.__route_mouse_release)
+
+    @staticmethod
+    def __route_mouse_drag(e: MouseEvent):
+        if DraggableSprite.currently_dragged is not None:
+            DraggableSprite.currently_dragged.on_mouse_drag(e)
+
+    @staticmethod
+    def __route_mouse_release(e: MouseEvent):
+        if DraggableSprite.currently_dragged is not None:
+            DraggableSprite.currently_dragged.on_mouse_release(e)
 
     @property
     def is_draggable(self) -> bool:
@@ -20,12 +42,8 @@ class DraggableSprite(Sprite):
     @is_draggable.setter
     def is_draggable(self, is_draggable: bool):
         self.__is_draggable = is_draggable
-        if is_draggable:
-            self.window.subscribe(on_mouse_drag=self.on_mouse_drag,
-                                  on_mouse_release=self.on_mouse_release)
-        else:
-            self.window.unsubscribe(on_mouse_drag=self.on_mouse_drag,
-                                    on_mouse_release=self.on_mouse_release)
+        if not is_draggable and DraggableSprite.currently_dragged is self:
+            DraggableSprite.currently_dragged = None
 
     def on_click(self, e: MouseEvent):
         if not self.is_draggable:
@@ -1,8 +1,11 @@
 from typing import List, Tuple, Optional
+import numpy
 from pycat.core import Point, Sprite, Color, Window, Label
-from pycat.base import NumpyImage
+from pycat.base import NumpyImage, TextureManager
 import json
 from .ldtk_parser import ldtk_from_dict, TilesetDefinition, Level, LayerInstance
+from .tile_collision_map import TileCollisionMap
+from pycat.tilemap import TilemapLayer
 
 class LdtkLevelNotFoundException(Exception):
     def __init__(self, level_name: str, ldtk_file: str):
@@ -13,12 +16,16 @@ class LdtkLevelNotFoundException(Exception):
         return 'Level "'+self.level_name+'" not found in Ldtk file "'+self.ldtk_file+'"'
 
 class LdtkTagTile:
-    def __init__(self, center: Point, size: int, value: int, tag: str, color: str):
+    def __init__(self, center: Point, size: int, value: int, tag: str, color: str,
+                 width: Optional[int] = None, height: Optional[int] = None):
         self._center = center
         self._size = size
         self._value = value
         self._tag = tag
         self._color = color
+        # merged tiles cover a rectangle of cells
+        self._width = size if width is None else width
+        self._height = size if height is None else height
 
     @property
     def center(self) -> Point:
@@ -28,6 +35,14 @@ class LdtkTagTile:
     def size(self) -> int:
         return self._size
 
+    @property
+    def width(self) -> int:
+        return self._width
+
+    @property
+    def height(self) -> int:
+        return self._height
+
     @property
     def value(self) -> int:
         return self._value
@@ -75,15 +90,9 @@ class LdtkImageTile:
         return self._layer_idx
 
     def get_texture(self):
-        tileset_image = self._ldtk_file._tileset_images[self._tileset.rel_path]
-
-        segment = tileset_image[
-            self.tileset_bottom_left_corner.y : self.tileset_top_right_corner.y,
-            self.tileset_bottom_left_corner.x : self.tileset_top_right_corner.x
-            :
-        ]
-
-        return NumpyImage.get_texture_from_array(segment) 
+        corner = self.tileset_bottom_left_corner
+        return self._ldtk_file.get_tile_texture(
+            self._tileset.rel_path, corner.x, corner.y, self._tile_size)
  
             
 class LdtkFile:
@@ -97,7 +106,12 @@ class LdtkFile:
             for ts in self._data.defs.tilesets
         }
 
+        # tileset textures are uploaded once, when first needed
+        self._tileset_textures = {}
+        self._tile_textures = {}
+
         self._rendered_image_tiles: List[Sprite] = []
+        self._rendered_tilemap_layers: List[Tuple[Window, TilemapLayer]] = []
         self._rendered_tag_tiles: List[Sprite] = []
         self._rendered_debug_lables: List[Label] = []
 
@@ -108,12 +122,23 @@ class LdtkFile:
         level_name: str, 
         debug_tags: bool = False, 
         debug_layer: int = 1000,
-        debug_font_size: int = 10
+        debug_font_size: int = 10,
+        create_tag_sprites: bool = True,
+        merge_tag_tiles: bool = False,
+        use_tilemap_layers: bool = False
     ) -> None:
+        # set use_tilemap_layers=True to draw each tile layer in a few
+        # chunks instead of creating one sprite per tile
+        # set create_tag_sprites=False when using get_tile_collision_map()
+        # instead of one invisible sprite per IntGrid cell
 
         for tile in self._rendered_image_tiles:
             tile.delete()
         self._rendered_image_tiles = []
+
+        for tilemap_window, tilemap in self._rendered_tilemap_layers:
+            tilemap_window.delete_tilemap_layer(tilemap)
+        self._rendered_tilemap_layers = []
         
         for tile in self._rendered_tag_tiles:
             tile.delete()
@@ -123,17 +148,24 @@ class LdtkFile:
             label.delete()
         self._rendered_debug_lables = []        
 
-        for image_tile in self.get_image_tiles_for_level(level_name):
+        if use_tilemap_layers:
+            for tilemap in self.create_tilemap_layers(window, level_name):
+                self._rendered_tilemap_layers.append((window, tilemap))
+
+        image_tiles = [] if use_tilemap_layers else self.get_image_tiles_for_level(level_name)
+        for image_tile in image_tiles:
             tile = window.create_sprite(
                 position=image_tile.center, 
                 layer=image_tile.layer,
                 texture=image_tile.get_texture() )
             self._rendered_image_tiles.append(tile)
 
-        for tag_tile in self.get_tag_tiles_for_level(level_name):
+        tag_tiles = self.get_tag_tiles_for_level(level_name, merge_tag_tiles) if create_tag_sprites else []
+        for tag_tile in tag_tiles:
             tile = window.create_sprite(
                 position=tag_tile.center, 
-                scale=tag_tile._size, 
+                scale_x=tag_tile.width,
+                scale_y=tag_tile.height,
                 layer=debug_layer,
                 opacity=100 if debug_tags else 0,
                 tag=tag_tile.tag,
@@ -152,6 +184,49 @@ class LdtkFile:
                 self._rendered_debug_lables.append(label)
 
 
+    def create_tilemap_layers(
+        self,
+        window: Window,
+        level_name: str,
+        chunk_size: int = 32
+    ) -> List[TilemapLayer]:
+        """Creates a TilemapLayer in the window for each tile layer of a level."""
+        tiles_by_layer = {}
+        for image_tile in self.get_image_tiles_for_level(level_name):
+            key = (image_tile.layer, image_tile._tileset.rel_path, image_tile._tile_size)
+            tiles_by_layer.setdefault(key, []).append(image_tile)
+
+        tilemaps = []
+        for (layer, rel_path, tile_size), image_tiles in tiles_by_layer.items():
+            tiles = []
+            for image_tile in image_tiles:
+                extents = int(tile_size/2)
+                src = image_tile.tileset_bottom_left_corner
+                tiles.append((image_tile.center.x - extents, image_tile.center.y - extents, src.x, src.y))
+            tilemaps.append(window.create_tilemap_layer(
+                self.get_tileset_texture(rel_path), tile_size, tiles, layer, chunk_size))
+        return tilemaps
+
+    def get_tileset_texture(self, rel_path: str):
+        """Returns the tileset image as a texture, uploaded only once."""
+        texture = self._tileset_textures.get(rel_path)
+        if texture is None:
+            texture = NumpyImage.get_texture_from_array(self._tileset_images[rel_path])
+            TextureManager.acquire(texture)
+            self._tileset_textures[rel_path] = texture
+        return texture
+
+    def get_tile_texture(self, rel_path: str, x: int, y: int, size: int):
+        """Returns a region of a tileset texture, the same one for every tile using it."""
+        key = (rel_path, x, y, size)
+        texture = self._tile_textures.get(key)
+        if texture is None:
+            texture = self.get_tileset_texture(rel_path).get_region(x, y, size, size)
+            texture.anchor_x = size/2
+            texture.anchor_y = size/2
+            self._tile_textures[key] = texture
+        return texture
+
     def get_level(self, level_name: str) -> Optional[Level]:
         try:
             [level] = (level for level in self._data.levels if level.identifier == level_name)
@@ -188,7 +263,47 @@ class LdtkFile:
         return image_tiles
 
 
-    def get_tag_tiles_for_level(self, level_name: str) -> List[LdtkTagTile]:
+    def get_tile_collision_map(
+        self,
+        level_name: str,
+        layer_name: Optional[str] = None,
+        solid_values: Optional[List[int]] = None
+    ) -> TileCollisionMap:
+        """Returns a level's IntGrid layer as a TileCollisionMap.
+
+        Uses the first IntGrid layer if `layer_name` is not given.
+        Tile values can be looked up by their IntGrid identifier.
+        """
+        level = self.get_level(level_name)
+
+        for layer_instance in level.layer_instances:
+            if layer_instance.type != 'IntGrid':
+                continue
+            if layer_name is not None and layer_instance.identifier != layer_name:
+                continue
+
+            [layer_def] = (layer for layer in self._data.defs.layers
+                if layer.uid == layer_instance.layer_def_uid)
+
+            return TileCollisionMap.from_csv(
+                layer_instance.int_grid_csv,
+                layer_instance.c_wid,
+                layer_instance.c_hei,
+                layer_instance.grid_size,
+                identifiers={pair.value: pair.identifier for pair in layer_def.int_grid_values},
+                solid_values=solid_values,
+                x=layer_instance.px_total_offset_x or 0,
+                y=-(layer_instance.px_total_offset_y or 0))
+
+        raise ValueError('IntGrid layer "' + str(layer_name) + '" not found in level "' + level_name + '"')
+
+
+    def get_tag_tiles_for_level(self, level_name: str, merge: bool = False) -> List[LdtkTagTile]:
+        """Returns a tag tile for every non-zero IntGrid cell of a level.
+
+        If `merge` is True, neighbouring cells with the same value are
+        merged into as few rectangular tiles as possible.
+        """
         level = self.get_level(level_name)
 
         tag_tiles = []
@@ -206,22 +321,52 @@ class LdtkFile:
                 height = layer_instance.c_hei
                 width = layer_instance.c_wid
                 size = layer_instance.grid_size
-                extents = int(size*0.5)
-                csv = layer_instance.int_grid_csv
-
-                for i in range(width):
-                    for j in range(height):
-                        csv_idx = j*width + i
-                        csv_val = csv[csv_idx]
-                        if csv_val != 0:
-                            tag_tiles.append(
-                                LdtkTagTile(
-                                    Point(i*size+extents,height*size-j*size-extents),
-                                    size,
-                                    csv_val,
-                                    int_to_id_map[csv_val],
-                                    int_to_color_map[csv_val]
-                                )
-                            )
-
-        return tag_tiles
\ No newline at end of file
+                # rows from top to bottom, like the csv
+                grid = numpy.array(layer_instance.int_grid_csv, dtype=numpy.int32).reshape(height, width)
+
+                if merge:
+                    rects = _merge_cells(grid)
+                else:
+                    # column by column, then top to bottom
+                    i, j = numpy.nonzero(grid.T)
+                    values = grid[j, i]
+                    rects = zip(j.tolist(), i.tolist(), [1]*len(i), [1]*len(i), values.tolist())
+
+                for j, i, rows, cols, csv_val in rects:
+                    tag_tiles.append(
+                        LdtkTagTile(
+                            Point((i + cols/2)*size, (height - j - rows/2)*size),
+                            size,
+                            csv_val,
+                            int_to_id_map[csv_val],
+                            int_to_color_map[csv_val],
+                            cols*size,
+                            rows*size
+                        )
+                    )
+
+        return tag_tiles
+
+
+def _merge_cells(grid: numpy.ndarray) -> List[Tuple[int, int, int, int, int]]:
+    """Greedily cover the non-zero cells of a grid with same-valued rectangles.
+
+    Each rectangle grows as far right as it can, then as far down as its
+    whole width allows. Returns (row, col, rows, cols, value) tuples.
+    """
+    used = grid == 0
+    rects = []
+    for j, i in zip(*(a.tolist() for a in numpy.nonzero(grid))):
+        if used[j, i]:
+            continue
+        value = grid[j, i]
+        run = (grid[j, i:] == value) & ~used[j, i:]
+        cols = int(numpy.argmin(run)) if not run.all() else len(run)
+        rows = 1
+        while (j + rows < grid.shape[0]
+                and ((grid[j + rows, i:i + cols] == value)
+                     & ~used[j + rows, i:i + cols]).all()):
+            rows += 1
+        used[j:j + rows, i:i + cols] = True
+        rects.append((j, i, rows, cols, int(value)))
+    return rects
\ No newline at end of file
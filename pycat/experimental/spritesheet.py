@@ -1,6 +1,5 @@
-import numpy
-from typing import List
-from pycat.base import NumpyImage, Texture
+from typing import Dict, List, Optional, Tuple
+from pycat.base import NumpyImage, Texture, TextureManager
 
 
 class SpriteSheet:
@@ -9,6 +8,9 @@ class SpriteSheet:
         self.tile_size_x = tile_size_x
         self.tile_size_y = tile_size_y
         self.cell_names = {} if cell_names is None else cell_names
+        # the whole sheet is uploaded once, cells are regions of it
+        self._texture: Optional[Texture] = None
+        self._regions: Dict[Tuple[int, int, bool], Texture] = {}
 
     def update_cell_names(self, new_dict):
         self.cell_names.update(new_dict)
@@ -26,14 +28,27 @@ class SpriteSheet:
         ]
 
     def get_texture(self, i: int, j: int, flip_lr: bool = False) -> Texture:
-        cut = self.img_array[                
-            j * self.tile_size_y : (j+1) * self.tile_size_y,
-            i * self.tile_size_x : (i+1) * self.tile_size_x,
-            :
-        ]
-
-        return NumpyImage.get_texture_from_array(
-            numpy.fliplr(cut) if flip_lr else cut)
+        # the same cell always returns the same texture region
+        key = (i, j, flip_lr)
+        region = self._regions.get(key)
+        if region is None:
+            if self._texture is None:
+                self._texture = NumpyImage.get_texture_from_array(self.img_array)
+                # kept while the sheet exists, even if no sprite uses it
+                TextureManager.acquire(self._texture)
+            region = self._texture.get_region(
+                i * self.tile_size_x,
+                j * self.tile_size_y,
+                self.tile_size_x,
+                self.tile_size_y
+            )
+            if flip_lr:
+                # flipped through texture coordinates, no pixels are copied
+                region = region.get_transform(flip_x=True)
+            region.anchor_x = region.width / 2
+            region.anchor_y = region.height / 2
+            self._regions[key] = region
+        return region
 
     def get_all_textures(self, top_to_bottom: bool = True) -> List[Texture]:
         # Returns all textures from left to right along the top row, then the second top row, etc.
@@ -0,0 +1,284 @@
+"""The tile_collision_map module implements collision against a tile grid."""
+
+from math import ceil, floor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy
+
+from pycat.base.base_sprite import BaseSprite
+
+Box = Tuple[float, float, float, float]
+
+# tolerance so boxes resting exactly on a tile edge stay outside the tile
+_EPSILON = 1e-9
+
+
+class TileCollisionMap:
+    """Collision against a grid of integer tile values.
+
+    The grid is given top row first, like LDtk's `int_grid_csv`, with 0
+    meaning an empty cell. Tile (col, row) covers the world rectangle
+    from `(x + col * tile_size, y + row * tile_size)`, where row 0 is the
+    bottom row, so tiles line up with pycat's y-up coordinates.
+
+    All queries are answered by index arithmetic on a NumPy array, no
+    sprites are created for the tiles. Boxes that only touch a tile's
+    edge do not overlap it, so a box can rest on the ground.
+    """
+
+    def __init__(self,
+                 grid: numpy.ndarray,
+                 tile_size: float,
+                 identifiers: Optional[Dict[int, str]] = None,
+                 solid_values: Optional[Iterable[int]] = None,
+                 x: float = 0,
+                 y: float = 0):
+        """Create a collision map from a (rows, cols) array of tile values.
+
+        `identifiers` maps tile values to names, e.g. LDtk IntGrid value
+        identifiers. Only tiles with a value in `solid_values` block
+        movement, by default every non-zero value does.
+        """
+        grid = numpy.asarray(grid)
+        if grid.ndim != 2:
+            raise ValueError('grid must be a 2D array')
+        if tile_size <= 0:
+            raise ValueError('tile_size must be positive')
+        # store bottom row first so row indices grow with y
+        self.__values = numpy.ascontiguousarray(grid[::-1])
+        self.__tile_size = tile_size
+        self.__x = x
+        self.__y = y
+        self.__identifiers: Dict[int, str] = dict(identifiers or {})
+        self.__values_by_identifier = {
+            name: value for value, name in self.__identifiers.items()}
+        if solid_values is None:
+            self.__solid = self.__values != 0
+        else:
+            self.__solid = numpy.isin(self.__values, list(solid_values))
+
+    @classmethod
+    def from_csv(cls,
+                 csv: List[int],
+                 columns: int,
+                 rows: int,
+                 tile_size: float,
+                 **kwargs) -> 'TileCollisionMap':
+        """Create a collision map from a flat, top row first list of values."""
+        grid = numpy.array(csv, dtype=numpy.int32).reshape(rows, columns)
+        return cls(grid, tile_size, **kwargs)
+
+    ##################################################################
+    # Grid
+    ##################################################################
+
+    @property
+    def tile_size(self) -> float:
+        return self.__tile_size
+
+    @property
+    def columns(self) -> int:
+        return self.__values.shape[1]
+
+    @property
+    def rows(self) -> int:
+        return self.__values.shape[0]
+
+    @property
+    def values(self) -> numpy.ndarray:
+        """The (rows, cols) tile values, bottom row first, read-only."""
+        view = self.__values.view()
+        view.flags.writeable = False
+        return view
+
+    def get_value(self, identifier: str) -> int:
+        """Return the tile value with an identifier."""
+        return self.__values_by_identifier[identifier]
+
+    def get_identifier(self, value: int) -> Optional[str]:
+        """Return the identifier of a tile value, if it has one."""
+        return self.__identifiers.get(value)
+
+    def get_tile_at(self, x: float, y: float) -> Tuple[int, int]:
+        """Return the (col, row) of the tile containing a point."""
+        size = self.__tile_size
+        return (floor((x - self.__x) / size), floor((y - self.__y) / size))
+
+    def get_value_at(self, x: float, y: float) -> int:
+        """Return the value of the tile containing a point, 0 outside."""
+        col, row = self.get_tile_at(x, y)
+        if 0 <= col < self.columns and 0 <= row < self.rows:
+            return int(self.__values[row, col])
+        return 0
+
+    def get_tile_rect(self, col: int, row: int) -> Box:
+        """Return the (min_x, min_y, max_x, max_y) covered by a tile."""
+        size = self.__tile_size
+        min_x = self.__x + col * size
+        min_y = self.__y + row * size
+        return (min_x, min_y, min_x + size, min_y + size)
+
+    def get_tiles_with_identifier(self,
+                                  identifier: str) -> List[Tuple[int, int]]:
+        """Return the (col, row) of every tile with an identifier.
+
+        Replaces looking up one sprite per tile with `get_sprites_with_tag`.
+        """
+        value = self.__values_by_identifier.get(identifier)
+        if value is None:
+            return []
+        rows, cols = numpy.nonzero(self.__values == value)
+        return list(zip(cols.tolist(), rows.tolist()))
+
+    ##################################################################
+    # Overlap queries
+    ##################################################################
+
+    def __get_tile_range(self,
+                         min_x: float,
+                         min_y: float,
+                         max_x: float,
+                         max_y: float) -> Tuple[int, int, int, int]:
+        """Return the clipped (col0, row0, col1, row1) overlapped by a box.
+
+        The range is half-open, col1 and row1 are excluded.
+        """
+        size = self.__tile_size
+        col0 = floor((min_x - self.__x) / size + _EPSILON)
+        row0 = floor((min_y - self.__y) / size + _EPSILON)
+        col1 = ceil((max_x - self.__x) / size - _EPSILON)
+        row1 = ceil((max_y - self.__y) / size - _EPSILON)
+        return (max(col0, 0), max(row0, 0),
+                min(col1, self.columns), min(row1, self.rows))
+
+    def get_overlapping_tiles(self,
+                              min_x: float,
+                              min_y: float,
+                              max_x: float,
+                              max_y: float,
+                              identifier: Optional[str] = None
+                              ) -> List[Tuple[int, int]]:
+        """Return the (col, row) of the tiles overlapping a box.
+
+        Only solid tiles are returned, or only tiles with `identifier`
+        if it is given.
+        """
+        col0, row0, col1, row1 = self.__get_tile_range(min_x, min_y,
+                                                       max_x, max_y)
+        if col0 >= col1 or row0 >= row1:
+            return []
+        if identifier is None:
+            region = self.__solid[row0:row1, col0:col1]
+        else:
+            value = self.__values_by_identifier.get(identifier)
+            if value is None:
+                return []
+            region = self.__values[row0:row1, col0:col1] == value
+        rows, cols = numpy.nonzero(region)
+        return list(zip((cols + col0).tolist(), (rows + row0).tolist()))
+
+    def is_overlapping(self,
+                       min_x: float,
+                       min_y: float,
+                       max_x: float,
+                       max_y: float,
+                       identifier: Optional[str] = None) -> bool:
+        """Return True if a box overlaps a solid tile, see `get_overlapping_tiles`."""
+        col0, row0, col1, row1 = self.__get_tile_range(min_x, min_y,
+                                                       max_x, max_y)
+        if col0 >= col1 or row0 >= row1:
+            return False
+        if identifier is None:
+            return bool(self.__solid[row0:row1, col0:col1].any())
+        value = self.__values_by_identifier.get(identifier)
+        return (value is not None
+                and bool((self.__values[row0:row1, col0:col1] == value).any()))
+
+    def is_sprite_overlapping(self,
+                              sprite: BaseSprite,
+                              identifier: Optional[str] = None) -> bool:
+        """Return True if a sprite's bounding box overlaps a solid tile."""
+        return self.is_overlapping(*sprite.get_bounding_box(), identifier)
+
+    ##################################################################
+    # Movement
+    ##################################################################
+
+    def __sweep(self,
+                low: float,
+                high: float,
+                delta: float,
+                origin: float,
+                solid: numpy.ndarray) -> Tuple[float, bool]:
+        """Resolve a move of [low, high] by delta along the sweep axis.
+
+        `solid` has one entry per tile along the axis, True if any tile
+        in the box's other-axis range is solid.
+        """
+        size = self.__tile_size
+        n = len(solid)
+        if delta > 0:
+            # first tile whose low edge is at or beyond the box's high edge
+            start = ceil((high - origin) / size - _EPSILON)
+            end = ceil((high + delta - origin) / size - _EPSILON)
+            start = max(start, 0)
+            end = min(end, n)
+            if start < end:
+                hits = numpy.flatnonzero(solid[start:end])
+                if len(hits):
+                    return origin + (start + hits[0]) * size - high, True
+        elif delta < 0:
+            # first tile whose high edge is at or below the box's low edge
+            start = floor((low - origin) / size + _EPSILON) - 1
+            end = floor((low + delta - origin) / size + _EPSILON)
+            start = min(start, n - 1)
+            end = max(end, 0)
+            if start >= end:
+                hits = numpy.flatnonzero(solid[end:start + 1][::-1])
+                if len(hits):
+                    col = start - hits[0]
+                    return origin + (col + 1) * size - low, True
+        return delta, False
+
+    def move_box(self,
+                 box: Box,
+                 dx: float,
+                 dy: float) -> Tuple[float, float, bool, bool]:
+        """Move a (min_x, min_y, max_x, max_y) box, stopping at solid tiles.
+
+        The box moves along x first, then along y. Returns the allowed
+        (dx, dy) and whether the move was blocked along x and along y.
+        Tiles the box already overlaps do not block it, so it can move
+        out of them.
+        """
+        min_x, min_y, max_x, max_y = box
+        hit_x = hit_y = False
+        if dx:
+            _, row0, _, row1 = self.__get_tile_range(min_x, min_y,
+                                                     max_x, max_y)
+            if row0 < row1:
+                solid = self.__solid[row0:row1].any(axis=0)
+                dx, hit_x = self.__sweep(min_x, max_x, dx, self.__x, solid)
+            min_x += dx
+            max_x += dx
+        if dy:
+            col0, _, col1, _ = self.__get_tile_range(min_x, min_y,
+                                                     max_x, max_y)
+            if col0 < col1:
+                solid = self.__solid[:, col0:col1].any(axis=1)
+                dy, hit_y = self.__sweep(min_y, max_y, dy, self.__y, solid)
+        return dx, dy, hit_x, hit_y
+
+    def move_sprite(self,
+                    sprite: BaseSprite,
+                    dx: float,
+                    dy: float) -> Tuple[bool, bool]:
+        """Move a sprite by (dx, dy), stopping its bounding box at solid tiles.
+
+        Returns whether the move was blocked along x and along y, e.g.
+        `_, on_ground = tiles.move_sprite(player, 0, -fall_speed)`.
+        """
+        dx, dy, hit_x, hit_y = self.move_box(sprite.get_bounding_box(),
+                                             dx, dy)
+        sprite.position = (sprite.x + dx, sprite.y + dy)
+        return hit_x, hit_y
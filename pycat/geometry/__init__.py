@@ -1,5 +1,7 @@
 from .point import Point
+from .spatial_hash import SpatialHash
 
 __all__ = [
     'Point',
-]
\ No newline at end of file
+    'SpatialHash',
+]
@@ -0,0 +1,98 @@
+"""The oriented_box module implements a rotated rectangle used in collision."""
+
+from math import cos, radians, sin
+from typing import Optional, Tuple
+
+from pycat.geometry.point import Point
+
+
+class OrientedBox:
+    """A rectangle of a given size, centered at (x, y) and rotated.
+
+    The box is described by its unit basis vectors `u` (along the width)
+    and `v` (along the height), its four corners and its axis-aligned
+    bounding box. All values are computed once on creation, `Point`
+    objects are only created when first requested.
+
+    Rotation is counter-clockwise positive, in degrees.
+    """
+
+    __slots__ = ['x', 'y', 'width', 'height', 'rotation',
+                 'ux', 'uy', 'vx', 'vy', 'corners', 'bounding_box',
+                 '_basis', '_vertices']
+
+    def __init__(self,
+                 x: float,
+                 y: float,
+                 width: float,
+                 height: float,
+                 rotation: float = 0):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.rotation = rotation
+
+        r = radians(rotation)
+        ux = cos(r)
+        uy = sin(r)
+        self.ux = ux
+        self.uy = uy
+        self.vx = uy
+        self.vy = -ux
+
+        wx = ux * width / 2
+        wy = uy * width / 2
+        hx = uy * height / 2
+        hy = -ux * height / 2
+        # same winding as collision: (+u+v), (-u+v), (-u-v), (+u-v)
+        self.corners = (x + wx + hx, y + wy + hy,
+                        x - wx + hx, y - wy + hy,
+                        x - wx - hx, y - wy - hy,
+                        x + wx - hx, y + wy - hy)
+
+        dx = abs(wx) + abs(hx)
+        dy = abs(wy) + abs(hy)
+        self.bounding_box = (x - dx, y - dy, x + dx, y + dy)
+
+        self._basis: Optional[Tuple[Point, Point]] = None
+        self._vertices: Optional[Tuple[Point, Point, Point, Point]] = None
+
+    @property
+    def basis(self) -> Tuple[Point, Point]:
+        """The (u, v) unit vectors of the box, do not modify."""
+        if self._basis is None:
+            self._basis = (Point(self.ux, self.uy), Point(self.vx, self.vy))
+        return self._basis
+
+    @property
+    def vertices(self) -> Tuple[Point, Point, Point, Point]:
+        """The four corners of the box as Points, do not modify."""
+        if self._vertices is None:
+            c = self.corners
+            self._vertices = (Point(c[0], c[1]), Point(c[2], c[3]),
+                              Point(c[4], c[5]), Point(c[6], c[7]))
+        return self._vertices
+
+    def projection_overlaps(self,
+                            other: 'OrientedBox',
+                            x_buffer: float = 0,
+                            y_buffer: float = 0) -> bool:
+        """Test if the other box's corners overlap this box on both axes.
+
+        This is one half of a separating axis test: the other box is
+        projected onto this box's width and height axes.
+        """
+        ox, oy = self.corners[4], self.corners[5]
+        c = other.corners
+        for qx, qy, low, high in ((self.ux, self.uy,
+                                   x_buffer, self.width - x_buffer),
+                                  (self.vx, self.vy,
+                                   y_buffer, self.height - y_buffer)):
+            p0 = (c[0] - ox) * qx + (c[1] - oy) * qy
+            p1 = (c[2] - ox) * qx + (c[3] - oy) * qy
+            p2 = (c[4] - ox) * qx + (c[5] - oy) * qy
+            p3 = (c[6] - ox) * qx + (c[7] - oy) * qy
+            if max(p0, p1, p2, p3) < low or min(p0, p1, p2, p3) > high:
+                return False
+        return True
@@ -0,0 +1,352 @@
+"""The spatial_hash module implements a uniform grid broadphase."""
+
+from heapq import heappush, heapreplace, nsmallest
+from math import floor, inf
+from typing import (AbstractSet, Callable, Dict, FrozenSet, Hashable,
+                    Iterable, Iterator, List, Optional, Set, Tuple)
+
+Bounds = Tuple[float, float, float, float]
+CellRange = Tuple[int, int, int, int]
+
+_EMPTY_CELL: FrozenSet[Hashable] = frozenset()
+
+
+class SpatialHash:
+    """Buckets items into square grid cells by their bounding box.
+
+    Each item is stored with its axis-aligned bounding box given as
+    `(min_x, min_y, max_x, max_y)`. An item is placed in every cell its
+    bounding box overlaps, so a query only has to visit the cells covered
+    by the query region instead of every item.
+
+    Items covering more than `max_cells_per_item` cells (e.g. a large
+    background) are kept in a separate list that every query checks,
+    so moving them does not touch thousands of cells.
+
+    Query results are returned in the order the items were first inserted.
+    """
+
+    max_cells_per_item = 64
+
+    def __init__(self, cell_size: float = 128):
+        if cell_size <= 0:
+            raise ValueError('cell_size must be positive')
+        self.__cell_size = cell_size
+        self.__cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+        self.__large_items: Set[Hashable] = set()
+        self.__bounds: Dict[Hashable, Bounds] = {}
+        self.__ranges: Dict[Hashable, CellRange] = {}
+        self.__order: Dict[Hashable, int] = {}
+        self.__next_order = 0
+
+    @property
+    def cell_size(self) -> float:
+        return self.__cell_size
+
+    def __len__(self) -> int:
+        return len(self.__bounds)
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self.__bounds
+
+    def __iter__(self):
+        return iter(self.__bounds)
+
+    def get_bounds(self, item: Hashable) -> Bounds:
+        """Return the bounding box an item was last inserted with."""
+        return self.__bounds[item]
+
+    def get_cell_range(self,
+                       min_x: float,
+                       min_y: float,
+                       max_x: float,
+                       max_y: float) -> CellRange:
+        """Return the (min_i, min_j, max_i, max_j) cells covering a region."""
+        size = self.__cell_size
+        return (floor(min_x / size), floor(min_y / size),
+                floor(max_x / size), floor(max_y / size))
+
+    def get_cell(self, i: int, j: int) -> AbstractSet[Hashable]:
+        """Return the items stored in cell (i, j), read-only.
+
+        Items too large to be stored in cells are not included,
+        see `get_large_items()`.
+        """
+        return self.__cells.get((i, j), _EMPTY_CELL)
+
+    def get_large_items(self) -> AbstractSet[Hashable]:
+        """Return the items that are checked by every query, read-only."""
+        return self.__large_items
+
+    def insert(self,
+               item: Hashable,
+               min_x: float,
+               min_y: float,
+               max_x: float,
+               max_y: float):
+        """Add an item, or update it if it was already inserted."""
+        if item in self.__bounds:
+            self.update(item, min_x, min_y, max_x, max_y)
+            return
+        cell_range = self.get_cell_range(min_x, min_y, max_x, max_y)
+        self.__bounds[item] = (min_x, min_y, max_x, max_y)
+        self.__ranges[item] = cell_range
+        self.__order[item] = self.__next_order
+        self.__next_order += 1
+        self.__add_to_cells(item, cell_range)
+
+    def update(self,
+               item: Hashable,
+               min_x: float,
+               min_y: float,
+               max_x: float,
+               max_y: float):
+        """Move an item, only touching cells if its cell range changed."""
+        if item not in self.__bounds:
+            self.insert(item, min_x, min_y, max_x, max_y)
+            return
+        self.__bounds[item] = (min_x, min_y, max_x, max_y)
+        cell_range = self.get_cell_range(min_x, min_y, max_x, max_y)
+        old_range = self.__ranges[item]
+        if cell_range != old_range:
+            self.__remove_from_cells(item, old_range)
+            self.__add_to_cells(item, cell_range)
+            self.__ranges[item] = cell_range
+
+    def remove(self, item: Hashable):
+        """Remove an item, ignoring items that were never inserted."""
+        if item not in self.__bounds:
+            return
+        self.__remove_from_cells(item, self.__ranges.pop(item))
+        del self.__bounds[item]
+        del self.__order[item]
+
+    def clear(self):
+        self.__cells.clear()
+        self.__large_items.clear()
+        self.__bounds.clear()
+        self.__ranges.clear()
+        self.__order.clear()
+
+    def query(self,
+              min_x: float,
+              min_y: float,
+              max_x: float,
+              max_y: float) -> List[Hashable]:
+        """Return the items whose bounding box overlaps a region.
+
+        Boxes that only touch the region's edge are included.
+        """
+        i0, j0, i1, j1 = self.get_cell_range(min_x, min_y, max_x, max_y)
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self.__bounds):
+            # the region covers more cells than there are items
+            candidates = self.__bounds.keys()
+        else:
+            cells = self.__cells
+            candidates = set(self.__large_items)
+            for i in range(i0, i1 + 1):
+                for j in range(j0, j1 + 1):
+                    cell = cells.get((i, j))
+                    if cell:
+                        candidates.update(cell)
+        bounds = self.__bounds
+        found = []
+        for item in candidates:
+            b = bounds[item]
+            if (b[0] <= max_x and b[2] >= min_x
+                    and b[1] <= max_y and b[3] >= min_y):
+                found.append(item)
+        found.sort(key=self.__order.__getitem__)
+        return found
+
+    def query_point(self, x: float, y: float) -> List[Hashable]:
+        """Return the items whose bounding box contains a point."""
+        return self.query(x, y, x, y)
+
+    def query_radius(self,
+                     x: float,
+                     y: float,
+                     radius: float) -> List[Hashable]:
+        """Return the items whose bounding box center is within a radius."""
+        bounds = self.__bounds
+        r2 = radius * radius
+        found = []
+        for item in self.query(x - radius, y - radius, x + radius, y + radius):
+            b = bounds[item]
+            dx = (b[0] + b[2]) * 0.5 - x
+            dy = (b[1] + b[3]) * 0.5 - y
+            if dx * dx + dy * dy <= r2:
+                found.append(item)
+        return found
+
+    def query_nearest(self,
+                      x: float,
+                      y: float,
+                      k: int = 1,
+                      predicate: Optional[Callable[[Hashable], bool]] = None
+                      ) -> List[Hashable]:
+        """Return the k items whose bounding box center is closest, closest first.
+
+        Only items for which `predicate(item)` is True are returned. The
+        search visits rings of cells around (x, y) and stops as soon as no
+        unvisited cell can hold a closer item. Ties are broken by insertion
+        order.
+        """
+        if k <= 0:
+            return []
+        size = self.__cell_size
+        ci, cj = floor(x / size), floor(y / size)
+        n = len(self.__bounds)
+        # heap of (-distance², -order, item) holding the k closest so far
+        best: List[Tuple[float, int, Hashable]] = []
+        seen: Set[Hashable] = set()
+        self.__push_nearest(best, seen, self.__large_items, x, y, k, predicate)
+        r = 0
+        while True:
+            if (2 * r + 1) ** 2 > n:
+                # the rings now cover more cells than there are items
+                return self.nearest(self.__bounds, x, y, k, predicate)
+            if r == 0:
+                self.__push_nearest(best, seen, self.get_cell(ci, cj),
+                                    x, y, k, predicate)
+            else:
+                for i in range(ci - r, ci + r + 1):
+                    self.__push_nearest(best, seen, self.get_cell(i, cj - r),
+                                        x, y, k, predicate)
+                    self.__push_nearest(best, seen, self.get_cell(i, cj + r),
+                                        x, y, k, predicate)
+                for j in range(cj - r + 1, cj + r):
+                    self.__push_nearest(best, seen, self.get_cell(ci - r, j),
+                                        x, y, k, predicate)
+                    self.__push_nearest(best, seen, self.get_cell(ci + r, j),
+                                        x, y, k, predicate)
+            if len(best) == k:
+                # closest any center outside the visited rings can be
+                reach = min(x - (ci - r) * size, (ci + r + 1) * size - x,
+                            y - (cj - r) * size, (cj + r + 1) * size - y)
+                if -best[0][0] < reach * reach:
+                    break
+            r += 1
+        best.sort(reverse=True)
+        return [item for _, _, item in best]
+
+    def nearest(self,
+                items: Iterable[Hashable],
+                x: float,
+                y: float,
+                k: int = 1,
+                predicate: Optional[Callable[[Hashable], bool]] = None
+                ) -> List[Hashable]:
+        """Return the k closest of the given inserted items, closest first.
+
+        Scans every item, which is faster than `query_nearest` when only
+        a few items can match.
+        """
+        bounds = self.__bounds
+        order = self.__order
+
+        def key(item):
+            b = bounds[item]
+            dx = (b[0] + b[2]) * 0.5 - x
+            dy = (b[1] + b[3]) * 0.5 - y
+            return (dx * dx + dy * dy, order[item])
+
+        if predicate is not None:
+            items = [item for item in items if predicate(item)]
+        return nsmallest(k, items, key=key)
+
+    def __push_nearest(self,
+                       best: List[Tuple[float, int, Hashable]],
+                       seen: Set[Hashable],
+                       items: Iterable[Hashable],
+                       x: float,
+                       y: float,
+                       k: int,
+                       predicate: Optional[Callable[[Hashable], bool]]):
+        bounds = self.__bounds
+        order = self.__order
+        for item in items:
+            if item in seen:
+                continue
+            seen.add(item)
+            if predicate is not None and not predicate(item):
+                continue
+            b = bounds[item]
+            dx = (b[0] + b[2]) * 0.5 - x
+            dy = (b[1] + b[3]) * 0.5 - y
+            entry = (-(dx * dx + dy * dy), -order[item], item)
+            if len(best) < k:
+                heappush(best, entry)
+            elif entry[:2] > best[0][:2]:
+                heapreplace(best, entry)
+
+    def get_cells_along_segment(self,
+                                x0: float,
+                                y0: float,
+                                x1: float,
+                                y1: float
+                                ) -> Iterator[Tuple[int, int, float]]:
+        """Yield the cells a segment passes through, in order.
+
+        Each cell is yielded as `(i, j, t)` where `t` in [0, 1] is the
+        fraction of the segment at which it leaves the cell. Items in a
+        later cell can only be hit after `t`, so a ray cast can stop
+        early once it has a closer hit.
+        """
+        size = self.__cell_size
+        i, j = floor(x0 / size), floor(y0 / size)
+        i_end, j_end = floor(x1 / size), floor(y1 / size)
+        dx = x1 - x0
+        dy = y1 - y0
+        step_i = 1 if dx > 0 else -1
+        step_j = 1 if dy > 0 else -1
+        if dx != 0:
+            t_max_x = ((i + (step_i > 0)) * size - x0) / dx
+            t_delta_x = size / abs(dx)
+        else:
+            t_max_x = t_delta_x = inf
+        if dy != 0:
+            t_max_y = ((j + (step_j > 0)) * size - y0) / dy
+            t_delta_y = size / abs(dy)
+        else:
+            t_max_y = t_delta_y = inf
+
+        # one step per cell boundary crossed, guards against rounding
+        for _ in range(abs(i_end - i) + abs(j_end - j) + 1):
+            t_exit = min(t_max_x, t_max_y, 1.0)
+            yield i, j, t_exit
+            if t_exit >= 1.0:
+                return
+            if t_max_x < t_max_y:
+                i += step_i
+                t_max_x += t_delta_x
+            else:
+                j += step_j
+                t_max_y += t_delta_y
+
+    def __add_to_cells(self, item: Hashable, cell_range: CellRange):
+        cells = self.__cells
+        i0, j0, i1, j1 = cell_range
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > self.max_cells_per_item:
+            self.__large_items.add(item)
+            return
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                cell = cells.get((i, j))
+                if cell is None:
+                    cells[(i, j)] = {item}
+                else:
+                    cell.add(item)
+
+    def __remove_from_cells(self, item: Hashable, cell_range: CellRange):
+        cells = self.__cells
+        i0, j0, i1, j1 = cell_range
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > self.max_cells_per_item:
+            self.__large_items.discard(item)
+            return
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                cell = cells[(i, j)]
+                cell.discard(item)
+                if not cell:
+                    del cells[(i, j)]
@@ -0,0 +1,265 @@
+"""The particles module implements the ParticleEmitter class."""
+
+from time import perf_counter
+from typing import NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy
+
+from pycat.base.base_sprite import BaseSprite
+from pycat.base.image import Texture
+from pycat.sprite_array import SpriteArray
+
+# a fixed value, or a (min, max) range sampled for each particle
+Range = Union[float, Sequence[float]]
+
+
+class ParticleEmitterStats(NamedTuple):
+    """Counts and timings of one emitter, see `ParticleEmitter.stats`."""
+    count: int
+    emitted: int
+    dropped: int
+    expired: int
+    update_time: float
+    draw_time: float
+
+
+# lifetimes are clamped to this, so age / lifetime stays finite
+_MIN_LIFETIME = 1e-6
+
+
+def _get_curve(values, channels: int = 1) -> numpy.ndarray:
+    """Return keyframes as an (n, channels) array, spaced over a lifetime."""
+    curve = numpy.array(values, dtype=float).reshape(-1, channels)
+    if len(curve) == 1:
+        curve = numpy.concatenate((curve, curve))
+    return curve
+
+
+def _sample_range(random: numpy.random.Generator,
+                  value: Range,
+                  n: int):
+    """Return a fixed value as is, or n values sampled from a range."""
+    if numpy.ndim(value) == 0:
+        return value
+    if numpy.shape(value) != (2,):
+        raise TypeError('a range must be a number or a (min, max) pair, '
+                        'not ' + repr(value))
+    return random.uniform(value[0], value[1], n)
+
+
+def _sample_curve(curve: numpy.ndarray, t: numpy.ndarray) -> numpy.ndarray:
+    """Linearly interpolate the keyframes of a curve at each t in [0, 1]."""
+    position = numpy.clip(t, 0, 1) * (len(curve) - 1)
+    i = numpy.minimum(position.astype(int), len(curve) - 2)
+    w = (position - i)[:, None]
+    return curve[i] * (1 - w) + curve[i + 1] * w
+
+
+class ParticleEmitter(SpriteArray):
+    """Emits particles that move, fade and expire in whole-array updates.
+
+    Each particle gets its lifetime, speed, direction and spin from the
+    emitter's ranges when it is emitted. Its color, opacity and scale
+    follow curves over its lifetime: a sequence of keyframes evenly
+    spaced from birth to death, e.g. `opacity=(0, 255, 0)` fades in and
+    out again.
+
+        sparks = window.add_drawable(ParticleEmitter(
+            texture, rate=200, lifetime=(0.5, 1), speed=(100, 200),
+            direction=90, spread=30, acceleration=(0, -300),
+            color=[(255, 255, 0), (255, 0, 0)], opacity=(255, 0)))
+        sparks.attach_to(player)
+
+    Expired particles are removed every update and their slots are used
+    by new particles. Particles emitted while all `capacity` slots are
+    in use are dropped.
+    """
+
+    def __init__(self,
+                 textures: Union[Texture, Sequence[Texture]],
+                 capacity: int = 1024,
+                 rate: float = 0,
+                 lifetime: Range = 1,
+                 speed: Range = 100,
+                 direction: float = 90,
+                 spread: float = 360,
+                 spin: Range = 0,
+                 acceleration: Tuple[float, float] = (0, 0),
+                 color=(255, 255, 255),
+                 opacity=(255, 0),
+                 scale=1,
+                 x: float = 0,
+                 y: float = 0,
+                 seed: Optional[int] = None):
+        super().__init__(textures, capacity)
+        self.__capacity = capacity
+        self.rate = rate
+        self.lifetime = lifetime
+        self.speed = speed
+        self.direction = direction
+        self.spread = spread
+        self.spin = spin
+        self.acceleration = acceleration
+        self.color_curve = color
+        self.opacity_curve = opacity
+        self.scale_curve = scale
+        self.origin_x = x
+        self.origin_y = y
+
+        self.__random = numpy.random.default_rng(seed)
+        self.__rate_remainder = 0.0
+        self.__sprite: Optional[BaseSprite] = None
+        self.__offset = (0.0, 0.0)
+        self.__emitted = 0
+        self.__dropped = 0
+        self.__expired = 0
+        self.__update_time = 0.0
+        self.__draw_time = 0.0
+
+        for name in ('age', 'lifetime', 'vx', 'vy', 'ax', 'ay', 'spin'):
+            self.add_attribute('particle_' + name)
+
+    ##################################################################
+    # Curves
+    ##################################################################
+
+    @property
+    def color_curve(self) -> numpy.ndarray:
+        return self.__color_curve
+
+    @color_curve.setter
+    def color_curve(self, colors):
+        if numpy.shape(colors)[-1:] != (3,):
+            raise ValueError('colors must be (r, g, b) tuples')
+        self.__color_curve = _get_curve(colors, 3)
+
+    @property
+    def opacity_curve(self) -> numpy.ndarray:
+        return self.__opacity_curve
+
+    @opacity_curve.setter
+    def opacity_curve(self, opacities):
+        self.__opacity_curve = _get_curve(opacities)
+
+    @property
+    def scale_curve(self) -> numpy.ndarray:
+        return self.__scale_curve
+
+    @scale_curve.setter
+    def scale_curve(self, scales):
+        self.__scale_curve = _get_curve(scales)
+
+    ##################################################################
+    # Emitting
+    ##################################################################
+
+    def attach_to(self,
+                  sprite: Optional[BaseSprite],
+                  offset_x: float = 0,
+                  offset_y: float = 0):
+        """Emit from a sprite's position, plus an offset, as it moves.
+
+        The emitter stops emitting when the sprite is deleted, but its
+        particles live on. Pass None to detach.
+        """
+        self.__sprite = sprite
+        self.__offset = (offset_x, offset_y)
+
+    @property
+    def sprite(self) -> Optional[BaseSprite]:
+        return self.__sprite
+
+    def emit(self, n: int):
+        """Emit n particles now, for bursts like explosions."""
+        free = self.__capacity - self.count
+        if n > free:
+            self.__dropped += n - free
+            n = free
+        if n <= 0:
+            return
+        self.__emitted += n
+        random = self.__random
+        half_spread = self.spread / 2
+        angle = numpy.radians(self.direction
+                              + random.uniform(-half_spread, half_spread, n))
+        speed = _sample_range(random, self.speed, n)
+        lifetime = numpy.maximum(_sample_range(random, self.lifetime, n),
+                                 _MIN_LIFETIME)
+        x, y = self.__get_origin()
+        self.add(n,
+                 x=x, y=y,
+                 frame=random.integers(0, len(self.textures), n),
+                 color=self.__color_curve[0],
+                 opacity=self.__opacity_curve[0, 0],
+                 scale=self.__scale_curve[0, 0],
+                 particle_age=0,
+                 particle_lifetime=lifetime,
+                 particle_vx=speed * numpy.cos(angle),
+                 particle_vy=speed * numpy.sin(angle),
+                 particle_ax=self.acceleration[0],
+                 particle_ay=self.acceleration[1],
+                 particle_spin=_sample_range(random, self.spin, n))
+
+    ##################################################################
+    # Updating and drawing
+    ##################################################################
+
+    def on_update(self, dt: float):
+        if self.is_deleted:
+            return
+        start = perf_counter()
+        if self.__sprite is not None and getattr(self.__sprite,
+                                                 'is_deleted', False):
+            self.__sprite = None
+            self.rate = 0
+
+        # expired particles free their slots for this frame's emissions
+        age = self.get_attribute('particle_age')
+        age += dt
+        expired = age >= self.get_attribute('particle_lifetime')
+        n_expired = int(numpy.count_nonzero(expired))
+        if n_expired:
+            self.remove(expired)
+            self.__expired += n_expired
+
+        self.__rate_remainder += self.rate * dt
+        n = int(self.__rate_remainder)
+        self.__rate_remainder -= n
+        self.emit(n)
+
+        vx = self.get_attribute('particle_vx')
+        vy = self.get_attribute('particle_vy')
+        vx += self.get_attribute('particle_ax') * dt
+        vy += self.get_attribute('particle_ay') * dt
+        self.x += vx * dt
+        self.y += vy * dt
+        self.rotation += self.get_attribute('particle_spin') * dt
+
+        t = (self.get_attribute('particle_age')
+             / self.get_attribute('particle_lifetime'))
+        self.color = _sample_curve(self.__color_curve, t)
+        self.opacity = _sample_curve(self.__opacity_curve, t)[:, 0]
+        self.scale = _sample_curve(self.__scale_curve, t)[:, 0]
+        self.__update_time = perf_counter() - start
+
+    def draw(self):
+        start = perf_counter()
+        super().draw()
+        self.__draw_time = perf_counter() - start
+
+    @property
+    def stats(self) -> ParticleEmitterStats:
+        """Particle counts since creation, and last frame's timings.
+
+        `update_time` and `draw_time` are in seconds and measure the
+        CPU time spent by this emitter.
+        """
+        return ParticleEmitterStats(self.count, self.__emitted,
+                                    self.__dropped, self.__expired,
+                                    self.__update_time, self.__draw_time)
+
+    def __get_origin(self) -> Tuple[float, float]:
+        if self.__sprite is not None:
+            self.origin_x = self.__sprite.x + self.__offset[0]
+            self.origin_y = self.__sprite.y + self.__offset[1]
+        return self.origin_x, self.origin_y
@@ -1,9 +1,9 @@
 from random import randint
-from typing import List
+from typing import List, Optional
 
 from pycat.base.event.mouse_event import MouseEvent
 from pycat.base.base_sprite import BaseSprite
-from pycat.collision import is_rotated_box_collision
+from pycat.collision import is_collision
 
 
 class Sprite(BaseSprite):
@@ -19,7 +19,8 @@ class Sprite(BaseSprite):
 
     def __init__(self, window):
         self._window = window
-        super().__init__()
+        # created in the window's batch instead of being moved there later
+        super().__init__(batch=window._get_graphics_batch()._batch)
         self.__is_deleted = False
 
     ##################################################################
@@ -30,6 +31,14 @@ class Sprite(BaseSprite):
         """Called (once) when added to a window."""
         pass
 
+    def on_reset(self):
+        """Called when a pooled sprite is reused, before `on_create`.
+
+        The sprite's position, image, tags and other properties are
+        already reset. Reset any attributes `on_create` does not set.
+        """
+        pass
+
     def on_update(self, dt):
         """Called 60 times a second when added to a window.
 
@@ -53,6 +62,33 @@ class Sprite(BaseSprite):
         """Called when left mouse button is clicked anywhere in the window."""
         pass
 
+    def on_mouse_enter(self, mouse_event: MouseEvent):
+        """Called when the mouse cursor moves onto this sprite."""
+        pass
+
+    def on_mouse_exit(self, mouse_event: MouseEvent):
+        """Called when the mouse cursor moves off this sprite."""
+        pass
+
+    def on_collision_enter(self, other: 'Sprite'):
+        """Called on the first frame this sprite touches another sprite.
+
+        Only called if both sprites have a tag added to the window with
+        `window.add_collider_tag()`.
+        """
+        pass
+
+    def on_collision_stay(self, other: 'Sprite'):
+        """Called on every later frame while the sprites keep touching."""
+        pass
+
+    def on_collision_exit(self, other: 'Sprite'):
+        """Called on the first frame the sprites stop touching.
+
+        Also called if the other sprite was deleted.
+        """
+        pass
+
     ##################################################################
     # The rest
     ##################################################################
@@ -70,7 +106,13 @@ class Sprite(BaseSprite):
         return self.__is_deleted
 
     def delete(self):
-        self.__is_deleted = True
+        if not self.__is_deleted:
+            self.__is_deleted = True
+            self._window._on_sprite_deleted(self)
+
+    def _reset(self):
+        super()._reset()
+        self.__is_deleted = False
 
     def goto_random_position(self):
         self.x = randint(0, self._window.width)
@@ -83,15 +125,17 @@ class Sprite(BaseSprite):
     def is_touching_sprite(self, sprite: 'Sprite') -> bool:
         return (self.is_visible
                 and sprite.is_visible
-                and is_rotated_box_collision(self, sprite))
+                and self._window.can_collide(self, sprite)
+                and is_collision(self, sprite))
 
     def is_touching_any_sprite(self) -> bool:
         if not self.is_visible:
             return False
-        for s in self._window.get_all_sprites():
+        for s in self._window._get_collision_candidates(self):
             if (s is not self
                and s.is_visible
-               and is_rotated_box_collision(self, s)):
+               and self._window.can_collide(self, s)
+               and is_collision(self, s)):
                 return True
         return False
 
@@ -100,10 +144,12 @@ class Sprite(BaseSprite):
         """
         if not self.is_visible:
             return False
-        for s in self._window.get_sprites_with_tag(tag):
+        for s in self._window._get_collision_candidates(self):
             if (s is not self
+               and tag in s.tags
                and s.is_visible
-               and is_rotated_box_collision(self, s)):
+               and self._window.can_collide(self, s)
+               and is_collision(self, s)):
                 return True
         return False
 
@@ -114,10 +160,11 @@ class Sprite(BaseSprite):
             return []
 
         return [
-            s for s in self._window.get_all_sprites()
+            s for s in self._window._get_collision_candidates(self)
             if (s is not self
                 and s.is_visible
-                and is_rotated_box_collision(self, s))
+                and self._window.can_collide(self, s)
+                and is_collision(self, s))
         ]
 
     def get_touching_sprites_with_tag(self, tag: str) -> List['Sprite']:
@@ -126,12 +173,31 @@ class Sprite(BaseSprite):
         if not self.is_visible:
             return []
         return [
-            s for s in self._window.get_sprites_with_tag(tag)
+            s for s in self._window._get_collision_candidates(self)
             if (s is not self
+                and tag in s.tags
                 and s.is_visible
-                and is_rotated_box_collision(self, s))
+                and self._window.can_collide(self, s)
+                and is_collision(self, s))
         ]
 
+    def get_nearest_sprite_with_tag(self, tag: str) -> Optional['Sprite']:
+        """Returns the closest other sprite with the tag, or None."""
+        return self._window.get_nearest_sprite(self.position, tag, self)
+
     def point_toward_mouse_cursor(self):
         """Rotate to point towards mouse position."""
         self.point_toward(self._window.mouse_position)
+
+    def _on_transform_changed(self):
+        super()._on_transform_changed()
+        self._window._mark_sprite_moved(self)
+
+    def _on_transform_deferred(self):
+        self._window._mark_sprite_dirty(self)
+
+    def _on_tag_added(self, tag: str):
+        self._window._on_sprite_tag_added(self, tag)
+
+    def _on_tag_removed(self, tag: str):
+        self._window._on_sprite_tag_removed(self, tag)
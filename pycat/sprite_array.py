@@ -0,0 +1,380 @@
+"""The sprite_array module implements the SpriteArray class."""
+
+from typing import Dict, Sequence, Tuple, Union
+
+import numpy
+from pyglet.gl import GL_ONE_MINUS_SRC_ALPHA, GL_SRC_ALPHA, GL_TRIANGLES
+from pyglet.graphics import Batch
+from pyglet.sprite import SpriteGroup, get_default_shader
+
+from pycat.base.base_sprite import BaseSprite
+from pycat.base.image import Texture, TextureManager
+from pycat.collision import _get_box_arrays, get_colliding_box_pairs
+
+# the quad of every sprite, as indices of its 4 vertices
+_QUAD_INDICES = numpy.array([0, 1, 2, 0, 2, 3], dtype=numpy.uint32)
+
+
+def _get_owner(texture: Texture) -> Texture:
+    while getattr(texture, 'owner', None) is not None:
+        texture = texture.owner
+    return texture
+
+
+class SpriteArray:
+    """Thousands of lightweight sprites drawn with a single vertex list.
+
+    Each sprite is a row in NumPy arrays: `x`, `y`, `rotation`, `scale`,
+    `color`, `opacity` and `frame`, the index of its image in `textures`.
+    The arrays are written to the vertex buffer once per draw, so move
+    sprites by updating whole arrays, e.g. in `on_update`:
+
+        class Swarm(SpriteArray):
+            def on_update(self, dt):
+                self.x += self.get_attribute('vx') * dt
+
+        swarm = window.add_drawable(Swarm([texture], capacity=50000))
+        swarm.add_attribute('vx')
+        swarm.add(1000, x=xs, y=ys, vx=speeds)
+
+    All textures must be regions of the same texture, e.g. cells of a
+    `SpriteSheet` or images of the same atlas. Sprite arrays are drawn
+    on top of the window's sprites and do not get sprite events.
+
+    The arrays returned by the properties are views of the live sprites.
+    They stay valid until sprites are added or removed.
+    """
+
+    def __init__(self,
+                 textures: Union[Texture, Sequence[Texture]],
+                 capacity: int = 1024):
+        if isinstance(textures, Texture):
+            textures = [textures]
+        textures = list(textures)
+        if not textures:
+            raise ValueError('a sprite array needs at least one texture')
+        owner = _get_owner(textures[0])
+        if any(_get_owner(t) is not owner for t in textures):
+            raise ValueError('all textures must be regions of one texture')
+        self.__textures = textures
+        self.__owner = owner
+        TextureManager.acquire(owner)
+
+        # per frame: the quad's corners around the anchor and its uvs
+        self.__frame_vertices = numpy.array(
+            [(-t.anchor_x, -t.anchor_y, 0,
+              t.width - t.anchor_x, -t.anchor_y, 0,
+              t.width - t.anchor_x, t.height - t.anchor_y, 0,
+              -t.anchor_x, t.height - t.anchor_y, 0) for t in textures],
+            dtype=numpy.float32).reshape(-1, 4, 3)
+        self.__frame_tex_coords = numpy.array(
+            [t.tex_coords for t in textures],
+            dtype=numpy.float32).reshape(-1, 4, 3)
+        self.__frame_sizes = numpy.array(
+            [(t.width, t.height) for t in textures], dtype=float)
+
+        self.__count = 0
+        self.__drawn_count = 0
+        self.__capacity = 0
+        self.__arrays: Dict[str, numpy.ndarray] = {}
+        self.__defaults: Dict[str, object] = {}
+        self.__batch = Batch()
+        self.__vertex_list = None
+        self.__program = get_default_shader()
+        self.__group = SpriteGroup(textures[0], GL_SRC_ALPHA,
+                                   GL_ONE_MINUS_SRC_ALPHA, self.__program)
+
+        self.add_attribute('x')
+        self.add_attribute('y')
+        self.add_attribute('rotation')
+        self.add_attribute('scale', 1.0)
+        self.add_attribute('color', (255, 255, 255), numpy.uint8, (3,))
+        self.add_attribute('opacity', 255, numpy.uint8)
+        self.add_attribute('frame', 0, numpy.intp)
+        self.__resize(max(capacity, 1))
+
+    ##################################################################
+    # Arrays
+    ##################################################################
+
+    @property
+    def count(self) -> int:
+        return self.__count
+
+    def __len__(self) -> int:
+        return self.__count
+
+    @property
+    def capacity(self) -> int:
+        """Number of sprites that fit before the arrays have to grow."""
+        return self.__capacity
+
+    @property
+    def textures(self) -> Sequence[Texture]:
+        return tuple(self.__textures)
+
+    @property
+    def x(self) -> numpy.ndarray:
+        return self.__arrays['x'][:self.__count]
+
+    @x.setter
+    def x(self, x):
+        self.__arrays['x'][:self.__count] = x
+
+    @property
+    def y(self) -> numpy.ndarray:
+        return self.__arrays['y'][:self.__count]
+
+    @y.setter
+    def y(self, y):
+        self.__arrays['y'][:self.__count] = y
+
+    @property
+    def rotation(self) -> numpy.ndarray:
+        """Counter-clockwise rotation of each sprite's image, in degrees."""
+        return self.__arrays['rotation'][:self.__count]
+
+    @rotation.setter
+    def rotation(self, rotation):
+        self.__arrays['rotation'][:self.__count] = rotation
+
+    @property
+    def scale(self) -> numpy.ndarray:
+        return self.__arrays['scale'][:self.__count]
+
+    @scale.setter
+    def scale(self, scale):
+        self.__arrays['scale'][:self.__count] = scale
+
+    @property
+    def color(self) -> numpy.ndarray:
+        """The (n, 3) RGB tint of each sprite."""
+        return self.__arrays['color'][:self.__count]
+
+    @color.setter
+    def color(self, color):
+        self.__arrays['color'][:self.__count] = color
+
+    @property
+    def opacity(self) -> numpy.ndarray:
+        return self.__arrays['opacity'][:self.__count]
+
+    @opacity.setter
+    def opacity(self, opacity):
+        self.__arrays['opacity'][:self.__count] = opacity
+
+    @property
+    def frame(self) -> numpy.ndarray:
+        """The index in `textures` of each sprite's image."""
+        return self.__arrays['frame'][:self.__count]
+
+    @frame.setter
+    def frame(self, frame):
+        self.__arrays['frame'][:self.__count] = frame
+
+    def add_attribute(self,
+                      name: str,
+                      default=0.0,
+                      dtype=float,
+                      shape: Tuple[int, ...] = ()):
+        """Add an array of per sprite values, e.g. a velocity.
+
+        The array is kept in step with the sprites as they are added and
+        removed, see `get_attribute`.
+        """
+        if name in self.__arrays:
+            raise ValueError('attribute ' + name + ' already exists')
+        array = numpy.empty((self.__capacity,) + shape, dtype=dtype)
+        array[:self.__count] = default
+        self.__arrays[name] = array
+        self.__defaults[name] = default
+
+    def get_attribute(self, name: str) -> numpy.ndarray:
+        """Return the live values of an attribute, one row per sprite."""
+        return self.__arrays[name][:self.__count]
+
+    def add(self, n: int = 1, **values) -> numpy.ndarray:
+        """Add n sprites and return their indices.
+
+        Each value is given by attribute name, either one value for every
+        new sprite or an array with one value per sprite. Attributes that
+        are not given get their default.
+        """
+        for name in values:
+            if name not in self.__arrays:
+                raise ValueError('unknown attribute ' + name)
+        start = self.__count
+        end = start + n
+        if end > self.__capacity:
+            self.__resize(max(end, 2 * self.__capacity))
+        for name, array in self.__arrays.items():
+            array[start:end] = values.get(name, self.__defaults[name])
+        self.__count = end
+        return numpy.arange(start, end)
+
+    def remove(self, indices):
+        """Remove sprites by index or by a boolean mask over the sprites.
+
+        The remaining sprites keep their order, their indices shift down.
+        """
+        keep = numpy.ones(self.__count, dtype=bool)
+        keep[indices] = False
+        count = int(numpy.count_nonzero(keep))
+        if count == self.__count:
+            return
+        for array in self.__arrays.values():
+            array[:count] = array[:self.__count][keep]
+        self.__count = count
+
+    def clear(self):
+        self.__count = 0
+
+    def on_update(self, dt: float):
+        """Override to update the arrays, called every frame by the window."""
+        pass
+
+    ##################################################################
+    # Queries
+    ##################################################################
+
+    def get_box_array(self) -> numpy.ndarray:
+        """Return the (n, 10) rotated boxes of the sprites.
+
+        Columns are x, y, ux, uy, half width, half height, min_x, min_y,
+        max_x, max_y, the layout used by `get_colliding_box_pairs`.
+        """
+        n = self.__count
+        sizes = self.__frame_sizes[self.frame] * numpy.abs(self.scale)[:, None]
+        r = numpy.radians(self.rotation)
+        ux = numpy.cos(r)
+        uy = numpy.sin(r)
+        half_w = sizes[:, 0] / 2
+        half_h = sizes[:, 1] / 2
+        dx = numpy.abs(ux) * half_w + numpy.abs(uy) * half_h
+        dy = numpy.abs(uy) * half_w + numpy.abs(ux) * half_h
+        boxes = numpy.empty((n, 10))
+        boxes[:, 0] = self.x
+        boxes[:, 1] = self.y
+        boxes[:, 2] = ux
+        boxes[:, 3] = uy
+        boxes[:, 4] = half_w
+        boxes[:, 5] = half_h
+        boxes[:, 6] = self.x - dx
+        boxes[:, 7] = self.y - dy
+        boxes[:, 8] = self.x + dx
+        boxes[:, 9] = self.y + dy
+        return boxes
+
+    def get_indices_in_rect(self,
+                            min_x: float,
+                            min_y: float,
+                            max_x: float,
+                            max_y: float) -> numpy.ndarray:
+        """Return the sprites whose bounding box overlaps a rectangle."""
+        boxes = self.get_box_array()
+        return numpy.flatnonzero((boxes[:, 6] <= max_x)
+                                 & (boxes[:, 8] >= min_x)
+                                 & (boxes[:, 7] <= max_y)
+                                 & (boxes[:, 9] >= min_y))
+
+    def get_indices_in_radius(self,
+                              x: float,
+                              y: float,
+                              radius: float) -> numpy.ndarray:
+        """Return the sprites whose center is within a radius of (x, y)."""
+        dx = self.x - x
+        dy = self.y - y
+        return numpy.flatnonzero(dx * dx + dy * dy <= radius * radius)
+
+    def get_colliding_sprites(self,
+                              sprites: Sequence[BaseSprite]
+                              ) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """Return the (i, j) of every array sprite i touching sprites[j].
+
+        Sprites are tested as rotated boxes, their colliders and collision
+        layers are ignored.
+        """
+        return get_colliding_box_pairs(self.get_box_array(),
+                                       _get_box_arrays(sprites))
+
+    def get_colliding_array_sprites(self,
+                                    other: 'SpriteArray'
+                                    ) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """Return the (i, j) of every sprite i touching other's sprite j."""
+        return get_colliding_box_pairs(self.get_box_array(),
+                                       other.get_box_array())
+
+    ##################################################################
+    # Drawing
+    ##################################################################
+
+    def draw(self):
+        # a deleted array may still be one of the window's drawables
+        if self.__vertex_list is None:
+            return
+        self.__write_vertices()
+        self.__batch.draw()
+
+    @property
+    def is_deleted(self) -> bool:
+        return self.__vertex_list is None
+
+    def delete(self):
+        if self.__vertex_list is not None:
+            self.__vertex_list.delete()
+            self.__vertex_list = None
+            TextureManager.release(self.__owner)
+        self.__count = 0
+
+    def __resize(self, capacity: int):
+        for name, array in self.__arrays.items():
+            grown = numpy.empty((capacity,) + array.shape[1:], array.dtype)
+            grown[:self.__count] = array[:self.__count]
+            self.__arrays[name] = grown
+        self.__capacity = capacity
+
+        if self.__vertex_list is not None:
+            self.__vertex_list.delete()
+        indices = (_QUAD_INDICES[None, :]
+                   + 4 * numpy.arange(capacity, dtype=numpy.uint32)[:, None])
+        self.__vertex_list = self.__program.vertex_list_indexed(
+            4 * capacity, GL_TRIANGLES, indices.ravel().tolist(),
+            self.__batch, self.__group,
+            position=('f', numpy.zeros(12 * capacity).tolist()),
+            colors=('Bn', numpy.zeros(16 * capacity, dtype=int).tolist()),
+            translate=('f', numpy.zeros(12 * capacity).tolist()),
+            scale=('f', numpy.zeros(8 * capacity).tolist()),
+            rotation=('f', numpy.zeros(4 * capacity).tolist()),
+            tex_coords=('f', numpy.zeros(12 * capacity).tolist()))
+        self.__drawn_count = 0
+
+    def __write_vertices(self):
+        n = self.__count
+        capacity = self.__capacity
+        vertex_list = self.__vertex_list
+        frame = self.frame
+
+        def view(attribute, dtype, size):
+            return numpy.frombuffer(attribute, dtype=dtype).reshape(
+                capacity, 4, size)
+
+        translate = view(vertex_list.translate, numpy.float32, 3)
+        translate[:n, :, 0] = self.x[:, None]
+        translate[:n, :, 1] = self.y[:, None]
+        translate[:n, :, 2] = 0
+        # rotation is clock-wise positive in pyglet
+        view(vertex_list.rotation, numpy.float32, 1)[:n, :, 0] = \
+            -self.rotation[:, None]
+        scale = view(vertex_list.scale, numpy.float32, 2)
+        scale[:n] = self.scale[:, None, None]
+        colors = view(vertex_list.colors, numpy.uint8, 4)
+        colors[:n, :, :3] = self.color[:, None, :]
+        colors[:n, :, 3] = self.opacity[:, None]
+        view(vertex_list.position, numpy.float32, 3)[:n] = \
+            self.__frame_vertices[frame]
+        view(vertex_list.tex_coords, numpy.float32, 3)[:n] = \
+            self.__frame_tex_coords[frame]
+        if self.__drawn_count > n:
+            # removed sprites collapse to nothing
+            scale[n:self.__drawn_count] = 0
+        self.__drawn_count = n
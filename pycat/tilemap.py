@@ -0,0 +1,181 @@
+"""The tilemap module implements the TilemapLayer class."""
+
+from math import floor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pyglet.gl import (GL_BLEND, GL_ONE_MINUS_SRC_ALPHA, GL_SRC_ALPHA,
+                       GL_TEXTURE0, GL_TRIANGLES, glActiveTexture,
+                       glBindTexture, glBlendFunc, glDisable, glEnable)
+from pyglet.graphics import Batch, Group, get_default_blit_shader
+
+from pycat.base.base_sprite import _get_layer_group
+from pycat.base.graphics_batch import GraphicsBatch
+from pycat.base.image import Texture, TextureManager
+
+Bounds = Tuple[float, float, float, float]
+
+
+class _ChunkGroup(Group):
+    """Draws one chunk of tiles with the tileset texture.
+
+    Every chunk has its own group, so that chunks can be hidden
+    separately by setting `visible`.
+    """
+
+    def __init__(self, texture: Texture, program, parent: Group):
+        # drawn before sprites on the same layer
+        super().__init__(order=-1, parent=parent)
+        self.texture = texture
+        self.program = program
+
+    def set_state(self):
+        self.program.use()
+        glActiveTexture(GL_TEXTURE0)
+        glBindTexture(self.texture.target, self.texture.id)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+
+    def unset_state(self):
+        glDisable(GL_BLEND)
+        self.program.stop()
+
+    # chunks must not be merged with each other
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
+
+class _Chunk:
+    def __init__(self, group: _ChunkGroup, vertex_list, bounds: Bounds):
+        self.group = group
+        self.vertex_list = vertex_list
+        self.bounds = bounds
+
+
+class TilemapLayer:
+    """A layer of square tiles drawn from a single tileset texture.
+
+    Tiles are grouped into chunks of `chunk_size` by `chunk_size` tiles
+    and each chunk is one vertex list, so a layer takes a few draw calls
+    instead of one sprite per tile. Chunks outside the view are skipped,
+    see `cull`.
+
+    Each tile is given as `(x, y, src_x, src_y)`: the bottom left corner
+    of the tile in the world and of its image in the tileset, in pixels
+    with y pointing up.
+
+    Create tilemap layers with `window.create_tilemap_layer()`, which
+    draws them in the window's batch and culls them every frame.
+    """
+
+    def __init__(self,
+                 tileset: Texture,
+                 tile_size: int,
+                 tiles: Iterable[Tuple[float, float, int, int]],
+                 layer: int = 0,
+                 chunk_size: int = 32,
+                 batch: Optional[GraphicsBatch] = None):
+        if chunk_size <= 0:
+            raise ValueError('chunk_size must be positive')
+        self.__tileset = tileset
+        TextureManager.acquire(tileset)
+        self.__tile_size = tile_size
+        self.__layer = layer
+        self.__own_batch = None if batch else Batch()
+        self.__batch = batch._batch if batch else self.__own_batch
+        self.__chunks: List[_Chunk] = []
+        self.__tile_count = 0
+        self.__build(tiles, chunk_size)
+
+    @property
+    def layer(self) -> int:
+        return self.__layer
+
+    @property
+    def tile_size(self) -> int:
+        return self.__tile_size
+
+    @property
+    def tile_count(self) -> int:
+        return self.__tile_count
+
+    @property
+    def chunk_count(self) -> int:
+        return len(self.__chunks)
+
+    @property
+    def visible_chunk_count(self) -> int:
+        return sum(1 for chunk in self.__chunks if chunk.group.visible)
+
+    def get_chunk_bounds(self) -> List[Bounds]:
+        """The (min_x, min_y, max_x, max_y) covered by each chunk."""
+        return [chunk.bounds for chunk in self.__chunks]
+
+    def cull(self, min_x: float, min_y: float, max_x: float, max_y: float):
+        """Only draw the chunks that overlap a region, e.g. the view."""
+        for chunk in self.__chunks:
+            b = chunk.bounds
+            visible = (b[0] < max_x and b[2] > min_x
+                       and b[1] < max_y and b[3] > min_y)
+            # changing visibility rebuilds the batch's draw list
+            if chunk.group.visible != visible:
+                chunk.group.visible = visible
+
+    def draw(self):
+        """Draw the layer if it is not in a window's batch."""
+        if self.__own_batch is not None:
+            self.__own_batch.draw()
+
+    def delete(self):
+        if self.__tileset is not None:
+            TextureManager.release(self.__tileset)
+            self.__tileset = None
+        for chunk in self.__chunks:
+            chunk.vertex_list.delete()
+        self.__chunks = []
+        self.__tile_count = 0
+
+    def __build(self,
+                tiles: Iterable[Tuple[float, float, int, int]],
+                chunk_size: int):
+        size = self.__tile_size
+        chunk_extent = chunk_size * size
+        grouped: Dict[Tuple[int, int], List[Tuple[float, float, int, int]]]
+        grouped = {}
+        for tile in tiles:
+            key = (floor(tile[0] / chunk_extent), floor(tile[1] / chunk_extent))
+            grouped.setdefault(key, []).append(tile)
+
+        program = get_default_blit_shader()
+        parent = _get_layer_group(self.__layer)
+        texture = self.__tileset
+        # tileset pixel -> texture coordinates, shared by identical tiles
+        uvs: Dict[Tuple[int, int], Tuple[float, ...]] = {}
+
+        for key in sorted(grouped):
+            chunk_tiles = grouped[key]
+            positions: List[float] = []
+            tex_coords: List[float] = []
+            indices: List[int] = []
+            for k, (x, y, src_x, src_y) in enumerate(chunk_tiles):
+                uv = uvs.get((src_x, src_y))
+                if uv is None:
+                    uv = texture.get_region(src_x, src_y,
+                                            size, size).tex_coords
+                    uvs[(src_x, src_y)] = uv
+                positions += [x, y, 0, x + size, y, 0,
+                              x + size, y + size, 0, x, y + size, 0]
+                tex_coords += uv
+                n = 4 * k
+                indices += [n, n + 1, n + 2, n, n + 2, n + 3]
+
+            xs = positions[0::3]
+            ys = positions[1::3]
+            group = _ChunkGroup(texture, program, parent)
+            vertex_list = program.vertex_list_indexed(
+                4 * len(chunk_tiles), GL_TRIANGLES, indices,
+                batch=self.__batch, group=group,
+                position=('f', positions),
+                tex_coords=('f', tex_coords))
+            self.__chunks.append(_Chunk(group, vertex_list,
+                                        (min(xs), min(ys), max(xs), max(ys))))
+            self.__tile_count += len(chunk_tiles)
@@ -1,6 +1,8 @@
 from threading import Lock
-from typing import Callable, List, Optional, Protocol, Set, TypeVar, Union
+from typing import (Callable, Dict, Iterable, Iterator, List, NamedTuple,
+                    Optional, Protocol, Set, Tuple, TypeVar, Union)
 
+import numpy
 from pyglet import shapes
 from pyglet.gl import GL_NEAREST, GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, glTexParameteri
 from pyglet.math import Mat4, Vec3
@@ -11,11 +13,18 @@ from pycat.base.color import Color
 from pycat.base.event.key_event import KeyEvent
 from pycat.base.event.mouse_event import MouseButton, MouseEvent
 from pycat.base.graphics_batch import GraphicsBatch
+from pycat.base.image import Texture
+from pycat.collider import BoxCollider
+from pycat.collision import (CollisionCache, RaycastHit,
+                             get_collider_bounding_box, get_colliding_pairs,
+                             get_segment_intersection, is_collision)
 from pycat.debug.draw import draw_sprite_rects
 from pycat.geometry.point import Point
+from pycat.geometry.spatial_hash import SpatialHash
 from pycat.label import Label
 from pycat.shape import Arc, Circle, Line, Rectangle, Triangle
 from pycat.sprite import Sprite
+from pycat.tilemap import TilemapLayer
 
 
 class Drawable(Protocol):
@@ -31,6 +40,43 @@ class SpriteCreationError(Exception):
     pass
 
 
+# properties that may be set when creating a sprite
+_SPRITE_PROPERTIES = ('tag', 'tags', 'image', 'x', 'y', 'scale', 'scale_x',
+                      'scale_y', 'color', 'layer', 'position', 'rotation',
+                      'opacity', 'texture', 'is_visible', 'collider',
+                      'collision_layer', 'collision_mask')
+
+# properties applied with one vertex update by create_sprites
+_TRANSFORM_PROPERTIES = ('x', 'y', 'rotation', 'scale', 'scale_x', 'scale_y')
+
+
+def _is_per_sprite_value(name: str, value) -> bool:
+    """Return True if a create_sprites value holds one value per sprite."""
+    if isinstance(value, numpy.ndarray):
+        return value.ndim == (2 if name in ('position', 'color') else 1)
+    if not isinstance(value, (list, tuple)):
+        return False
+    if name in ('position', 'color'):
+        # a single (x, y) or (r, g, b) is shared by every sprite
+        return len(value) > 0 and not isinstance(value[0], (int, float))
+    return True
+
+
+class SpritePoolStats(NamedTuple):
+    """Counts for the pool of one sprite class, see `create_sprite`."""
+    free: int
+    created: int
+    reused: int
+
+
+class ViewCullingStats(NamedTuple):
+    """Sprite counts of the last culled frame, see `Window.view_culling`."""
+    in_view: int
+    culled: int
+    entered: int
+    exited: int
+
+
 class LabelCreationError(Exception):
     pass
 
@@ -44,6 +90,10 @@ class SpriteWithTagDoesNotExist(Exception):
 
 
 class Window(BaseWindow):
+    # nearest sprite queries scan tags with at most this many sprites
+    # instead of searching the spatial hash
+    nearest_tag_scan_limit = 64
+
     def __init__(self,
                  width: int = 1280,
                  height: int = 640,
@@ -51,10 +101,19 @@ class Window(BaseWindow):
                  enforce_window_limits: bool = True,
                  draw_sprite_rects: bool = False,
                  is_sharp_pixel_scaling: bool = False,
-                 title: str = ""):
+                 title: str = "",
+                 collision_cell_size: float = 128,
+                 top_most_mouse_events: bool = False,
+                 view_culling: bool = False,
+                 view_culling_margin: float = 64):
         super().__init__(width, height, title)
 
         self.draw_sprite_rects = draw_sprite_rects
+        # sprites outside the view, grown by the margin, are not drawn
+        self.view_culling = view_culling
+        self.view_culling_margin = view_culling_margin
+        # only the top-most sprite under the mouse gets click/hover events
+        self.top_most_mouse_events = top_most_mouse_events
         self.__is_sharp_pixel_scaling = is_sharp_pixel_scaling
 
         self.__background_sprite: Optional[BaseSprite] = None
@@ -72,7 +131,10 @@ class Window(BaseWindow):
 
         self.subscribe(on_key_press=self.__on_key_press,
                        on_key_release=self.__on_key_release,
-                       on_mouse_press=self.__on_mouse_press)
+                       on_mouse_press=self.__on_mouse_press,
+                       on_mouse_motion=self.__on_mouse_move,
+                       on_mouse_drag=self.__on_mouse_move,
+                       on_mouse_leave=self.__on_mouse_leave)
 
         self.__sprites: List[Sprite] = []
         self.__labels: List[Label] = []
@@ -80,11 +142,56 @@ class Window(BaseWindow):
 
         self.__graphics_batch: GraphicsBatch = GraphicsBatch()
         self.__batched_shapes: List[shapes._ShapeBase] = []
+        self.__tilemap_layers: List[TilemapLayer] = []
 
         # add new sprites/labels to a separate list after update
         self.__new_sprites: List[Sprite] = []
         self.__new_labels: List[Label] = []
 
+        # broadphase for sprite queries, updated lazily as sprites move
+        self.__spatial_hash = SpatialHash(collision_cell_size)
+        self.__moved_sprites: Set[Sprite] = set()
+        # how far circle and polygon colliders reach beyond their image
+        self.__collider_overhangs: Dict[Sprite, float] = {}
+        self.__max_collider_overhang: Optional[float] = 0
+        # sprites with deferred transforms to flush before drawing
+        self.__dirty_sprites: Set[Sprite] = set()
+
+        # while view culling, every sprite is in view or culled
+        self.__is_culling = False
+        self.__sprites_in_view: Set[Sprite] = set()
+        self.__culled_sprites: Set[Sprite] = set()
+        self.__view_culling_stats = ViewCullingStats(0, 0, 0, 0)
+
+        # sprite class -> deleted pooled sprites waiting to be reused
+        self.__sprite_pools: Dict[Callable[..., Sprite], List[Sprite]] = {}
+        # pooled sprite -> the class it is pooled under
+        self.__pooled_sprites: Dict[Sprite, Callable[..., Sprite]] = {}
+        # deleted pooled sprites, returned to their pool after collisions
+        self.__released_sprites: List[Sprite] = []
+        # sprite class -> [created, reused]
+        self.__pool_counts: Dict[Callable[..., Sprite], List[int]] = {}
+
+        # sprites currently under the mouse cursor
+        self.__hovered_sprites: Dict[Sprite, None] = {}
+
+        # tag -> live sprites with that tag, dicts are used as ordered sets
+        self.__tag_index: Dict[str, Dict[Sprite, None]] = {}
+        # tags are kept in the order sprites were added to the window,
+        # tags added to older sprites are re-sorted when next queried
+        self.__sprite_order: Dict[Sprite, int] = {}
+        self.__next_sprite_order = 0
+        self.__unsorted_tags: Set[str] = set()
+
+        # sprites with these tags get collision callbacks every frame
+        self.__collider_tags: Dict[str, None] = {}
+        self.__collisions: Dict[Tuple[Sprite, Sprite], None] = {}
+
+        # layer bit -> layers it never collides with, see set_layers_collide
+        self.__ignored_layers: Dict[int, int] = {}
+        # collision_layer bitfield -> union of the ignored layers of its bits
+        self.__ignored_by_layer: Dict[int, int] = {}
+
         self.__game_loop_running = False
         self.offset = Point()
 
@@ -141,45 +248,22 @@ class Window(BaseWindow):
     def create_sprite(
             self,
             sprite_cls: Callable[..., T] = Sprite,
+            pooled: bool = False,
             **kwargs
             ) -> T:
-        # Sanity check kwargs
-        for arg_name in kwargs:
-            if arg_name not in ['tag',
-                                'tags',
-                                'image',
-                                'x',
-                                'y',
-                                'scale',
-                                'scale_x',
-                                'scale_y',
-                                'color',
-                                'layer',
-                                'position',
-                                'rotation',
-                                'opacity',
-                                'texture',
-                                'is_visible']:
-                raise SpriteCreationError("You may not set '" + arg_name +
-                                          "' when creating a sprite")
-
-        if 'tag' in kwargs and 'tags' in kwargs:
-            raise SpriteCreationError(
-                "You may not specify both 'tag' and 'tags'"
-                "when creating a sprite")
-
-        tags = kwargs.pop('tags', [])
+        """Create a sprite and add it to the window.
+
+        If `pooled` is True, deleted sprites are hidden and kept in a pool
+        instead of being destroyed. The next pooled `create_sprite` of the
+        same class resets one of them, calls its `on_reset()` and then its
+        `on_create()`, which saves building a new sprite, e.g. for bullets.
+        """
+        self.__check_sprite_kwargs(kwargs)
+        tags = list(kwargs.pop('tags', []))
         if 'tag' in kwargs:
             tags.append(kwargs.pop('tag'))
 
-        # Create an object
-        sprite = sprite_cls(window=self)
-        sprite.on_create()
-
-        # Add to window
-        self.__new_sprites.append(sprite)
-        if not self.__game_loop_running:
-            self.__add_new_sprites()
+        sprite = self.__new_sprite(sprite_cls, pooled)
 
         # Override properties
         for arg_name, arg_value in kwargs.items():
@@ -189,11 +273,150 @@ class Window(BaseWindow):
             for tag in tags:
                 sprite.add_tag(tag)
 
-        self.__graphics_batch.add_sprite(sprite)
+        self.__add_sprite(sprite)
         if self.__is_sharp_pixel_scaling:
             glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
         return sprite
 
+    def create_sprites(
+            self,
+            sprite_cls: Callable[..., T] = Sprite,
+            n: int = 1,
+            pooled: bool = False,
+            **kwargs
+            ) -> List[T]:
+        """Create n sprites at once and add them to the window.
+
+        Takes the same properties as `create_sprite`. Each one is either
+        a single value shared by every sprite, or a list, tuple or NumPy
+        array with one value per sprite, e.g.
+        `window.create_sprites(n=100, x=numpy.arange(100) * 8, y=50)`.
+        `position` takes a Point, an (x, y) or one of them per sprite,
+        `color` takes an (r, g, b) or an (n, 3) array.
+        `tags` are added to every sprite, `tag` may be one tag per sprite.
+
+        Each sprite's position, rotation and scale are set with a single
+        vertex update.
+        """
+        self.__check_sprite_kwargs(kwargs)
+        shared: Dict[str, object] = {}
+        per_sprite: Dict[str, list] = {}
+        for name, value in kwargs.items():
+            if name != 'tags' and _is_per_sprite_value(name, value):
+                if len(value) != n:
+                    raise SpriteCreationError(
+                        "'" + name + "' has " + str(len(value)) +
+                        " values for " + str(n) + " sprites")
+                per_sprite[name] = (value.tolist()
+                                    if isinstance(value, numpy.ndarray)
+                                    else list(value))
+            else:
+                shared[name] = value
+        shared_tags = list(shared.pop('tags', []))
+
+        # keep the order the properties were given in, like create_sprite
+        names = [name for name in kwargs if name != 'tags']
+        sprites = []
+        for k in range(n):
+            values = {name: per_sprite[name][k] if name in per_sprite
+                      else shared[name] for name in names}
+            sprite = self.__new_sprite(sprite_cls, pooled)
+
+            transform = {name: values.pop(name)
+                         for name in _TRANSFORM_PROPERTIES if name in values}
+            position = values.pop('position', None)
+            if isinstance(position, Point):
+                transform.setdefault('x', position.x)
+                transform.setdefault('y', position.y)
+            elif position is not None:
+                transform.setdefault('x', position[0])
+                transform.setdefault('y', position[1])
+            tags = shared_tags + ([values.pop('tag')] if 'tag' in values else [])
+
+            for name, value in values.items():
+                setattr(sprite, name, value)
+            if transform:
+                sprite.set_transform(**transform)
+            if tags:
+                sprite.clear_tags()
+                for tag in tags:
+                    sprite.add_tag(tag)
+
+            self.__add_sprite(sprite)
+            sprites.append(sprite)
+
+        if self.__is_sharp_pixel_scaling:
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        return sprites
+
+    def __check_sprite_kwargs(self, kwargs: Dict[str, object]):
+        for arg_name in kwargs:
+            if arg_name not in _SPRITE_PROPERTIES:
+                raise SpriteCreationError("You may not set '" + arg_name +
+                                          "' when creating a sprite")
+
+        if 'tag' in kwargs and 'tags' in kwargs:
+            raise SpriteCreationError(
+                "You may not specify both 'tag' and 'tags'"
+                "when creating a sprite")
+
+    def __new_sprite(self,
+                     sprite_cls: Callable[..., T],
+                     pooled: bool) -> T:
+        """Create an object, or reuse a deleted one from its pool."""
+        pool = self.__sprite_pools.get(sprite_cls) if pooled else None
+        if pool:
+            sprite = pool.pop()
+            sprite._reset()
+            self.__pool_counts[sprite_cls][1] += 1
+            sprite.on_reset()
+        else:
+            sprite = sprite_cls(window=self)
+            if pooled:
+                self.__pooled_sprites[sprite] = sprite_cls
+                self.__pool_counts.setdefault(sprite_cls, [0, 0])[0] += 1
+        sprite.on_create()
+        return sprite
+
+    def __add_sprite(self, sprite: Sprite):
+        """Add a sprite with its final properties to the window."""
+        self.__spatial_hash.insert(sprite, *sprite.get_bounding_box())
+        self.__moved_sprites.discard(sprite)
+        self.__update_collider_overhang(sprite)
+        self.__sprite_order[sprite] = self.__next_sprite_order
+        self.__next_sprite_order += 1
+        for tag in sprite.tags:
+            self.__tag_index.setdefault(tag, {})[sprite] = None
+
+        if self.__is_culling:
+            # drawn from the next frame it is found in view
+            sprite._set_culled(True)
+            self.__culled_sprites.add(sprite)
+
+        # the only place sprites are added to the batch
+        self.__graphics_batch.add_sprite(sprite)
+        self.__new_sprites.append(sprite)
+        if not self.__game_loop_running:
+            self.__add_new_sprites()
+
+    def get_sprite_pool_stats(
+            self,
+            sprite_cls: Callable[..., Sprite] = Sprite
+            ) -> SpritePoolStats:
+        """Number of free, created and reused pooled sprites of a class."""
+        created, reused = self.__pool_counts.get(sprite_cls, (0, 0))
+        return SpritePoolStats(len(self.__sprite_pools.get(sprite_cls, ())),
+                               created, reused)
+
+    def clear_sprite_pools(self):
+        """Destroy the pooled sprites that are waiting to be reused."""
+        for pool in self.__sprite_pools.values():
+            for sprite in pool:
+                del self.__pooled_sprites[sprite]
+                self.__graphics_batch.remove_sprite(sprite)
+                sprite._release_image()
+        self.__sprite_pools.clear()
+
     def delete_all_sprites(self):
         for sprite in self.get_all_sprites():
             sprite.delete()
@@ -203,16 +426,53 @@ class Window(BaseWindow):
             sprite.delete()
 
     def get_sprite_with_tag(self, tag: str) -> Sprite:
-        sprites = self.get_sprites_with_tag(tag)
-        if len(sprites) == 0:
-            raise SpriteWithTagDoesNotExist(tag)
-        return sprites[0]
+        """Returns the oldest sprite with the tag."""
+        for sprite in self.__get_tagged(tag):
+            return sprite
+        raise SpriteWithTagDoesNotExist(tag)
 
     def get_sprites_with_tag(self, tag: str) -> List[Sprite]:
-        return (
-         [s for s in self.__sprites if tag in s.tags and not s.is_deleted] +
-         [s for s in self.__new_sprites if tag in s.tags and not s.is_deleted]
-        )
+        """Returns the sprites with the tag in the order they were created."""
+        return list(self.__get_tagged(tag))
+
+    def iter_sprites_with_tag(self, tag: str) -> Iterator[Sprite]:
+        """Iterates over sprites with a tag without copying them to a list.
+
+        Do not add or remove this tag, or delete sprites with this tag,
+        while iterating. Use `get_sprites_with_tag` in that case.
+        """
+        return iter(self.__get_tagged(tag))
+
+    def count_sprites_with_tag(self, tag: str) -> int:
+        return len(self.__tag_index.get(tag, ()))
+
+    def get_sprites_with_any_tag(self, tags: Iterable[str]) -> List[Sprite]:
+        """Returns sprites that have at least one of the tags."""
+        found: Dict[Sprite, None] = {}
+        for tag in tags:
+            found.update(self.__get_tagged(tag))
+        return sorted(found, key=self.__sprite_order.__getitem__)
+
+    def get_sprites_with_all_tags(self, tags: Iterable[str]) -> List[Sprite]:
+        """Returns sprites that have every one of the tags."""
+        tagged = [self.__get_tagged(tag) for tag in tags]
+        if not tagged:
+            return []
+        tagged.sort(key=len)
+        smallest, others = tagged[0], tagged[1:]
+        return [s for s in smallest if all(s in other for other in others)]
+
+    def __get_tagged(self, tag: str) -> Dict[Sprite, None]:
+        """The sprites with a tag, in the order they were added."""
+        tagged = self.__tag_index.get(tag)
+        if tagged is None:
+            return {}
+        if tag in self.__unsorted_tags:
+            self.__unsorted_tags.discard(tag)
+            tagged = dict.fromkeys(
+                sorted(tagged, key=self.__sprite_order.__getitem__))
+            self.__tag_index[tag] = tagged
+        return tagged
 
     def get_all_sprites(self) -> List[Sprite]:
         return (
@@ -220,6 +480,353 @@ class Window(BaseWindow):
             [s for s in self.__new_sprites if not s.is_deleted]
         )
 
+    def get_sprites_in_rect(
+            self,
+            min_x: float,
+            min_y: float,
+            max_x: float,
+            max_y: float
+            ) -> List[Sprite]:
+        """Returns sprites whose bounding box overlaps a rectangle.
+
+        Uses the window's spatial hash, so only sprites near the
+        rectangle are visited. Sprites are returned in creation order.
+        """
+        self.__update_spatial_hash()
+        return [
+            s for s in self.__spatial_hash.query(min_x, min_y, max_x, max_y)
+            if not s.is_deleted
+        ]
+
+    def get_sprites_at_point(self, p: Point) -> List[Sprite]:
+        """Returns the visible sprites under a point, top-most first.
+
+        Sprites on a higher layer come first. Within a layer the most
+        recently created sprite comes first.
+        """
+        sprites = [
+            s for s in reversed(self.get_sprites_in_rect(p.x, p.y, p.x, p.y))
+            if s.is_visible and s.contains_point(p)
+        ]
+        sprites.sort(key=lambda s: s.layer, reverse=True)
+        return sprites
+
+    def get_sprites_in_radius(self,
+                              p: Point,
+                              radius: float,
+                              tag: Optional[str] = None) -> List[Sprite]:
+        """Returns sprites whose center is within radius of a point.
+
+        Sprites are returned in creation order.
+        """
+        self.__update_spatial_hash()
+        return [
+            s for s in self.__spatial_hash.query_radius(p.x, p.y, radius)
+            if not s.is_deleted and (tag is None or tag in s.tags)
+        ]
+
+    def get_nearest_sprite(self,
+                           p: Point,
+                           tag: Optional[str] = None,
+                           ignore: Optional[Sprite] = None
+                           ) -> Optional[Sprite]:
+        """Returns the sprite whose center is closest to a point.
+
+        Only sprites with `tag` are considered if it is given, and the
+        `ignore` sprite (e.g. the sprite searching) is skipped.
+        Returns None if there is no such sprite.
+        """
+        nearest = self.get_k_nearest_sprites(p, 1, tag, ignore)
+        return nearest[0] if nearest else None
+
+    def get_k_nearest_sprites(self,
+                              p: Point,
+                              k: int,
+                              tag: Optional[str] = None,
+                              ignore: Optional[Sprite] = None
+                              ) -> List[Sprite]:
+        """Returns up to k sprites whose centers are closest to a point.
+
+        Sprites are returned closest first. See `get_nearest_sprite`.
+        """
+        self.__update_spatial_hash()
+
+        def is_candidate(s: Sprite) -> bool:
+            return (s is not ignore and not s.is_deleted
+                    and (tag is None or tag in s.tags))
+
+        grid = self.__spatial_hash
+        if tag is not None:
+            tagged = self.__get_tagged(tag)
+            if len(tagged) <= self.nearest_tag_scan_limit:
+                return grid.nearest(tagged, p.x, p.y, k, is_candidate)
+        return grid.query_nearest(p.x, p.y, k, is_candidate)
+
+    def raycast(self,
+                origin: Point,
+                direction: Point,
+                max_distance: float,
+                tag: Optional[str] = None,
+                all_hits: bool = False,
+                ignore: Optional[Sprite] = None
+                ) -> Union[Optional[RaycastHit], List[RaycastHit]]:
+        """Cast a ray and return the first visible sprite it hits.
+
+        See `segment_cast`, which this calls with the segment from
+        `origin` to `origin + max_distance * direction`.
+        """
+        end = origin + max_distance * direction.normalized()
+        return self.segment_cast(origin, end, tag, all_hits, ignore)
+
+    def segment_cast(self,
+                     start: Point,
+                     end: Point,
+                     tag: Optional[str] = None,
+                     all_hits: bool = False,
+                     ignore: Optional[Sprite] = None
+                     ) -> Union[Optional[RaycastHit], List[RaycastHit]]:
+        """Return the first visible sprite hit by the segment from start to end.
+
+        Returns a `RaycastHit` with the sprite, the hit point and its
+        distance from `start`, or None if nothing is hit. If `all_hits` is
+        True a list of every hit is returned instead, closest first.
+        Only sprites with `tag` are hit if it is given, and the `ignore`
+        sprite (e.g. the sprite casting the ray) is never hit.
+
+        Casting from a sprite's previous position to its current position
+        catches fast sprites that would otherwise pass through thin walls.
+        """
+        self.__update_spatial_hash()
+        grid = self.__spatial_hash
+        length = (end - start).magnitude()
+        tested: Set[Sprite] = set()
+        hits: List[RaycastHit] = []
+
+        def test(sprites):
+            for sprite in sprites:
+                if (sprite in tested or sprite is ignore or sprite.is_deleted
+                        or not sprite.is_visible
+                        or (tag is not None and tag not in sprite.tags)):
+                    continue
+                tested.add(sprite)
+                p = get_segment_intersection(sprite, start, end)
+                if p is not None:
+                    distance = (p - start).magnitude()
+                    hits.append(RaycastHit(sprite, p, distance))
+
+        test(grid.get_large_items())
+        for i, j, t_exit in grid.get_cells_along_segment(start.x, start.y,
+                                                         end.x, end.y):
+            test(grid.get_cell(i, j))
+            # sprites in later cells can only be hit further along the ray
+            if (not all_hits and hits
+                    and min(h.distance for h in hits) <= t_exit * length):
+                break
+
+        hits.sort(key=lambda h: h.distance)
+        if all_hits:
+            return hits
+        return hits[0] if hits else None
+
+    def get_colliding_pairs(
+            self,
+            tag_a: str,
+            tag_b: str
+            ) -> List[Tuple[Sprite, Sprite]]:
+        """Returns every pair of touching visible sprites with the tags.
+
+        All pairs are tested at once with NumPy, which is much faster than
+        calling `get_touching_sprites_with_tag` from each sprite.
+        If both tags are the same each pair is only returned once.
+        """
+        a_sprites = [s for s in self.iter_sprites_with_tag(tag_a)
+                     if s.is_visible]
+        if tag_a == tag_b:
+            b_sprites = a_sprites
+        else:
+            b_sprites = [s for s in self.iter_sprites_with_tag(tag_b)
+                         if s.is_visible]
+        pairs = []
+        for i, j in get_colliding_pairs(a_sprites, b_sprites,
+                                        self.get_collision_mask):
+            a, b = a_sprites[i], b_sprites[j]
+            if a is b or (tag_a == tag_b and j < i):
+                continue
+            pairs.append((a, b))
+        return pairs
+
+    ##################################################################
+    # Collision layers
+    ##################################################################
+
+    def set_layers_collide(self,
+                           layer_a: int,
+                           layer_b: int,
+                           collide: bool = True):
+        """Set if sprites on two collision layers can collide.
+
+        Layers are single bits, see `pycat.collider.get_collision_layer`.
+        Every layer collides with every layer by default. For example,
+        `set_layers_collide(BULLETS, BULLETS, False)` stops bullets from
+        colliding with each other whatever their `collision_mask` is.
+        """
+        for layer in (layer_a, layer_b):
+            if layer <= 0 or layer & (layer - 1):
+                raise ValueError('a layer must be a single bit')
+        ignored = self.__ignored_layers
+        for layer, other in ((layer_a, layer_b), (layer_b, layer_a)):
+            if collide:
+                ignored[layer] = ignored.get(layer, 0) & ~other
+            else:
+                ignored[layer] = ignored.get(layer, 0) | other
+        self.__ignored_by_layer.clear()
+
+    def get_collision_mask(self, sprite: BaseSprite) -> int:
+        """Returns the layers a sprite can collide with in this window.
+
+        This is the sprite's `collision_mask` without the layers that the
+        window's collision matrix disables for the sprite's layers.
+        """
+        layer = sprite.collision_layer
+        ignored = self.__ignored_by_layer.get(layer)
+        if ignored is None:
+            ignored = 0
+            for bit, others in self.__ignored_layers.items():
+                if layer & bit:
+                    ignored |= others
+            self.__ignored_by_layer[layer] = ignored
+        return sprite.collision_mask & ~ignored
+
+    def can_collide(self, a: BaseSprite, b: BaseSprite) -> bool:
+        """Returns True if the sprites' layers and masks let them collide.
+
+        Each sprite's `collision_layer` must be in the other sprite's
+        mask, after applying the window's collision matrix.
+        """
+        return bool(a.collision_layer & self.get_collision_mask(b)
+                    and b.collision_layer & self.get_collision_mask(a))
+
+    ##################################################################
+    # Collision events
+    ##################################################################
+
+    def add_collider_tag(self, tag: str):
+        """Sprites with this tag get collision callbacks.
+
+        Once per frame the window finds every pair of touching sprites
+        that both have a collider tag and calls `on_collision_enter`,
+        `on_collision_stay` and `on_collision_exit` on both sprites.
+        """
+        self.__collider_tags[tag] = None
+
+    def remove_collider_tag(self, tag: str):
+        self.__collider_tags.pop(tag, None)
+
+    @property
+    def collider_tags(self) -> List[str]:
+        return list(self.__collider_tags)
+
+    def __find_collisions(self) -> Dict[Tuple[Sprite, Sprite], None]:
+        colliders = [s for s in self.get_sprites_with_any_tag(
+                        self.__collider_tags) if s.is_visible]
+        order = {s: k for k, s in enumerate(colliders)}
+        collisions: Dict[Tuple[Sprite, Sprite], None] = {}
+        for k, a in enumerate(colliders):
+            for b in self._get_collision_candidates(a):
+                # each pair is only tested from its first sprite
+                if (order.get(b, -1) > k
+                        and self.can_collide(a, b)
+                        and is_collision(a, b)):
+                    # same key for a pair in every frame
+                    pair = (a, b) if id(a) < id(b) else (b, a)
+                    collisions[pair] = None
+        return collisions
+
+    def __dispatch_collisions(self):
+        if not self.__collider_tags and not self.__collisions:
+            return
+        previous = self.__collisions
+        current = self.__find_collisions()
+        self.__collisions = current
+
+        for a, b in previous:
+            if (a, b) not in current:
+                if not a.is_deleted:
+                    a.on_collision_exit(b)
+                if not b.is_deleted:
+                    b.on_collision_exit(a)
+        for a, b in current:
+            if (a, b) in previous:
+                a.on_collision_stay(b)
+                b.on_collision_stay(a)
+            else:
+                a.on_collision_enter(b)
+                b.on_collision_enter(a)
+
+    def _get_graphics_batch(self) -> GraphicsBatch:
+        return self.__graphics_batch
+
+    def _mark_sprite_moved(self, sprite: Sprite):
+        if sprite in self.__spatial_hash:
+            self.__moved_sprites.add(sprite)
+
+    def _mark_sprite_dirty(self, sprite: Sprite):
+        self.__dirty_sprites.add(sprite)
+
+    def _on_sprite_tag_added(self, sprite: Sprite, tag: str):
+        if sprite in self.__spatial_hash and not sprite.is_deleted:
+            tagged = self.__tag_index.setdefault(tag, {})
+            if (tagged and self.__sprite_order[sprite]
+                    < self.__sprite_order[next(reversed(tagged))]):
+                self.__unsorted_tags.add(tag)
+            tagged[sprite] = None
+
+    def _on_sprite_tag_removed(self, sprite: Sprite, tag: str):
+        tagged = self.__tag_index.get(tag)
+        if tagged is not None:
+            tagged.pop(sprite, None)
+            if not tagged:
+                del self.__tag_index[tag]
+                self.__unsorted_tags.discard(tag)
+
+    def _on_sprite_deleted(self, sprite: Sprite):
+        for tag in sprite.tags:
+            self._on_sprite_tag_removed(sprite, tag)
+
+    def __update_spatial_hash(self):
+        for sprite in self.__moved_sprites:
+            self.__spatial_hash.update(sprite, *sprite.get_bounding_box())
+            self.__update_collider_overhang(sprite)
+        self.__moved_sprites.clear()
+
+    def __update_collider_overhang(self, sprite: Sprite):
+        overhang = 0.0
+        if not isinstance(sprite.collider, BoxCollider):
+            min_x, min_y, max_x, max_y = sprite.get_bounding_box()
+            bounds = get_collider_bounding_box(sprite)
+            overhang = max(min_x - bounds[0], min_y - bounds[1],
+                           bounds[2] - max_x, bounds[3] - max_y)
+        if overhang > 0:
+            self.__collider_overhangs[sprite] = overhang
+            self.__max_collider_overhang = None
+        elif self.__collider_overhangs.pop(sprite, None) is not None:
+            self.__max_collider_overhang = None
+
+    def _get_collision_candidates(self, sprite: Sprite) -> List[Sprite]:
+        """Returns the sprites whose collider could touch a sprite's collider.
+
+        The spatial hash holds image bounds, so the query is widened by the
+        farthest any collider reaches beyond its sprite's image.
+        """
+        self.__update_spatial_hash()
+        if self.__max_collider_overhang is None:
+            self.__max_collider_overhang = max(
+                self.__collider_overhangs.values(), default=0)
+        overhang = self.__max_collider_overhang
+        min_x, min_y, max_x, max_y = get_collider_bounding_box(sprite)
+        return self.get_sprites_in_rect(min_x - overhang, min_y - overhang,
+                                        max_x + overhang, max_y + overhang)
+
     def dump_all_sprites(self):
         def as_str(sprite: Sprite):
             s = ''
@@ -310,7 +917,34 @@ class Window(BaseWindow):
         self.__batched_shapes.append(r)  # no reference -> gc collects
         return r
 
+    def create_tilemap_layer(
+        self,
+        tileset: Texture,
+        tile_size: int,
+        tiles: Iterable[Tuple[float, float, int, int]],
+        layer: int = 0,
+        chunk_size: int = 32
+    ) -> TilemapLayer:
+        """Create a layer of tiles drawn with the window's sprites.
+
+        Only the chunks of tiles inside the view are drawn,
+        see `TilemapLayer`.
+        """
+        tilemap = TilemapLayer(tileset, tile_size, tiles, layer, chunk_size,
+                               batch=self.__graphics_batch)
+        self.__tilemap_layers.append(tilemap)
+        return tilemap
+
+    def delete_tilemap_layer(self, tilemap: TilemapLayer):
+        self.__tilemap_layers.remove(tilemap)
+        tilemap.delete()
+
     def add_drawable(self, drawable: T) -> T:
+        """Draw an object with a `draw` method every frame.
+
+        If the drawable also has an `on_update(dt)` method, e.g. a
+        `SpriteArray`, it is called every frame after the sprites update.
+        """
         self.__drawables.append(drawable)
         return drawable
 
@@ -320,6 +954,51 @@ class Window(BaseWindow):
             shape.delete()
         self.__batched_shapes.clear()
 
+    ##################################################################
+    # View culling
+    ##################################################################
+
+    def get_view_culling_stats(self) -> ViewCullingStats:
+        """Sprites in view and culled, and how many entered or exited the
+        view, in the last frame drawn with `view_culling` on.
+        """
+        return self.__view_culling_stats
+
+    def __cull_sprites(self, view_x: float, view_y: float):
+        if not self.view_culling:
+            if self.__is_culling:
+                for sprite in self.__culled_sprites:
+                    sprite._set_culled(False)
+                self.__culled_sprites.clear()
+                self.__sprites_in_view.clear()
+                self.__is_culling = False
+            return
+
+        margin = self.view_culling_margin
+        self.__update_spatial_hash()
+        in_view = set(self.__spatial_hash.query(
+            view_x - margin, view_y - margin,
+            view_x + self.width + margin, view_y + self.height + margin))
+
+        if self.__is_culling:
+            # only sprites crossing the view's edge change
+            exited = self.__sprites_in_view - in_view
+            entered = in_view - self.__sprites_in_view
+        else:
+            self.__is_culling = True
+            exited = set(self.__sprites).difference(in_view)
+            entered = in_view
+        for sprite in exited:
+            sprite._set_culled(True)
+        for sprite in entered:
+            sprite._set_culled(False)
+        self.__culled_sprites -= entered
+        self.__culled_sprites |= exited
+        self.__sprites_in_view = in_view
+        self.__view_culling_stats = ViewCullingStats(
+            len(in_view), len(self.__culled_sprites), len(entered),
+            len(exited))
+
     ##################################################################
     # Background sprite
     ##################################################################
@@ -351,7 +1030,7 @@ class Window(BaseWindow):
         if self.__is_sharp_pixel_scaling:
             glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
         self.clear()
-        
+
         # Apply window offset using modern pyglet 2.0+ view matrix
         has_offset = self.offset.x != 0 or self.offset.y != 0
         if has_offset:
@@ -365,6 +1044,17 @@ class Window(BaseWindow):
         if self.__background_sprite:
             self.__background_sprite.draw()
 
+        # the part of the world inside the window
+        view_x = -self.offset.x
+        view_y = -self.offset.y
+        for tilemap in self.__tilemap_layers:
+            tilemap.cull(view_x, view_y,
+                         view_x + self.width, view_y + self.height)
+
+        for sprite in self.__dirty_sprites:
+            sprite.flush_transform()
+        self.__dirty_sprites.clear()
+        self.__cull_sprites(view_x, view_y)
         self.__graphics_batch.draw()
 
         if self.draw_sprite_rects:
@@ -411,19 +1101,42 @@ class Window(BaseWindow):
     # Mouse input
     ##################################################################
 
-    def __on_mouse_press(self, e: MouseEvent):
-        p = e.position - self.offset
-        for sprite in self.__sprites:
+    def __get_sprites_under_mouse(self, e: MouseEvent) -> List[Sprite]:
+        sprites = self.get_sprites_at_point(e.position - self.offset)
+        if self.top_most_mouse_events:
+            return sprites[:1]
+        return sprites
 
-            if sprite.is_visible and sprite.contains_point(p):
-                sprite.on_click(e)
-                if e.button is MouseButton.LEFT:
-                    sprite.on_left_click()
+    def __on_mouse_press(self, e: MouseEvent):
+        for sprite in self.__get_sprites_under_mouse(e):
+            sprite.on_click(e)
+            if e.button is MouseButton.LEFT:
+                sprite.on_left_click()
 
+        for sprite in self.__sprites:
             sprite.on_click_anywhere(e)
             if e.button is MouseButton.LEFT:
                 sprite.on_left_click_anywhere()
 
+    def __on_mouse_move(self, e: MouseEvent):
+        hovered = dict.fromkeys(self.__get_sprites_under_mouse(e))
+        self.__set_hovered_sprites(hovered, e)
+
+    def __on_mouse_leave(self, e: MouseEvent):
+        self.__set_hovered_sprites({}, e)
+
+    def __set_hovered_sprites(self,
+                              hovered: Dict[Sprite, None],
+                              e: MouseEvent):
+        previous = self.__hovered_sprites
+        self.__hovered_sprites = hovered
+        for sprite in previous:
+            if sprite not in hovered and not sprite.is_deleted:
+                sprite.on_mouse_exit(e)
+        for sprite in hovered:
+            if sprite not in previous:
+                sprite.on_mouse_enter(e)
+
     ##################################################################
     # Runtime
     ##################################################################
@@ -431,7 +1144,6 @@ class Window(BaseWindow):
     def __add_new_sprites(self):
         for sprite in self.__new_sprites:
             self.__sprites.append(sprite)
-            self.__graphics_batch.add_sprite(sprite)
 
         self.__new_sprites.clear()
 
@@ -446,12 +1158,34 @@ class Window(BaseWindow):
         new_sprite_list = []
         for s in self.__sprites:
             if s.is_deleted:
-                self.__graphics_batch.remove_sprite(s)
+                self.__spatial_hash.remove(s)
+                self.__moved_sprites.discard(s)
+                if self.__collider_overhangs.pop(s, None) is not None:
+                    self.__max_collider_overhang = None
+                self.__dirty_sprites.discard(s)
+                self.__sprites_in_view.discard(s)
+                self.__culled_sprites.discard(s)
+                self.__sprite_order.pop(s, None)
+                if s in self.__pooled_sprites:
+                    # hidden, its vertex list stays in the batch for reuse
+                    s.is_visible = False
+                    self.__released_sprites.append(s)
+                else:
+                    self.__hovered_sprites.pop(s, None)
+                    self.__graphics_batch.remove_sprite(s)
+                    s._release_image()
             else:
                 new_sprite_list.append(s)
 
         self.__sprites = new_sprite_list
 
+    def __return_pooled_sprites(self):
+        for sprite in self.__released_sprites:
+            self.__hovered_sprites.pop(sprite, None)
+            sprite_cls = self.__pooled_sprites[sprite]
+            self.__sprite_pools.setdefault(sprite_cls, []).append(sprite)
+        self.__released_sprites.clear()
+
     def __remove_old_labels(self):
         new_label_list = []
         for label in self.__labels:
@@ -463,6 +1197,9 @@ class Window(BaseWindow):
         self.__labels = new_label_list
 
     def __game_loop(self, dt: float):
+        # collision results from the last frame are out of date
+        CollisionCache.clear()
+
         # ensure all sprites will see the same set of keys this frame
         with self.__keys_lock:
             self.__keys = self.__keys_async.copy()
@@ -481,6 +1218,11 @@ class Window(BaseWindow):
         for label in self.__labels:
             label.on_update(dt)
 
+        for drawable in self.__drawables:
+            on_update = getattr(drawable, 'on_update', None)
+            if on_update is not None:
+                on_update(dt)
+
         self.__add_new_sprites()
         self.__add_new_labels()
 
@@ -493,6 +1235,11 @@ class Window(BaseWindow):
             for label in self.__labels:
                 label.limit_position_to_area(0, self.width, 0, self.height)
 
+        self.__dispatch_collisions()
+
+        # only reuse sprites after their collision exit events
+        self.__return_pooled_sprites()
+
     # todo: list out event kwargs
     def run(self,
             draw_function: Callable[[], None] = None,
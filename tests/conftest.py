@@ -24,6 +24,27 @@ def mock_window():
         yield window
 
 
+@pytest.fixture
+def make_window():
+    """Create real windows with the given options, closed after the test."""
+    windows = []
+
+    def make(**kwargs):
+        window = Window(**{'width': 800, 'height': 600, **kwargs})
+        windows.append(window)
+        return window
+
+    yield make
+    for window in windows:
+        window.close()
+
+
+@pytest.fixture
+def window(make_window):
+    """Create a real 800x600 window, closed after the test."""
+    return make_window()
+
+
 @pytest.fixture
 def headless_mode():
     """Set up headless mode for graphics tests."""
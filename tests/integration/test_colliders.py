@@ -0,0 +1,174 @@
+"""Integration tests for circle and polygon sprite colliders."""
+
+import random
+
+import numpy
+import pytest
+from pycat.base import NumpyImage
+from pycat.collider import (BoxCollider, CircleCollider, PolygonCollider)
+from pycat.collision import (get_collider_bounding_box, get_colliding_pairs,
+                             get_convex_hull, is_collision,
+                             is_rotated_box_collision)
+
+
+def _disc_texture(size=20):
+    """A texture with an opaque disc touching its edges."""
+    r = size / 2
+    y, x = numpy.mgrid[:size, :size] + 0.5
+    pixels = numpy.zeros((size, size, 4), dtype=numpy.uint8)
+    pixels[(x - r) ** 2 + (y - r) ** 2 <= r * r] = 255
+    return NumpyImage.get_texture_from_array(pixels)
+
+
+class TestColliderProperty:
+
+    @pytest.mark.integration
+    def test_default_is_box(self, window):
+        sprite = window.create_sprite()
+        assert isinstance(sprite.collider, BoxCollider)
+
+    @pytest.mark.integration
+    def test_polygon_needs_three_points(self):
+        with pytest.raises(ValueError):
+            PolygonCollider([(0, 0), (1, 1)])
+
+
+class TestCircleCollider:
+
+    @pytest.mark.integration
+    def test_circles_miss_where_boxes_touch(self, window):
+        a = window.create_sprite(x=100, y=100, scale=20,
+                                 collider=CircleCollider())
+        b = window.create_sprite(x=118, y=118, scale=20,
+                                 collider=CircleCollider())
+        assert is_rotated_box_collision(a, b)
+        assert not is_collision(a, b)
+        assert not a.is_touching_sprite(b)
+        b.position = (110, 110)
+        assert is_collision(a, b)
+
+    @pytest.mark.integration
+    def test_circle_and_box(self, window):
+        circle = window.create_sprite(x=100, y=100, scale=20,
+                                      collider=CircleCollider())
+        box = window.create_sprite(x=121, y=100, scale=20)
+        assert not is_collision(circle, box)
+        assert not is_collision(box, circle)
+        box.rotation = 45
+        assert is_collision(circle, box)
+        assert circle.get_touching_sprites() == [box]
+
+    @pytest.mark.integration
+    def test_radius_is_scaled_with_sprite(self, window):
+        a = window.create_sprite(x=100, y=100, scale=20,
+                                 collider=CircleCollider(radius=0.25))
+        b = window.create_sprite(x=111, y=100, scale=20,
+                                 collider=CircleCollider(radius=0.25))
+        assert not is_collision(a, b)
+        b.x = 109
+        assert is_collision(a, b)
+
+
+class TestPolygonCollider:
+
+    @pytest.mark.integration
+    def test_convex_hull_of_texture(self):
+        pixels = numpy.zeros((10, 10, 4), dtype=numpy.uint8)
+        pixels[:, :5] = 255
+        texture = NumpyImage.get_texture_from_array(pixels)
+        hull = get_convex_hull(texture)
+        assert hull is get_convex_hull(texture)
+        assert sorted(hull) == [(-5, -5), (-5, 5), (0, -5), (0, 5)]
+
+    @pytest.mark.integration
+    def test_hull_follows_flips_and_rotation(self, window):
+        pixels = numpy.zeros((10, 10, 4), dtype=numpy.uint8)
+        pixels[:, :5] = 255
+        texture = NumpyImage.get_texture_from_array(pixels)
+        a = window.create_sprite(x=100, y=100, texture=texture,
+                                 collider=PolygonCollider())
+        b = window.create_sprite(x=108, y=100, texture=texture,
+                                 collider=PolygonCollider())
+        assert is_rotated_box_collision(a, b)
+        assert not is_collision(a, b)
+        a.scale_x = -1
+        assert is_collision(a, b)
+        a.scale_x = 1
+        a.rotation = 180
+        assert is_collision(a, b)
+
+    @pytest.mark.integration
+    def test_explicit_points(self, window):
+        triangle = PolygonCollider([(-5, -5), (5, -5), (-5, 5)])
+        a = window.create_sprite(x=100, y=100, scale=10, collider=triangle)
+        b = window.create_sprite(x=106, y=106, scale=4)
+        assert is_rotated_box_collision(a, b)
+        assert not is_collision(a, b)
+        b.position = (102, 102)
+        assert is_collision(a, b)
+
+    @pytest.mark.integration
+    def test_disc_hull_against_circle(self, window):
+        texture = _disc_texture()
+        a = window.create_sprite(x=100, y=100, texture=texture,
+                                 collider=PolygonCollider())
+        b = window.create_sprite(x=117, y=117, texture=texture,
+                                 collider=CircleCollider())
+        assert is_rotated_box_collision(a, b)
+        assert not is_collision(a, b)
+        assert not is_collision(b, a)
+        b.position = (112, 112)
+        assert is_collision(a, b)
+
+
+class TestCollidingPairsWithColliders:
+
+    @pytest.mark.integration
+    def test_pairs_match_is_collision(self, window):
+        rng = random.Random(11)
+        shapes = [BoxCollider(), CircleCollider(), PolygonCollider(),
+                  PolygonCollider([(-0.5, -0.5), (0.5, -0.5), (0, 0.5)])]
+        sprites = [window.create_sprite(x=rng.uniform(0, 300),
+                                        y=rng.uniform(0, 300),
+                                        scale=rng.uniform(5, 40),
+                                        rotation=rng.uniform(0, 360),
+                                        collider=rng.choice(shapes))
+                   for _ in range(80)]
+        a_sprites = sprites[:40]
+        b_sprites = sprites[40:]
+        expected = [(i, j) for i, a in enumerate(a_sprites)
+                    for j, b in enumerate(b_sprites) if is_collision(a, b)]
+        assert expected
+        assert get_colliding_pairs(a_sprites, b_sprites) == expected
+
+
+class TestCollidersBeyondImage:
+
+    @pytest.mark.integration
+    def test_large_circle(self, window):
+        circle = window.create_sprite(x=100, y=100, scale=20,
+                                      collider=CircleCollider(radius=2))
+        box = window.create_sprite(x=145, y=100, scale=20)
+        assert get_collider_bounding_box(circle) == (60, 60, 140, 140)
+        assert get_collider_bounding_box(box) == box.get_bounding_box()
+        assert not is_rotated_box_collision(circle, box)
+        assert is_collision(circle, box)
+        assert get_colliding_pairs([circle], [box]) == [(0, 0)]
+        assert get_colliding_pairs([box], [circle]) == [(0, 0)]
+        assert circle.get_touching_sprites() == [box]
+        # the box's query is widened by how far the circle reaches
+        assert box.get_touching_sprites() == [circle]
+        assert box.is_touching_any_sprite()
+
+    @pytest.mark.integration
+    def test_large_polygon(self, window):
+        wide = PolygonCollider([(-2, -0.5), (2, -0.5), (0, 0.5)])
+        a = window.create_sprite(x=100, y=100, scale=20, collider=wide)
+        b = window.create_sprite(x=135, y=95, scale=20)
+        assert is_collision(a, b)
+        assert get_colliding_pairs([a, b], [a, b]) == [(0, 0), (0, 1),
+                                                       (1, 0), (1, 1)]
+        assert b.get_touching_sprites() == [a]
+
+        a.collider = BoxCollider()
+        assert b.get_touching_sprites() == []
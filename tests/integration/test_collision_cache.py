@@ -0,0 +1,60 @@
+"""Integration tests for the per-frame collision result cache."""
+
+import pytest
+from pycat.collider import CircleCollider
+from pycat.collision import CollisionCache, is_collision
+
+
+@pytest.fixture
+def window(window):
+    CollisionCache.enable()
+    CollisionCache.reset_counts()
+    yield window
+    CollisionCache.disable()
+    CollisionCache.reset_counts()
+
+
+class TestCollisionCache:
+
+    @pytest.mark.integration
+    def test_disabled_by_default_does_not_count(self, window):
+        CollisionCache.disable()
+        a = window.create_sprite(x=100, y=100, scale=10)
+        b = window.create_sprite(x=105, y=100, scale=10)
+        assert a.is_touching_sprite(b)
+        assert CollisionCache.get_miss_count() == 0
+        assert CollisionCache.get_hit_count() == 0
+
+    @pytest.mark.integration
+    def test_pair_is_tested_once_in_either_order(self, window):
+        a = window.create_sprite(x=100, y=100, scale=10)
+        b = window.create_sprite(x=105, y=100, scale=10)
+        assert a.is_touching_sprite(b)
+        assert b.is_touching_sprite(a)
+        assert a.get_touching_sprites() == [b]
+        assert CollisionCache.get_miss_count() == 1
+        assert CollisionCache.get_hit_count() == 2
+
+    @pytest.mark.integration
+    def test_transform_changes_invalidate(self, window):
+        a = window.create_sprite(x=100, y=100, scale=10)
+        b = window.create_sprite(x=105, y=100, scale=10)
+        assert is_collision(a, b)
+        b.x = 300
+        assert not is_collision(a, b)
+        b.x = 108
+        b.collider = CircleCollider(radius=0.2)
+        assert not is_collision(b, a)
+        assert CollisionCache.get_miss_count() == 3
+        assert CollisionCache.get_hit_count() == 0
+
+    @pytest.mark.integration
+    def test_cleared_every_frame(self, window):
+        a = window.create_sprite(x=100, y=100, scale=10)
+        b = window.create_sprite(x=105, y=100, scale=10)
+        assert is_collision(a, b)
+        window._Window__game_loop(1 / 60)
+        assert is_collision(a, b)
+        assert CollisionCache.get_miss_count() == 2
+        CollisionCache.reset_counts()
+        assert CollisionCache.get_miss_count() == 0
@@ -0,0 +1,95 @@
+"""Integration tests for per-frame collision callbacks."""
+
+import pytest
+from pycat.collider import CircleCollider
+from pycat.core import Sprite
+
+
+class Recorder(Sprite):
+    def on_create(self):
+        self.events = []
+
+    def on_collision_enter(self, other):
+        self.events.append(('enter', other))
+
+    def on_collision_stay(self, other):
+        self.events.append(('stay', other))
+
+    def on_collision_exit(self, other):
+        self.events.append(('exit', other))
+
+
+def step(window):
+    window._Window__game_loop(1 / 60)
+
+
+class TestCollisionEvents:
+
+    @pytest.mark.integration
+    def test_enter_stay_exit(self, window):
+        window.add_collider_tag('body')
+        a = window.create_sprite(Recorder, x=100, y=100, scale=10, tag='body')
+        b = window.create_sprite(Recorder, x=300, y=100, scale=10, tag='body')
+
+        step(window)
+        assert a.events == [] and b.events == []
+
+        b.x = 105
+        step(window)
+        assert a.events == [('enter', b)]
+        assert b.events == [('enter', a)]
+
+        step(window)
+        assert a.events[-1] == ('stay', b)
+        assert b.events[-1] == ('stay', a)
+
+        b.x = 300
+        step(window)
+        assert a.events[-1] == ('exit', b)
+        assert b.events[-1] == ('exit', a)
+        assert len(a.events) == 3
+
+    @pytest.mark.integration
+    def test_collider_beyond_image(self, window):
+        window.add_collider_tag('body')
+        # created second, so the box's query must find the circle
+        box = window.create_sprite(Recorder, x=145, y=100, scale=20,
+                                   tag='body')
+        circle = window.create_sprite(Recorder, x=100, y=100, scale=20,
+                                      tag='body',
+                                      collider=CircleCollider(radius=2))
+        step(window)
+        assert box.events == [('enter', circle)]
+        assert circle.events == [('enter', box)]
+
+    @pytest.mark.integration
+    def test_only_collider_tags_are_tested(self, window):
+        window.add_collider_tag('player')
+        player = window.create_sprite(Recorder, x=100, y=100, scale=10,
+                                      tag='player')
+        coin = window.create_sprite(Recorder, x=100, y=100, scale=10,
+                                    tag='coin')
+        wall = window.create_sprite(Recorder, x=100, y=100, scale=10)
+        step(window)
+        # both sprites of a pair need a collider tag
+        assert player.events == coin.events == wall.events == []
+
+        window.add_collider_tag('coin')
+        step(window)
+        assert player.events == [('enter', coin)]
+        assert coin.events == [('enter', player)]
+        assert wall.events == []
+
+    @pytest.mark.integration
+    def test_deleted_sprite_triggers_exit(self, window):
+        window.add_collider_tag('body')
+        a = window.create_sprite(Recorder, x=100, y=100, scale=10, tag='body')
+        b = window.create_sprite(Recorder, x=100, y=100, scale=10, tag='body')
+        step(window)
+        b.delete()
+        step(window)
+        assert a.events == [('enter', b), ('exit', b)]
+        assert b.events == [('enter', a)]
+
+        window.remove_collider_tag('body')
+        assert window.collider_tags == []
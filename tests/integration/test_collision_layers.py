@@ -0,0 +1,115 @@
+"""Integration tests for collision layers, masks and the window matrix."""
+
+import random
+
+import pytest
+from pycat.collider import get_collision_layer
+from pycat.collision import can_collide, is_collision
+
+PLAYER = get_collision_layer(0)
+BULLET = get_collision_layer(1)
+PICKUP = get_collision_layer(2)
+
+
+class TestLayerValues:
+
+    @pytest.mark.integration
+    def test_defaults_collide(self, window):
+        a = window.create_sprite(x=100, y=100, scale=10)
+        b = window.create_sprite(x=100, y=100, scale=10)
+        assert a.collision_layer == 1
+        assert can_collide(a, b)
+        assert window.can_collide(a, b)
+
+    @pytest.mark.integration
+    def test_invalid_values(self, window):
+        sprite = window.create_sprite()
+        with pytest.raises(ValueError):
+            sprite.collision_layer = -1
+        with pytest.raises(ValueError):
+            sprite.collision_mask = 1 << 32
+        with pytest.raises(ValueError):
+            get_collision_layer(32)
+        with pytest.raises(ValueError):
+            window.set_layers_collide(PLAYER | BULLET, PICKUP, False)
+
+
+class TestMasks:
+
+    @pytest.mark.integration
+    def test_mask_filters_sprite_queries(self, window):
+        player = window.create_sprite(x=100, y=100, scale=10,
+                                      collision_layer=PLAYER)
+        pickup = window.create_sprite(x=100, y=100, scale=10,
+                                      collision_layer=PICKUP,
+                                      collision_mask=PLAYER)
+        other = window.create_sprite(x=100, y=100, scale=10,
+                                     collision_layer=BULLET)
+        assert player.get_touching_sprites() == [pickup, other]
+        assert pickup.get_touching_sprites() == [player]
+        assert other.get_touching_sprites() == [player]
+        assert not pickup.is_touching_sprite(other)
+        assert not other.is_touching_any_sprite_with_tag('missing')
+
+    @pytest.mark.integration
+    def test_zero_mask_never_collides(self, window):
+        a = window.create_sprite(x=100, y=100, scale=10, collision_mask=0)
+        window.create_sprite(x=100, y=100, scale=10)
+        assert not a.is_touching_any_sprite()
+        assert is_collision(a, window.get_all_sprites()[1])
+
+
+class TestCollisionMatrix:
+
+    @pytest.mark.integration
+    def test_bullets_ignore_bullets(self, window):
+        window.set_layers_collide(BULLET, BULLET, False)
+        a = window.create_sprite(x=100, y=100, scale=10,
+                                 collision_layer=BULLET)
+        b = window.create_sprite(x=100, y=100, scale=10,
+                                 collision_layer=BULLET)
+        player = window.create_sprite(x=100, y=100, scale=10,
+                                      collision_layer=PLAYER)
+        assert can_collide(a, b)
+        assert not window.can_collide(a, b)
+        assert a.get_touching_sprites() == [player]
+
+        window.set_layers_collide(BULLET, BULLET)
+        assert a.get_touching_sprites() == [b, player]
+
+    @pytest.mark.integration
+    def test_matrix_applies_to_collision_events(self, window):
+        window.set_layers_collide(PLAYER, PICKUP, False)
+        window.add_collider_tag('thing')
+        a = window.create_sprite(x=100, y=100, scale=10, tag='thing',
+                                 collision_layer=PLAYER)
+        b = window.create_sprite(x=100, y=100, scale=10, tag='thing',
+                                 collision_layer=PICKUP)
+        entered = []
+        a.on_collision_enter = entered.append
+        window._Window__game_loop(1 / 60)
+        assert entered == []
+        window.set_layers_collide(PLAYER, PICKUP, True)
+        window._Window__game_loop(1 / 60)
+        assert entered == [b]
+
+    @pytest.mark.integration
+    def test_colliding_pairs_match_brute_force(self, window):
+        window.set_layers_collide(BULLET, BULLET, False)
+        window.set_layers_collide(PICKUP, BULLET, False)
+        rng = random.Random(4)
+        for i in range(150):
+            window.create_sprite(
+                x=rng.uniform(0, 400), y=rng.uniform(0, 400),
+                scale=rng.uniform(5, 40), tag='even' if i % 2 else 'odd',
+                collision_layer=rng.choice([PLAYER, BULLET, PICKUP]),
+                collision_mask=rng.choice([PLAYER | BULLET | PICKUP,
+                                           PLAYER, BULLET | PICKUP]))
+        evens = window.get_sprites_with_tag('even')
+        odds = window.get_sprites_with_tag('odd')
+        expected = [(a, b) for a in evens for b in odds
+                    if a.is_touching_sprite(b)]
+        assert expected
+        assert len(expected) < sum(1 for a in evens for b in odds
+                                   if is_collision(a, b))
+        assert window.get_colliding_pairs('even', 'odd') == expected
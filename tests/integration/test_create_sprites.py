@@ -0,0 +1,89 @@
+"""Integration tests for creating many sprites at once."""
+
+import numpy
+import pytest
+from pycat.core import Point, Sprite
+from pycat.window import SpriteCreationError
+
+
+@pytest.mark.integration
+def test_per_sprite_arrays(window):
+    n = 50
+    xs = numpy.arange(n) * 10.0
+    sprites = window.create_sprites(n=n, x=xs, y=20, rotation=numpy.full(n, 90),
+                                    scale=numpy.linspace(1, 2, n), tag='coin')
+    assert len(sprites) == n
+    assert [s.x for s in sprites] == xs.tolist()
+    assert all(s.y == 20 and s.rotation == 90 for s in sprites)
+    assert sprites[-1].scale == 2
+    assert sprites[0].image_rotation == 90
+    assert window.count_sprites_with_tag('coin') == n
+    assert window.get_sprites_in_rect(95, 15, 105, 25) == [sprites[10]]
+
+
+@pytest.mark.integration
+def test_sprites_are_added_to_the_batch_once(window, monkeypatch):
+    batch = window._Window__graphics_batch
+    added = []
+    add_sprite = batch.add_sprite
+
+    def count(sprite):
+        added.append(sprite)
+        add_sprite(sprite)
+
+    monkeypatch.setattr(batch, 'add_sprite', count)
+    sprites = window.create_sprites(n=3)
+    sprites.append(window.create_sprite())
+    window._Window__game_loop(1/60)
+    assert added == sprites
+    assert window.get_all_sprites() == sprites
+
+
+@pytest.mark.integration
+def test_positions_colors_and_tags(window):
+    class Coin(Sprite):
+        pass
+
+    positions = numpy.array([[1, 2], [3, 4]])
+    colors = [(255, 0, 0), (0, 255, 0)]
+    sprites = window.create_sprites(Coin, 2, position=positions, color=colors,
+                                    tag=['a', 'b'], opacity=100)
+    assert all(isinstance(s, Coin) for s in sprites)
+    assert (sprites[1].x, sprites[1].y) == (3, 4)
+    assert tuple(sprites[0].color) == (255, 0, 0)
+    assert sprites[1].opacity == 100
+    assert window.get_sprites_with_tag('b') == [sprites[1]]
+
+    shared = window.create_sprites(n=2, position=(5, 6), color=(1, 2, 3),
+                                   tags=['c', 'd'])
+    assert all((s.x, s.y) == (5, 6) for s in shared)
+    assert all(s.tags == {'c', 'd'} for s in shared)
+
+
+@pytest.mark.integration
+def test_point_positions(window):
+    shared = window.create_sprites(n=2, position=Point(5, 6))
+    assert all((s.x, s.y) == (5, 6) for s in shared)
+
+    points = [Point(1, 2), Point(3, 4)]
+    sprites = window.create_sprites(n=2, position=points)
+    assert [(s.x, s.y) for s in sprites] == [(1, 2), (3, 4)]
+
+
+@pytest.mark.integration
+def test_invalid_values(window):
+    with pytest.raises(SpriteCreationError):
+        window.create_sprites(n=3, x=[1, 2])
+    with pytest.raises(SpriteCreationError):
+        window.create_sprites(n=3, speed=1)
+
+
+@pytest.mark.integration
+def test_pooled(window):
+    sprites = window.create_sprites(n=4, pooled=True)
+    for sprite in sprites:
+        sprite.delete()
+    window._Window__game_loop(1/60)
+    reused = window.create_sprites(n=2, pooled=True, x=[1, 2])
+    assert all(s in sprites for s in reused)
+    assert [s.x for s in reused] == [1, 2]
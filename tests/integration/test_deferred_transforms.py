@@ -0,0 +1,88 @@
+"""Integration tests for deferred sprite transforms."""
+
+import pytest
+from pycat.core import Point, Sprite
+
+
+class DeferredSprite(Sprite):
+    defer_transforms = True
+
+
+class TestDeferredTransforms:
+
+    @pytest.mark.integration
+    def test_setters_are_written_before_drawing(self, window):
+        sprite = window.create_sprite(DeferredSprite)
+        sprite.x = 100
+        sprite.y = 50
+        sprite.rotation = 90
+        sprite.scale = 2
+        # the properties already return the new values
+        assert (sprite.x, sprite.y, sprite.rotation) == (100, 50, 90)
+        assert sprite.image_rotation == 90
+        assert sprite.scale == 2
+        assert (sprite._sprite.x, sprite._sprite.y) == (0, 0)
+        assert sprite._sprite.rotation == 0
+
+        window._Window__auto_draw()
+        assert (sprite._sprite.x, sprite._sprite.y) == (100, 50)
+        assert sprite._sprite.rotation == -90
+        assert sprite._sprite.scale == 2
+
+    @pytest.mark.integration
+    def test_queries_see_deferred_values(self, window):
+        sprite = window.create_sprite(DeferredSprite, scale=10)
+        sprite.position = Point(400, 300)
+        window._Window__game_loop(1 / 60)
+        assert sprite.get_bounding_box() == (395, 295, 405, 305)
+        assert window.get_sprites_in_rect(390, 290, 410, 310) == [sprite]
+        assert sprite.width == 10
+
+    @pytest.mark.integration
+    def test_queries_do_not_flush(self, window):
+        sprite = window.create_sprite(DeferredSprite)
+        window._Window__auto_draw()
+        sprite.set_transform(x=400, y=300, scale=10, rotation=90)
+        sprite.scale_x = 2
+        assert window.get_sprites_in_rect(0, 0, 1, 1) == []
+        assert window.get_sprites_in_rect(390, 280, 410, 320) == [sprite]
+        assert (sprite.width, sprite.height) == (20, 10)
+        # the vertices still hold the old values until drawing
+        assert (sprite._sprite.x, sprite._sprite.y) == (0, 0)
+        assert sprite._sprite.scale == 1
+        assert sprite._sprite.scale_x == 1
+        assert sprite._sprite.width == 1
+        window._Window__auto_draw()
+        assert (sprite._sprite.x, sprite._sprite.y) == (400, 300)
+        assert sprite._sprite.width == 20
+
+    @pytest.mark.integration
+    def test_deleted_sprites_are_not_flushed(self, window):
+        sprite = window.create_sprite(DeferredSprite)
+        sprite.x = 100
+        sprite.delete()
+        window._Window__game_loop(1 / 60)
+        window._Window__auto_draw()
+        assert sprite._sprite.x == 0
+
+
+class TestSetTransform:
+
+    @pytest.mark.integration
+    def test_set_transform(self, window):
+        sprite = window.create_sprite()
+        sprite.set_transform(x=10, y=20, rotation=45, scale=3)
+        assert (sprite.x, sprite.y, sprite.rotation, sprite.scale) == \
+            (10, 20, 45, 3)
+        assert sprite._sprite.rotation == -45
+
+    @pytest.mark.integration
+    def test_move_forward(self, window):
+        sprite = window.create_sprite(DeferredSprite, rotation=90)
+        sprite.move_forward(10)
+        assert sprite.x == pytest.approx(0)
+        assert sprite.y == pytest.approx(10)
+        sprite.defer_transforms = False
+        # switching back writes the stored values first
+        sprite.move_forward(10)
+        assert sprite._sprite.y == pytest.approx(20)
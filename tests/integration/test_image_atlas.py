@@ -0,0 +1,53 @@
+"""Integration tests for packing loaded images into atlas textures."""
+
+import os
+
+import pyglet.resource
+import pytest
+from pycat.base import image
+from pycat.base.image import Image
+
+TEST_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'pycat', 'test')
+
+
+@pytest.fixture
+def resources(monkeypatch):
+    monkeypatch.setattr(pyglet.resource, 'path', [os.path.abspath(TEST_DIR)])
+    pyglet.resource.reindex()
+    yield
+    monkeypatch.undo()
+    pyglet.resource.reindex()
+
+
+@pytest.mark.integration
+def test_preload_directory(window, resources):
+    textures = Image.preload_directory('img')
+    assert 'img/eye.png' in textures
+    assert 'img/tornado.gif' not in textures
+    assert Image.get_texture_from_file('img/eye.png') is textures['img/eye.png']
+
+    # small images share atlas pages
+    pages = {texture.id for texture in textures.values()}
+    assert len(pages) < len(textures)
+
+    eye = textures['img/eye.png']
+    assert (eye.anchor_x, eye.anchor_y) == (eye.width / 2, eye.height / 2)
+
+
+@pytest.mark.integration
+def test_missing_directory(window, resources):
+    assert Image.preload_directory('no_such_directory') == {}
+
+
+@pytest.mark.integration
+def test_atlas_can_be_disabled(monkeypatch):
+    calls = []
+
+    def load(name, atlas=True):
+        calls.append(atlas)
+        return Image.get_solid_color_texture()
+
+    monkeypatch.setattr(image, 'pyglet_image', load)
+    monkeypatch.setattr(Image, 'use_atlas', False)
+    Image.get_texture_from_file('eye.png')
+    assert calls == [False]
@@ -0,0 +1,40 @@
+"""Integration tests for the groups shared by sprites on the same layer."""
+
+import pytest
+from pycat.base.base_sprite import _get_layer_group
+
+
+@pytest.mark.integration
+def test_sprites_share_layer_groups(window):
+    a = window.create_sprite(layer=3)
+    b = window.create_sprite(layer=3)
+    c = window.create_sprite(layer=4)
+    assert a._sprite.group is b._sprite.group
+    assert a._sprite.group is _get_layer_group(3)
+    assert c._sprite.group is not a._sprite.group
+
+
+@pytest.mark.integration
+def test_labels_share_layer_groups(window):
+    sprite = window.create_sprite(layer=5)
+    label = window.create_label(layer=5)
+    assert label._label.group is sprite._sprite.group
+    label.layer = 6
+    assert label._label.group is _get_layer_group(6)
+
+
+@pytest.mark.integration
+def test_layer_change_does_not_rebuild_the_batch(window, monkeypatch):
+    sprites = [window.create_sprite(layer=1) for _ in range(3)]
+    window._Window__game_loop(1/60)
+    batch = sprites[0]._sprite.batch
+
+    def invalidate():
+        raise AssertionError('batch was invalidated')
+
+    monkeypatch.setattr(batch, 'invalidate', invalidate)
+    sprites[0].layer = 2
+    assert sprites[0].layer == 2
+    assert sprites[0]._sprite.group is _get_layer_group(2)
+    assert sprites[1]._sprite.group is _get_layer_group(1)
+    window._Window__auto_draw()
@@ -0,0 +1,111 @@
+"""Integration tests for mouse hit-testing on sprites."""
+
+import pytest
+from pycat.base import MouseButton
+from pycat.core import Point, Sprite
+from pycat.experimental.draggable_sprite import DraggableSprite
+
+
+class Recorder(Sprite):
+    def on_create(self):
+        self.events = []
+        self.scale = 20
+
+    def on_left_click(self):
+        self.events.append('click')
+
+    def on_mouse_enter(self, mouse_event):
+        self.events.append('enter')
+
+    def on_mouse_exit(self, mouse_event):
+        self.events.append('exit')
+
+
+def press(window, x, y):
+    window._window.on_mouse_press(x, y, MouseButton.LEFT, 0)
+
+
+def move(window, x, y):
+    window._window.on_mouse_motion(x, y, 0, 0)
+
+
+class TestMouseHitTesting:
+
+    @pytest.mark.integration
+    def test_sprites_at_point_are_ordered_by_layer(self, window):
+        low = window.create_sprite(Recorder, x=100, y=100, layer=1)
+        high = window.create_sprite(Recorder, x=105, y=100, layer=5)
+        newer = window.create_sprite(Recorder, x=95, y=100, layer=1)
+        window.create_sprite(Recorder, x=400, y=400, layer=9)
+
+        assert window.get_sprites_at_point(Point(100, 100)) == [high, newer,
+                                                                 low]
+        assert window.get_sprites_at_point(Point(300, 300)) == []
+
+    @pytest.mark.integration
+    def test_click_all_or_top_most(self, window):
+        low = window.create_sprite(Recorder, x=100, y=100, layer=1)
+        high = window.create_sprite(Recorder, x=100, y=100, layer=2)
+        hidden = window.create_sprite(Recorder, x=100, y=100, layer=3,
+                                      is_visible=False)
+
+        press(window, 100, 100)
+        assert low.events == high.events == ['click']
+        assert hidden.events == []
+
+        window.top_most_mouse_events = True
+        press(window, 100, 100)
+        assert high.events == ['click', 'click']
+        assert low.events == ['click']
+
+    @pytest.mark.integration
+    def test_click_uses_window_offset(self, window):
+        sprite = window.create_sprite(Recorder, x=100, y=100)
+        window.offset = Point(50, 0)
+        press(window, 100, 100)
+        assert sprite.events == []
+        press(window, 150, 100)
+        assert sprite.events == ['click']
+
+    @pytest.mark.integration
+    def test_hover_enter_and_exit(self, window):
+        a = window.create_sprite(Recorder, x=100, y=100)
+        b = window.create_sprite(Recorder, x=115, y=100, layer=1)
+
+        move(window, 95, 100)
+        assert a.events == ['enter'] and b.events == []
+        move(window, 108, 100)
+        assert a.events == ['enter'] and b.events == ['enter']
+
+        window.top_most_mouse_events = True
+        move(window, 107, 100)
+        assert a.events == ['enter', 'exit'] and b.events == ['enter']
+
+        window._window.on_mouse_leave(500, 500)
+        assert b.events == ['enter', 'exit']
+
+    @pytest.mark.integration
+    def test_deleted_sprites_are_not_kept_hovered(self, window):
+        sprite = window.create_sprite(Recorder, x=100, y=100)
+        move(window, 100, 100)
+        sprite.delete()
+        window._Window__game_loop(1 / 60)
+        assert window._Window__hovered_sprites == {}
+
+
+class TestDraggableSprite:
+
+    @pytest.mark.integration
+    def test_only_dragged_sprite_moves(self, window):
+        a = window.create_sprite(DraggableSprite, x=100, y=100, scale=20)
+        b = window.create_sprite(DraggableSprite, x=300, y=300, scale=20)
+
+        press(window, 105, 100)
+        window._window.on_mouse_drag(125, 110, 20, 10, MouseButton.LEFT, 0)
+        assert (a.x, a.y) == (120, 110)
+        assert (b.x, b.y) == (300, 300)
+
+        window._window.on_mouse_release(125, 110, MouseButton.LEFT, 0)
+        assert DraggableSprite.currently_dragged is None
+        window._window.on_mouse_drag(200, 200, 75, 90, MouseButton.LEFT, 0)
+        assert (a.x, a.y) == (120, 110)
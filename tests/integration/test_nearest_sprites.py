@@ -0,0 +1,106 @@
+"""Integration tests for nearest-neighbour and radius sprite queries."""
+
+import random
+
+import pytest
+from pycat.core import Point
+from pycat.geometry.spatial_hash import SpatialHash
+
+
+@pytest.fixture
+def window(make_window):
+    return make_window(collision_cell_size=50)
+
+
+def brute_force(sprites, p, k):
+    ranked = sorted(enumerate(sprites),
+                    key=lambda e: ((e[1].x - p.x) ** 2 + (e[1].y - p.y) ** 2,
+                                   e[0]))
+    return [s for _, s in ranked[:k]]
+
+
+class TestSpatialHashNearest:
+
+    def test_nearest_uses_bounding_box_centers(self):
+        grid = SpatialHash(cell_size=10)
+        grid.insert('a', 0, 0, 10, 10)
+        grid.insert('b', 20, 20, 22, 22)
+        grid.insert('c', 100, 100, 104, 104)
+        assert grid.query_nearest(18, 18) == ['b']
+        assert grid.query_nearest(18, 18, k=2) == ['b', 'a']
+        assert grid.query_nearest(0, 0, k=5) == ['a', 'b', 'c']
+
+    def test_predicate_and_empty_hash(self):
+        grid = SpatialHash(cell_size=10)
+        assert grid.query_nearest(0, 0) == []
+        grid.insert('a', 0, 0, 2, 2)
+        grid.insert('b', 50, 50, 52, 52)
+        assert grid.query_nearest(0, 0, predicate=lambda i: i != 'a') == ['b']
+
+    def test_query_radius(self):
+        grid = SpatialHash(cell_size=10)
+        grid.insert('a', -1, -1, 1, 1)
+        grid.insert('b', 9, -1, 11, 1)
+        grid.insert('c', 11, -1, 13, 1)
+        assert grid.query_radius(0, 0, 10) == ['a', 'b']
+
+
+class TestNearestSprites:
+
+    def test_nearest_sprite(self, window):
+        a = window.create_sprite(x=100, y=100)
+        b = window.create_sprite(x=300, y=100, tags=['enemy'])
+        window.create_sprite(x=700, y=500, tags=['enemy'])
+        assert window.get_nearest_sprite(Point(120, 100)) is a
+        assert window.get_nearest_sprite(Point(120, 100), tag='enemy') is b
+        assert window.get_nearest_sprite(Point(120, 100), ignore=a) is b
+        assert window.get_nearest_sprite(Point(0, 0), tag='missing') is None
+
+    def test_sprite_nearest_with_tag_skips_itself(self, window):
+        seeker = window.create_sprite(x=100, y=100, tags=['enemy'])
+        target = window.create_sprite(x=400, y=100, tags=['enemy'])
+        assert seeker.get_nearest_sprite_with_tag('enemy') is target
+
+    def test_deleted_sprites_are_skipped(self, window):
+        a = window.create_sprite(x=100, y=100)
+        b = window.create_sprite(x=200, y=100)
+        a.delete()
+        assert window.get_nearest_sprite(Point(100, 100)) is b
+
+    def test_moved_sprites_are_found(self, window):
+        a = window.create_sprite(x=100, y=100)
+        b = window.create_sprite(x=400, y=100)
+        b.x = 700
+        a.x = 650
+        assert window.get_nearest_sprite(Point(800, 100)) is b
+        assert window.get_nearest_sprite(Point(600, 100)) is a
+
+    @pytest.mark.parametrize('tag_scan_limit', [0, 1000])
+    def test_k_nearest_matches_brute_force(self, window, tag_scan_limit):
+        window.nearest_tag_scan_limit = tag_scan_limit
+        rng = random.Random(5)
+        sprites = []
+        for i in range(300):
+            sprite = window.create_sprite(x=rng.uniform(0, 800),
+                                          y=rng.uniform(0, 600),
+                                          tags=['even' if i % 2 else 'odd'])
+            sprite.scale = rng.uniform(1, 60)
+            sprites.append(sprite)
+        even = [s for s in sprites if 'even' in s.tags]
+        for _ in range(30):
+            p = Point(rng.uniform(-100, 900), rng.uniform(-100, 700))
+            k = rng.randint(1, 12)
+            assert window.get_k_nearest_sprites(p, k) == brute_force(
+                sprites, p, k)
+            assert window.get_k_nearest_sprites(p, k, tag='even') == (
+                brute_force(even, p, k))
+
+    def test_sprites_in_radius(self, window):
+        rng = random.Random(8)
+        sprites = [window.create_sprite(x=rng.uniform(0, 800),
+                                        y=rng.uniform(0, 600))
+                   for _ in range(200)]
+        p = Point(400, 300)
+        found = window.get_sprites_in_radius(p, 120)
+        assert found == [s for s in sprites if s.distance_to(p) <= 120]
+        assert found
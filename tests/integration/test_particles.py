@@ -0,0 +1,133 @@
+"""Integration tests for particle emitters."""
+
+import numpy
+import pytest
+from pycat.base import NumpyImage
+from pycat.particles import ParticleEmitter
+
+
+@pytest.fixture
+def texture():
+    image = numpy.full((4, 4, 4), 255, dtype=numpy.uint8)
+    return NumpyImage.get_texture_from_array(image)
+
+
+class TestEmission:
+
+    @pytest.mark.integration
+    def test_rate_accumulates_over_frames(self, texture):
+        emitter = ParticleEmitter(texture, rate=30, lifetime=10, seed=1)
+        for _ in range(4):
+            emitter.on_update(1 / 60)
+        assert emitter.count == 2
+        assert emitter.stats.emitted == 2
+
+    @pytest.mark.integration
+    def test_burst_is_capped_by_capacity(self, texture):
+        emitter = ParticleEmitter(texture, capacity=10, seed=1)
+        emitter.emit(15)
+        assert emitter.count == 10
+        assert emitter.stats.dropped == 5
+        assert emitter.capacity == 10
+
+    @pytest.mark.integration
+    def test_ranges_and_direction(self, texture):
+        emitter = ParticleEmitter(texture, speed=(100, 200), direction=90,
+                                  spread=0, lifetime=(1, 2), seed=1)
+        emitter.emit(100)
+        vx = emitter.get_attribute('particle_vx')
+        vy = emitter.get_attribute('particle_vy')
+        lifetime = emitter.get_attribute('particle_lifetime')
+        assert numpy.allclose(vx, 0)
+        assert vy.min() >= 100 and vy.max() <= 200
+        assert lifetime.min() >= 1 and lifetime.max() <= 2
+
+    @pytest.mark.integration
+    def test_list_ranges(self, texture):
+        emitter = ParticleEmitter(texture, lifetime=[0.5, 1], speed=[10, 20],
+                                  spin=numpy.array([-90, 90]), seed=1)
+        emitter.emit(50)
+        lifetime = emitter.get_attribute('particle_lifetime')
+        spin = emitter.get_attribute('particle_spin')
+        assert lifetime.min() >= 0.5 and lifetime.max() <= 1
+        assert spin.min() >= -90 and spin.max() <= 90
+        assert len(set(lifetime)) > 1
+
+    @pytest.mark.integration
+    def test_invalid_range(self, texture):
+        emitter = ParticleEmitter(texture, speed=[1, 2, 3])
+        with pytest.raises(TypeError):
+            emitter.emit(1)
+
+    @pytest.mark.integration
+    def test_zero_lifetime(self, texture):
+        emitter = ParticleEmitter(texture, lifetime=0, opacity=(255, 0))
+        emitter.emit(5)
+        assert emitter.get_attribute('particle_lifetime').min() > 0
+        with numpy.errstate(all='raise'):
+            emitter.on_update(0)
+        assert list(emitter.opacity) == [255] * 5
+        emitter.on_update(1 / 60)
+        assert emitter.count == 0
+
+
+class TestIntegration:
+
+    @pytest.mark.integration
+    def test_motion_and_curves(self, texture):
+        emitter = ParticleEmitter(texture, speed=10, direction=0, spread=0,
+                                  acceleration=(0, -10), lifetime=2,
+                                  color=[(255, 0, 0), (0, 0, 255)],
+                                  opacity=(255, 0), scale=(1, 3))
+        emitter.emit(1)
+        emitter.on_update(1)
+        assert numpy.allclose(emitter.x, 10)
+        assert numpy.allclose(emitter.y, -10)
+        assert list(emitter.color[0]) == [127, 0, 127]
+        assert list(emitter.opacity) == [127]
+        assert numpy.allclose(emitter.scale, 2)
+
+    @pytest.mark.integration
+    def test_expired_particles_are_recycled(self, texture):
+        emitter = ParticleEmitter(texture, capacity=5, lifetime=1)
+        emitter.emit(5)
+        emitter.on_update(0.5)
+        emitter.emit(1)
+        assert emitter.count == 5
+        emitter.on_update(0.6)
+        assert emitter.count == 0
+        assert emitter.stats.expired == 5
+        emitter.emit(5)
+        assert emitter.count == 5
+
+
+class TestWindow:
+
+    @pytest.mark.integration
+    def test_attached_emitter(self, window, texture):
+        sprite = window.create_sprite(x=100, y=200)
+        emitter = window.add_drawable(ParticleEmitter(texture, rate=60,
+                                                      speed=0))
+        emitter.attach_to(sprite, offset_x=5)
+        window._Window__game_loop(1 / 60)
+        assert emitter.count == 1
+        assert list(emitter.x) == [105]
+        assert list(emitter.y) == [200]
+        window._Window__auto_draw()
+        assert emitter.stats.draw_time > 0
+
+        sprite.delete()
+        window._Window__game_loop(1 / 60)
+        window._Window__game_loop(1 / 60)
+        assert emitter.sprite is None
+        assert emitter.stats.emitted == 1
+
+    @pytest.mark.integration
+    def test_deleted_emitter(self, window, texture):
+        emitter = window.add_drawable(ParticleEmitter(texture, rate=60))
+        window._Window__game_loop(1 / 60)
+        emitter.delete()
+        window._Window__game_loop(1 / 60)
+        window._Window__auto_draw()
+        assert emitter.count == 0
+        assert emitter.stats.emitted == 1
@@ -0,0 +1,135 @@
+"""Integration tests for ray and segment casts against sprites."""
+
+import random
+
+import pytest
+from pycat.collision import RaycastHit, get_segment_intersection
+from pycat.core import Point
+from pycat.geometry.spatial_hash import SpatialHash
+
+
+@pytest.fixture
+def window(make_window):
+    return make_window(collision_cell_size=50)
+
+
+def make_box(window, x, y, size=20, tags=None, rotation=0):
+    sprite = window.create_sprite(x=x, y=y, tags=tags or [])
+    sprite.scale = size
+    sprite.rotation = rotation
+    return sprite
+
+
+class TestSegmentCells:
+
+    def test_cells_are_visited_in_order(self):
+        grid = SpatialHash(cell_size=10)
+        cells = [(i, j) for i, j, _ in
+                 grid.get_cells_along_segment(5, 5, 35, 15)]
+        assert cells[0] == (0, 0)
+        assert cells[-1] == (3, 1)
+        for (i0, j0), (i1, j1) in zip(cells, cells[1:]):
+            assert abs(i1 - i0) + abs(j1 - j0) == 1
+
+    def test_exit_fractions_increase_to_one(self):
+        grid = SpatialHash(cell_size=10)
+        fractions = [t for _, _, t in
+                     grid.get_cells_along_segment(-5, 3, 27, -14)]
+        assert fractions == sorted(fractions)
+        assert fractions[-1] == 1.0
+
+    def test_zero_length_segment_visits_one_cell(self):
+        grid = SpatialHash(cell_size=10)
+        assert list(grid.get_cells_along_segment(3, 3, 3, 3)) == [
+            (0, 0, 1.0)]
+
+
+class TestRaycast:
+
+    def test_returns_closest_hit(self, window):
+        far = make_box(window, 300, 100)
+        near = make_box(window, 200, 100)
+        hit = window.raycast(Point(100, 100), Point(1, 0), 500)
+        assert isinstance(hit, RaycastHit)
+        assert hit.sprite is near
+        assert hit.point.x == pytest.approx(190)
+        assert hit.point.y == pytest.approx(100)
+        assert hit.distance == pytest.approx(90)
+        assert far is not hit.sprite
+
+    def test_respects_max_distance(self, window):
+        make_box(window, 300, 100)
+        assert window.raycast(Point(100, 100), Point(1, 0), 150) is None
+        assert window.raycast(Point(100, 100), Point(1, 0), 200) is not None
+
+    def test_all_hits_are_sorted(self, window):
+        sprites = [make_box(window, x, 100) for x in (400, 200, 300)]
+        hits = window.raycast(Point(100, 100), Point(1, 0), 500,
+                              all_hits=True)
+        assert [h.sprite for h in hits] == [sprites[1], sprites[2],
+                                            sprites[0]]
+
+    def test_tag_and_ignore_filters(self, window):
+        shooter = make_box(window, 100, 100)
+        make_box(window, 200, 100)
+        wall = make_box(window, 300, 100, tags=['wall'])
+        hit = window.raycast(Point(100, 100), Point(1, 0), 500, tag='wall')
+        assert hit.sprite is wall
+        hit = window.raycast(Point(100, 100), Point(1, 0), 500,
+                             ignore=shooter)
+        assert hit.distance == pytest.approx(90)
+
+    def test_start_inside_sprite_hits_at_zero(self, window):
+        sprite = make_box(window, 100, 100)
+        hit = window.raycast(Point(100, 100), Point(0, 1), 300)
+        assert hit.sprite is sprite
+        assert hit.distance == 0
+
+    def test_invisible_and_deleted_sprites_are_skipped(self, window):
+        hidden = make_box(window, 200, 100)
+        hidden.is_visible = False
+        deleted = make_box(window, 300, 100)
+        deleted.delete()
+        assert window.raycast(Point(100, 100), Point(1, 0), 500) is None
+
+    def test_rotated_box_uses_exact_edges(self, window):
+        make_box(window, 200, 200, size=40, rotation=45)
+        # passes the bounding box corner but misses the diamond
+        assert window.segment_cast(Point(180, 300), Point(180, 215)) is None
+        hit = window.segment_cast(Point(100, 200), Point(300, 200))
+        assert hit.point.x == pytest.approx(200 - 20 * 2 ** 0.5)
+
+    def test_thin_wall_stops_fast_sweep(self, window):
+        wall = window.create_sprite(x=400, y=300)
+        wall.scale_x = 2
+        wall.scale_y = 200
+        hit = window.segment_cast(Point(100, 300), Point(700, 310))
+        assert hit.sprite is wall
+
+    def test_large_sprites_are_hit(self, window):
+        background = make_box(window, 400, 300, size=700)
+        hit = window.raycast(Point(-100, 300), Point(1, 0), 1000)
+        assert hit.sprite is background
+        assert hit.distance == pytest.approx(150)
+
+    def test_matches_brute_force(self, window):
+        rng = random.Random(3)
+        sprites = [make_box(window, rng.uniform(0, 800), rng.uniform(0, 600),
+                            size=rng.uniform(5, 40),
+                            rotation=rng.uniform(0, 360))
+                   for _ in range(150)]
+        for _ in range(50):
+            start = Point(rng.uniform(-50, 850), rng.uniform(-50, 650))
+            end = Point(rng.uniform(-50, 850), rng.uniform(-50, 650))
+            hits = window.segment_cast(start, end, all_hits=True)
+            hit = window.segment_cast(start, end)
+            expected = []
+            for s in sprites:
+                p = get_segment_intersection(s, start, end)
+                if p is not None:
+                    expected.append((p - start).magnitude())
+            assert len(hits) == len(expected)
+            if expected:
+                assert hit.distance == pytest.approx(min(expected))
+            else:
+                assert hit is None
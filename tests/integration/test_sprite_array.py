@@ -0,0 +1,122 @@
+"""Integration tests for array-backed sprites."""
+
+import numpy
+import pytest
+from pycat.base import NumpyImage, TextureManager
+from pycat.sprite_array import SpriteArray
+
+
+@pytest.fixture
+def texture():
+    image = numpy.full((10, 20, 4), 255, dtype=numpy.uint8)
+    return NumpyImage.get_texture_from_array(image)
+
+
+class TestArrays:
+
+    @pytest.mark.integration
+    def test_add_with_defaults_and_values(self, texture):
+        sprites = SpriteArray(texture, capacity=2)
+        indices = sprites.add(3, x=[1, 2, 3], y=5, color=(255, 0, 0))
+        assert list(indices) == [0, 1, 2]
+        assert sprites.count == 3
+        assert sprites.capacity >= 3
+        assert list(sprites.x) == [1, 2, 3]
+        assert list(sprites.y) == [5, 5, 5]
+        assert list(sprites.scale) == [1, 1, 1]
+        assert list(sprites.color[0]) == [255, 0, 0]
+        assert list(sprites.opacity) == [255, 255, 255]
+        with pytest.raises(ValueError):
+            sprites.add(1, speed=3)
+
+    @pytest.mark.integration
+    def test_remove_keeps_order_and_attributes(self, texture):
+        sprites = SpriteArray(texture)
+        sprites.add_attribute('vx')
+        sprites.add(5, x=numpy.arange(5), vx=numpy.arange(5) * 10)
+        sprites.remove(sprites.x % 2 == 1)
+        assert list(sprites.x) == [0, 2, 4]
+        assert list(sprites.get_attribute('vx')) == [0, 20, 40]
+        sprites.remove([0])
+        assert list(sprites.x) == [2, 4]
+        sprites.clear()
+        assert len(sprites) == 0
+
+    @pytest.mark.integration
+    def test_textures_must_share_an_owner(self, texture):
+        other = NumpyImage.get_texture_from_array(
+            numpy.zeros((4, 4, 4), dtype=numpy.uint8))
+        with pytest.raises(ValueError):
+            SpriteArray([texture, other])
+
+    @pytest.mark.integration
+    def test_texture_is_acquired(self, texture):
+        sprites = SpriteArray(texture)
+        assert TextureManager.get_refcount(texture) == 1
+        sprites.delete()
+        assert TextureManager.get_refcount(texture) == 0
+
+
+class TestDrawing:
+
+    @pytest.mark.integration
+    def test_window_updates_and_draws(self, window, texture):
+
+        class Movers(SpriteArray):
+            def on_update(self, dt):
+                self.x += 60 * dt
+
+        sprites = window.add_drawable(Movers(texture, capacity=4))
+        sprites.add(10, rotation=90, scale=2)
+        window._Window__game_loop(1 / 60)
+        assert numpy.allclose(sprites.x, 1)
+        window._Window__auto_draw()
+
+        sprites.remove(slice(5, None))
+        window._Window__auto_draw()
+
+    @pytest.mark.integration
+    def test_deleted_array_is_not_drawn(self, window, texture):
+        sprites = window.add_drawable(SpriteArray(texture))
+        sprites.add(3)
+        sprites.delete()
+        assert sprites.is_deleted
+        window._Window__game_loop(1 / 60)
+        window._Window__auto_draw()
+
+
+class TestQueries:
+
+    @pytest.mark.integration
+    def test_box_array(self, texture):
+        sprites = SpriteArray(texture)
+        sprites.add(2, x=[0, 100], rotation=[0, 90], scale=[1, -2])
+        boxes = sprites.get_box_array()
+        assert numpy.allclose(boxes[0, 4:], [10, 5, -10, -5, 10, 5])
+        assert numpy.allclose(boxes[1, 4:], [20, 10, 90, -20, 110, 20])
+
+    @pytest.mark.integration
+    def test_indices_in_rect_and_radius(self, texture):
+        sprites = SpriteArray(texture)
+        sprites.add(3, x=[0, 100, 200])
+        assert list(sprites.get_indices_in_rect(95, -1, 150, 1)) == [1]
+        assert list(sprites.get_indices_in_radius(0, 0, 100)) == [0, 1]
+
+    @pytest.mark.integration
+    def test_colliding_sprites(self, window, texture):
+        sprites = SpriteArray(texture)
+        sprites.add(3, x=[0, 100, 200], y=100)
+        sprite = window.create_sprite(x=200, y=100)
+        sprite.texture = texture
+        i, j = sprites.get_colliding_sprites([sprite])
+        assert list(i) == [2]
+        assert list(j) == [0]
+
+    @pytest.mark.integration
+    def test_colliding_array_sprites(self, texture):
+        a = SpriteArray(texture)
+        a.add(2, x=[0, 100])
+        b = SpriteArray(texture)
+        b.add(2, x=[500, 115])
+        i, j = a.get_colliding_array_sprites(b)
+        assert list(zip(i, j)) == [(1, 1)]
@@ -0,0 +1,217 @@
+"""Integration tests for sprite collision queries."""
+
+import random
+
+import numpy
+import pytest
+from pycat.base import NumpyImage
+from pycat.base.image import Animation
+from pycat.collision import (get_alpha_mask, get_colliding_pairs,
+                             is_pixel_perfect_collision,
+                             is_rotated_box_collision)
+
+
+def _brute_force_touching(sprite, sprites):
+    return [
+        s for s in sprites
+        if (s is not sprite
+            and s.is_visible
+            and is_rotated_box_collision(sprite, s))
+    ]
+
+
+@pytest.fixture
+def window(make_window):
+    return make_window(collision_cell_size=32)
+
+
+@pytest.fixture
+def scattered_sprites(window):
+    rng = random.Random(7)
+    sprites = []
+    for i in range(120):
+        sprites.append(window.create_sprite(
+            x=rng.uniform(0, 800),
+            y=rng.uniform(0, 600),
+            scale_x=rng.uniform(2, 60),
+            scale_y=rng.uniform(2, 60),
+            rotation=rng.uniform(0, 360),
+            tag='even' if i % 2 == 0 else 'odd'))
+    return sprites
+
+
+class TestBroadphaseQueries:
+
+    @pytest.mark.integration
+    def test_touching_sprites_match_brute_force(self, scattered_sprites):
+        for sprite in scattered_sprites:
+            expected = _brute_force_touching(sprite, scattered_sprites)
+            assert sprite.get_touching_sprites() == expected
+            assert sprite.is_touching_any_sprite() == bool(expected)
+
+    @pytest.mark.integration
+    def test_tag_queries_match_brute_force(self, scattered_sprites):
+        for sprite in scattered_sprites:
+            expected = [s for s in _brute_force_touching(sprite,
+                                                         scattered_sprites)
+                        if 'odd' in s.tags]
+            assert sprite.get_touching_sprites_with_tag('odd') == expected
+            assert (sprite.is_touching_any_sprite_with_tag('odd')
+                    == bool(expected))
+
+    @pytest.mark.integration
+    def test_queries_follow_moved_sprites(self, window):
+        a = window.create_sprite(x=100, y=100, scale=10)
+        b = window.create_sprite(x=500, y=500, scale=10)
+        assert not a.is_touching_sprite(b)
+        assert a.get_touching_sprites() == []
+
+        b.position = (105, 100)
+        assert a.get_touching_sprites() == [b]
+
+        b.rotation = 45
+        b.scale = 1
+        b.x = 300
+        assert a.get_touching_sprites() == []
+
+    @pytest.mark.integration
+    def test_deleted_and_hidden_sprites_are_ignored(self, window):
+        a = window.create_sprite(x=100, y=100, scale=10)
+        b = window.create_sprite(x=100, y=100, scale=10)
+        c = window.create_sprite(x=100, y=100, scale=10)
+        b.delete()
+        c.is_visible = False
+        assert a.get_touching_sprites() == []
+        assert window.get_sprites_in_rect(90, 90, 110, 110) == [a, c]
+
+
+class TestCachedGeometry:
+
+    @pytest.mark.integration
+    def test_oriented_box_is_cached_until_transform_changes(self, window):
+        sprite = window.create_sprite(x=100, y=50, scale_x=20, scale_y=10)
+        box = sprite.get_oriented_box()
+        version = sprite.transform_version
+        assert sprite.get_oriented_box() is box
+        assert sprite.get_vertices() is sprite.get_vertices()
+        assert sprite.get_bounding_box() == (90, 45, 110, 55)
+
+        sprite.rotation = 90
+        assert sprite.transform_version > version
+        assert sprite.get_oriented_box() is not box
+        min_x, min_y, max_x, max_y = sprite.get_bounding_box()
+        assert min_x == pytest.approx(95) and max_x == pytest.approx(105)
+        assert min_y == pytest.approx(40) and max_y == pytest.approx(60)
+
+    @pytest.mark.integration
+    def test_every_transform_setter_invalidates(self, window):
+        sprite = window.create_sprite()
+        for name, value in [('x', 5), ('y', 5), ('position', (1, 2)),
+                            ('rotation', 30), ('scale', 3), ('scale_x', 2),
+                            ('scale_y', 2), ('width', 10), ('height', 10)]:
+            box = sprite.get_oriented_box()
+            setattr(sprite, name, value)
+            assert sprite.get_oriented_box() is not box, name
+
+    @pytest.mark.integration
+    def test_animation_frames_invalidate(self, window):
+        frames = [NumpyImage.get_texture_from_array(
+                      numpy.full((size, size, 4), 255, dtype=numpy.uint8))
+                  for size in (10, 40)]
+        sprite = window.create_sprite(x=100, y=100)
+        sprite.set_image(Animation.from_image_sequence(frames, 1))
+        assert sprite.get_bounding_box() == (95, 95, 105, 105)
+        assert window.get_sprites_in_rect(115, 115, 116, 116) == []
+
+        version = sprite.transform_version
+        sprite._sprite._animate(1)
+        assert sprite.transform_version > version
+        assert sprite.get_bounding_box() == (80, 80, 120, 120)
+        assert window.get_sprites_in_rect(115, 115, 116, 116) == [sprite]
+
+
+class TestPixelPerfectCollision:
+
+    @staticmethod
+    def _half_texture():
+        """A 10x10 texture whose left half is opaque."""
+        pixels = numpy.zeros((10, 10, 4), dtype=numpy.uint8)
+        pixels[:, :5] = 255
+        return NumpyImage.get_texture_from_array(pixels)
+
+    @pytest.mark.integration
+    def test_transparent_pixels_do_not_collide(self, window):
+        texture = self._half_texture()
+        a = window.create_sprite(x=100, y=100, texture=texture)
+        b = window.create_sprite(x=108, y=100, texture=texture)
+        # boxes overlap, but b's opaque half starts after a's ends
+        assert is_rotated_box_collision(a, b)
+        assert not is_pixel_perfect_collision(a, b)
+
+        b.x = 104
+        assert is_pixel_perfect_collision(a, b)
+        assert is_pixel_perfect_collision(b, a)
+
+    @pytest.mark.integration
+    def test_flipped_and_rotated_sprites(self, window):
+        texture = self._half_texture()
+        a = window.create_sprite(x=100, y=100, texture=texture)
+        b = window.create_sprite(x=108, y=100, texture=texture)
+        a.scale_x = -1  # a's opaque half now faces b
+        assert is_pixel_perfect_collision(a, b)
+
+        a.scale_x = 1
+        a.rotation = 180
+        assert is_pixel_perfect_collision(a, b)
+
+        a.rotation = 90  # opaque half is now the bottom half
+        assert is_pixel_perfect_collision(a, b)
+        b.y = 108
+        assert not is_pixel_perfect_collision(a, b)
+        b.y = 100
+
+        a.rotation = 0
+        b.scale = 3
+        b.x = 113
+        assert is_pixel_perfect_collision(a, b)
+        b.x = 116
+        assert not is_pixel_perfect_collision(a, b)
+
+    @pytest.mark.integration
+    def test_far_apart_sprites_and_mask_cache(self, window):
+        texture = self._half_texture()
+        a = window.create_sprite(x=100, y=100, texture=texture)
+        b = window.create_sprite(x=300, y=100, texture=texture)
+        assert not is_pixel_perfect_collision(a, b)
+        mask = get_alpha_mask(texture)
+        assert mask is get_alpha_mask(texture)
+        assert mask.shape == (10, 2)
+
+
+class TestCollidingPairs:
+
+    @pytest.mark.integration
+    def test_pairs_match_brute_force(self, scattered_sprites):
+        evens = [s for s in scattered_sprites if 'even' in s.tags]
+        odds = [s for s in scattered_sprites if 'odd' in s.tags]
+        expected = [(i, j) for i, a in enumerate(evens)
+                    for j, b in enumerate(odds)
+                    if is_rotated_box_collision(a, b)]
+        assert expected
+        assert get_colliding_pairs(evens, odds) == expected
+        assert get_colliding_pairs(evens, []) == []
+
+    @pytest.mark.integration
+    def test_window_pairs_by_tag(self, window, scattered_sprites):
+        scattered_sprites[1].is_visible = False
+        pairs = window.get_colliding_pairs('even', 'odd')
+        expected = [(a, b) for a in window.get_sprites_with_tag('even')
+                    for b in window.get_sprites_with_tag('odd')
+                    if a.is_touching_sprite(b)]
+        assert pairs == expected
+
+        same = window.get_colliding_pairs('odd', 'odd')
+        odds = window.get_sprites_with_tag('odd')
+        expected = [(a, b) for i, a in enumerate(odds) for b in odds[i+1:]
+                    if a.is_touching_sprite(b)]
+        assert same == expected
@@ -0,0 +1,102 @@
+"""Integration tests for reusing pooled sprites."""
+
+import pytest
+from pycat.core import Sprite
+
+
+class Bullet(Sprite):
+
+    def on_create(self):
+        self.speed = 10
+        self.hits = 0
+
+    def on_reset(self):
+        self.was_reset = True
+
+
+@pytest.mark.integration
+def test_deleted_sprites_are_reused(window):
+    bullet = window.create_sprite(Bullet, pooled=True, x=100, y=50,
+                                  tag='bullet', scale=4, opacity=100)
+    bullet.hits = 3
+    vertex_list = bullet._sprite._vertex_list
+    bullet.delete()
+    window._Window__game_loop(1/60)
+    assert window.get_sprite_pool_stats(Bullet) == (1, 1, 0)
+    assert not bullet._sprite.visible
+
+    reused = window.create_sprite(Bullet, pooled=True, x=10)
+    assert reused is bullet
+    assert reused._sprite._vertex_list is vertex_list
+    assert reused.was_reset
+    assert not reused.is_deleted
+    assert reused.is_visible
+    assert (reused.x, reused.y, reused.scale, reused.opacity) == (10, 0, 1, 255)
+    assert reused.hits == 0
+    assert reused.tags == set()
+    assert window.get_sprite_pool_stats(Bullet) == (0, 1, 1)
+
+    window._Window__game_loop(1/60)
+    assert window.get_all_sprites() == [reused]
+    assert window.get_sprites_in_rect(0, -10, 20, 10) == [reused]
+
+
+@pytest.mark.integration
+def test_reused_sprites_are_found_by_tag(window):
+    bullet = window.create_sprite(Bullet, pooled=True, tag='bullet')
+    bullet.delete()
+    window._Window__game_loop(1/60)
+    assert window.get_sprites_with_tag('bullet') == []
+
+    bullet = window.create_sprite(Bullet, pooled=True, tag='enemy_bullet')
+    assert window.get_sprites_with_tag('bullet') == []
+    assert window.get_sprites_with_tag('enemy_bullet') == [bullet]
+
+
+@pytest.mark.integration
+def test_pools_are_per_class(window):
+    bullet = window.create_sprite(Bullet, pooled=True)
+    bullet.delete()
+    window._Window__game_loop(1/60)
+    sprite = window.create_sprite(pooled=True)
+    assert sprite is not bullet
+    assert window.get_sprite_pool_stats(Bullet).free == 1
+
+
+@pytest.mark.integration
+def test_unpooled_sprites_are_not_reused(window):
+    sprite = window.create_sprite(Bullet)
+    sprite.delete()
+    window._Window__game_loop(1/60)
+    assert window.create_sprite(Bullet, pooled=True) is not sprite
+    assert window.get_sprite_pool_stats(Bullet) == (0, 1, 0)
+
+
+@pytest.mark.integration
+def test_collision_exit_before_reuse(window):
+    exits = []
+
+    class Target(Sprite):
+        def on_collision_exit(self, other):
+            exits.append(other)
+
+    window.add_collider_tag('target')
+    window.add_collider_tag('bullet')
+    window.create_sprite(Target, tag='target', x=100, y=100, scale=10)
+    bullet = window.create_sprite(Bullet, pooled=True, tag='bullet',
+                                  x=100, y=100, scale=10)
+    window._Window__game_loop(1/60)
+    bullet.delete()
+    window._Window__game_loop(1/60)
+    assert exits == [bullet]
+    assert window.get_sprite_pool_stats(Bullet).free == 1
+
+
+@pytest.mark.integration
+def test_clear_sprite_pools(window):
+    bullet = window.create_sprite(Bullet, pooled=True)
+    bullet.delete()
+    window._Window__game_loop(1/60)
+    window.clear_sprite_pools()
+    assert window.get_sprite_pool_stats(Bullet).free == 0
+    assert window.create_sprite(Bullet, pooled=True) is not bullet
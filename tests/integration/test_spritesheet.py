@@ -0,0 +1,82 @@
+"""Integration tests for sprite sheet and tileset texture regions."""
+
+import os
+
+import numpy
+import pyglet.resource
+import pytest
+from pycat.base import NumpyImage
+from pycat.collision import get_alpha_mask
+from pycat.experimental.spritesheet import SpriteSheet
+
+LDTK_DIR = os.path.join(os.path.dirname(__file__), '..', '..',
+                        'pycat', 'test', 'ldtk', 'platformer')
+
+
+@pytest.fixture
+def resources(monkeypatch):
+    monkeypatch.chdir(LDTK_DIR)
+    monkeypatch.setattr(pyglet.resource, 'path', [os.path.abspath(LDTK_DIR)])
+    pyglet.resource.reindex()
+    yield
+    monkeypatch.undo()
+    pyglet.resource.reindex()
+
+
+@pytest.fixture
+def sheet(resources):
+    return SpriteSheet('sprite_sheets/characters_packed.png', 24, 24)
+
+
+class TestSpriteSheet:
+
+    @pytest.mark.integration
+    def test_cells_share_one_texture(self, sheet):
+        a = sheet.get_texture(0, 0)
+        b = sheet.get_texture(1, 0)
+        assert a is sheet.get_texture(0, 0)
+        assert a.owner is b.owner
+        assert (a.width, a.height) == (24, 24)
+        assert (a.anchor_x, a.anchor_y) == (12, 12)
+
+    @pytest.mark.integration
+    def test_cell_pixels_match_the_sheet(self, sheet):
+        texture = sheet.get_texture(2, 1)
+        expected = sheet.img_array[24:48, 48:72]
+        assert numpy.array_equal(
+            NumpyImage.get_array_from_texture(texture), expected)
+
+    @pytest.mark.integration
+    def test_flip_uses_texture_coordinates(self, sheet):
+        texture = sheet.get_texture(0, 2)
+        flipped = sheet.get_texture(0, 2, flip_lr=True)
+        assert flipped is not texture
+        assert flipped.owner is texture.owner
+        assert flipped.tex_coords[0] == texture.tex_coords[3]
+        # the alpha mask follows the flip
+        expected = numpy.packbits(
+            numpy.fliplr(sheet.img_array[48:72, 0:24, 3] > 0), axis=1)
+        assert numpy.array_equal(get_alpha_mask(flipped), expected)
+
+    @pytest.mark.integration
+    def test_all_textures(self, sheet):
+        rows, cols = sheet.img_array.shape[0] // 24, sheet.img_array.shape[1] // 24
+        textures = sheet.get_all_textures()
+        assert len(textures) == rows * cols
+        assert len({texture.owner for texture in textures}) == 1
+
+
+class TestLdtkTiles:
+
+    @pytest.mark.integration
+    def test_tiles_share_regions(self, window, resources):
+        from pycat.experimental.ldtk import LdtkFile
+        ldtk = LdtkFile('platformer.ldtk')
+        level_name = ldtk._data.levels[0].identifier
+        tiles = ldtk.get_image_tiles_for_level(level_name)
+        textures = [tile.get_texture() for tile in tiles]
+        sources = {(tile._tileset.rel_path,
+                    tile.tileset_bottom_left_corner.x,
+                    tile.tileset_bottom_left_corner.y) for tile in tiles}
+        assert len({id(texture) for texture in textures}) == len(sources)
+        assert len({texture.owner for texture in textures}) <= len(ldtk._data.defs.tilesets)
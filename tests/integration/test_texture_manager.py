@@ -0,0 +1,129 @@
+"""Integration tests for reference counting and evicting textures."""
+
+import gc
+import weakref
+
+import numpy
+import pytest
+from pycat.base import NumpyImage, TextureManager
+
+
+@pytest.fixture
+def budget():
+    old_budget = TextureManager.get_budget()
+    yield
+    TextureManager.set_budget(old_budget)
+
+
+def create_texture(size=16):
+    return NumpyImage.get_texture_from_array(
+        numpy.full((size, size, 4), 255, dtype=numpy.uint8))
+
+
+@pytest.mark.integration
+def test_sprites_acquire_and_release(window, budget):
+    texture = create_texture()
+    a = window.create_sprite(texture=texture)
+    b = window.create_sprite(texture=texture)
+    assert TextureManager.get_refcount(texture) == 2
+
+    a.texture = create_texture()
+    assert TextureManager.get_refcount(texture) == 1
+
+    b.delete()
+    window._Window__game_loop(1/60)
+    assert TextureManager.get_refcount(texture) == 0
+    assert texture.id is not None
+
+    # an unused texture can be used again until it is evicted
+    window.create_sprite(texture=texture)
+    assert TextureManager.get_refcount(texture) == 1
+
+
+@pytest.mark.integration
+def test_unused_textures_are_evicted_over_budget(window, budget):
+    TextureManager.evict_unused()
+    TextureManager.set_budget(3 * 16 * 16 * 4)
+    textures = [create_texture() for _ in range(4)]
+    sprites = [window.create_sprite(texture=t) for t in textures]
+    used_bytes = TextureManager.get_used_bytes()
+
+    evicted = TextureManager.get_evicted_count()
+    refs = [weakref.ref(t) for t in textures]
+    del textures
+    for sprite in sprites:
+        sprite.delete()
+    del sprites
+    window._Window__game_loop(1/60)
+
+    assert TextureManager.get_used_bytes() == used_bytes - 4 * 16 * 16 * 4
+    assert TextureManager.get_unused_count() == 3
+    assert TextureManager.get_unused_bytes() == 3 * 16 * 16 * 4
+    assert TextureManager.get_evicted_count() == evicted + 1
+    # the least recently used texture is freed once nothing references it,
+    # including the batch, which drops empty groups when it is drawn
+    window._Window__auto_draw()
+    gc.collect()
+    assert refs[0]() is None
+    assert all(ref() is not None for ref in refs[1:])
+
+    TextureManager.evict_unused()
+    assert TextureManager.get_unused_bytes() == 0
+
+
+@pytest.mark.integration
+def test_evicted_textures_still_referenced_can_be_used(window, budget):
+    texture = create_texture()
+    region = create_texture(32).get_region(0, 0, 16, 16)
+    sprite = window.create_sprite(texture=texture)
+    sprite.texture = region
+    sprite.delete()
+    window._Window__game_loop(1/60)
+    TextureManager.evict_unused()
+    assert TextureManager.get_unused_count() == 0
+
+    assert texture.id is not None
+    assert region.owner.id is not None
+    sprite = window.create_sprite(texture=texture)
+    sprite.texture = region
+    assert TextureManager.get_refcount(texture) == 0
+    assert TextureManager.get_refcount(region) == 1
+
+
+@pytest.mark.integration
+def test_regions_count_their_owner(window, budget):
+    texture = create_texture(32)
+    region = texture.get_region(0, 0, 16, 16)
+    sprite = window.create_sprite(texture=region)
+    assert TextureManager.get_refcount(texture) == 1
+    assert TextureManager.get_texture_bytes(region) == 32 * 32 * 4
+    sprite.delete()
+    window._Window__game_loop(1/60)
+    assert TextureManager.get_refcount(region) == 0
+
+
+@pytest.mark.integration
+def test_acquired_textures_are_kept(window, budget):
+    texture = create_texture()
+    TextureManager.acquire(texture)
+    sprite = window.create_sprite(texture=texture)
+    sprite.delete()
+    window._Window__game_loop(1/60)
+    TextureManager.evict_unused()
+    assert texture.id is not None
+    TextureManager.release(texture)
+
+
+@pytest.mark.integration
+def test_default_image_is_never_evicted(window, budget):
+    sprite = window.create_sprite()
+    sprite.delete()
+    window._Window__game_loop(1/60)
+    TextureManager.evict_unused()
+    assert window.create_sprite().texture.id is not None
+
+
+@pytest.mark.integration
+def test_invalid_budget():
+    with pytest.raises(ValueError):
+        TextureManager.set_budget(-1)
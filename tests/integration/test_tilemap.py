@@ -0,0 +1,102 @@
+"""Integration tests for chunked tilemap layers."""
+
+import os
+
+import numpy
+import pyglet.resource
+import pytest
+from pycat.base import NumpyImage
+from pycat.core import Point
+from pycat.tilemap import TilemapLayer
+
+LDTK_DIR = os.path.join(os.path.dirname(__file__), '..', '..',
+                        'pycat', 'test', 'ldtk', 'platformer')
+
+
+@pytest.fixture
+def tileset():
+    image = numpy.full((32, 32, 4), 255, dtype=numpy.uint8)
+    return NumpyImage.get_texture_from_array(image)
+
+
+def get_grid_tiles(columns, rows, size=16):
+    return [(col * size, row * size, 16 * ((col + row) % 2), 0)
+            for col in range(columns) for row in range(rows)]
+
+
+class TestChunks:
+
+    @pytest.mark.integration
+    def test_tiles_are_grouped_into_chunks(self, tileset):
+        tilemap = TilemapLayer(tileset, 16, get_grid_tiles(100, 10),
+                               chunk_size=32)
+        assert tilemap.tile_count == 1000
+        assert tilemap.chunk_count == 4
+        assert tilemap.get_chunk_bounds()[0] == (0, 0, 512, 160)
+        tilemap.draw()
+        tilemap.delete()
+        assert tilemap.chunk_count == 0
+
+    @pytest.mark.integration
+    def test_invalid_chunk_size(self, tileset):
+        with pytest.raises(ValueError):
+            TilemapLayer(tileset, 16, [], chunk_size=0)
+
+
+class TestCulling:
+
+    @pytest.mark.integration
+    def test_cull(self, tileset):
+        tilemap = TilemapLayer(tileset, 16, get_grid_tiles(100, 10),
+                               chunk_size=32)
+        tilemap.cull(0, 0, 800, 600)
+        assert tilemap.visible_chunk_count == 2
+        tilemap.cull(1100, 0, 1300, 600)
+        assert tilemap.visible_chunk_count == 1
+        tilemap.cull(-500, -500, -100, -100)
+        assert tilemap.visible_chunk_count == 0
+
+    @pytest.mark.integration
+    def test_window_culls_with_offset(self, window, tileset):
+        tilemap = window.create_tilemap_layer(tileset, 16,
+                                              get_grid_tiles(200, 10))
+        window._Window__auto_draw()
+        assert tilemap.visible_chunk_count == 2
+
+        # the view covers x from 2400 to 3200, chunks are 512 wide
+        window.offset = Point(-2400, 0)
+        window._Window__auto_draw()
+        assert tilemap.visible_chunk_count == 3
+
+        window.delete_tilemap_layer(tilemap)
+        assert tilemap.chunk_count == 0
+        window._Window__auto_draw()
+
+
+class TestLdtk:
+
+    @pytest.fixture
+    def resources(self, monkeypatch):
+        monkeypatch.chdir(LDTK_DIR)
+        monkeypatch.setattr(pyglet.resource, 'path', [os.path.abspath(LDTK_DIR)])
+        pyglet.resource.reindex()
+        yield
+        monkeypatch.undo()
+        pyglet.resource.reindex()
+
+    @pytest.mark.integration
+    def test_tile_layers(self, window, resources):
+        from pycat.experimental.ldtk import LdtkFile
+        ldtk = LdtkFile('platformer.ldtk')
+        level_name = ldtk._data.levels[0].identifier
+        tile_count = len(ldtk.get_image_tiles_for_level(level_name))
+
+        tilemaps = ldtk.create_tilemap_layers(window, level_name)
+        assert sum(tilemap.tile_count for tilemap in tilemaps) == tile_count
+        assert (ldtk.get_tileset_texture('sprite_sheets/tiles_packed.png')
+                is ldtk.get_tileset_texture('sprite_sheets/tiles_packed.png'))
+
+        ldtk.render_level(window, level_name, use_tilemap_layers=True)
+        assert ldtk._rendered_image_tiles == []
+        assert len(ldtk._rendered_tilemap_layers) == len(tilemaps)
+        window._Window__auto_draw()
@@ -0,0 +1,81 @@
+"""Integration tests for culling sprites outside the window's view."""
+
+import pytest
+from pycat.core import Point
+
+
+@pytest.fixture
+def window(make_window):
+    return make_window(enforce_window_limits=False, view_culling=True,
+                       view_culling_margin=50)
+
+
+def draw(window):
+    window._Window__game_loop(1 / 60)
+    window._Window__auto_draw()
+
+
+class TestViewCulling:
+
+    @pytest.mark.integration
+    def test_sprites_outside_the_view_are_culled(self, window):
+        near = window.create_sprite(x=400, y=300, scale=10)
+        margin = window.create_sprite(x=830, y=300, scale=10)
+        far = window.create_sprite(x=2000, y=300, scale=10)
+        draw(window)
+        assert not near.is_culled and near._sprite.visible
+        assert not margin.is_culled
+        assert far.is_culled and not far._sprite.visible
+        # culling does not change the user's visibility or collisions
+        assert far.is_visible
+        assert window.get_sprites_in_rect(1990, 290, 2010, 310) == [far]
+        assert window.get_view_culling_stats() == (2, 1, 2, 1)
+
+    @pytest.mark.integration
+    def test_scrolling_culls_and_restores(self, window):
+        left = window.create_sprite(x=400, y=300, scale=10)
+        right = window.create_sprite(x=2000, y=300, scale=10)
+        draw(window)
+        window.offset = Point(-1600, 0)
+        draw(window)
+        assert left.is_culled
+        assert not right.is_culled and right._sprite.visible
+        assert window.get_view_culling_stats() == (1, 1, 1, 1)
+
+        right.x = 5000
+        draw(window)
+        assert right.is_culled
+        assert window.get_view_culling_stats().culled == 2
+
+    @pytest.mark.integration
+    def test_hidden_sprites_stay_hidden(self, window):
+        sprite = window.create_sprite(x=2000, y=300, scale=10)
+        sprite.is_visible = False
+        draw(window)
+        sprite.x = 400
+        draw(window)
+        assert not sprite.is_culled
+        assert not sprite._sprite.visible
+        sprite.is_visible = True
+        assert sprite._sprite.visible
+
+    @pytest.mark.integration
+    def test_disabling_restores_culled_sprites(self, window):
+        sprite = window.create_sprite(x=2000, y=300, scale=10)
+        draw(window)
+        assert sprite.is_culled
+        window.view_culling = False
+        draw(window)
+        assert not sprite.is_culled and sprite._sprite.visible
+
+    @pytest.mark.integration
+    def test_deleted_and_pooled_sprites(self, window):
+        sprite = window.create_sprite(x=2000, y=300, pooled=True)
+        draw(window)
+        sprite.delete()
+        draw(window)
+        assert window.get_view_culling_stats().culled == 0
+        reused = window.create_sprite(x=400, y=300, pooled=True)
+        assert reused is sprite
+        draw(window)
+        assert not reused.is_culled and reused._sprite.visible
@@ -89,3 +89,72 @@ class TestWindowIntegration:
         
         # Should not raise an exception
         window.set_clear_color(255, 0, 0, 255)  # Red color
+
+
+class TestWindowTagIndex:
+    """Integration tests for tag lookups."""
+
+    @pytest.mark.integration
+    def test_tag_index_follows_tag_changes(self, mock_window):
+        window = mock_window
+        a = window.create_sprite(tag='enemy')
+        b = window.create_sprite(tags=['enemy', 'boss'])
+        c = window.create_sprite()
+
+        assert window.get_sprites_with_tag('enemy') == [a, b]
+        assert window.get_sprite_with_tag('boss') is b
+        assert window.count_sprites_with_tag('enemy') == 2
+
+        c.add_tag('enemy')
+        a.remove_tag('enemy')
+        assert window.get_sprites_with_tag('enemy') == [b, c]
+
+        b.clear_tags()
+        assert window.get_sprites_with_tag('enemy') == [c]
+        assert window.get_sprites_with_tag('boss') == []
+        assert list(window.iter_sprites_with_tag('enemy')) == [c]
+
+    @pytest.mark.integration
+    def test_tagged_sprites_keep_creation_order(self, mock_window):
+        window = mock_window
+        a = window.create_sprite()
+        b = window.create_sprite(tag='enemy')
+        c = window.create_sprite(tags=['flying'])
+
+        # tags added later do not move a sprite to the end
+        a.add_tag('enemy')
+        assert window.get_sprites_with_tag('enemy') == [a, b]
+        assert window.get_sprite_with_tag('enemy') is a
+        assert list(window.iter_sprites_with_tag('enemy')) == [a, b]
+
+        b.remove_tag('enemy')
+        b.add_tag('enemy')
+        a.add_tag('flying')
+        assert window.get_sprites_with_tag('enemy') == [a, b]
+        assert window.get_sprites_with_any_tag(['flying', 'enemy']) == [a, b, c]
+        assert window.get_sprites_with_all_tags(['flying', 'enemy']) == [a]
+
+    @pytest.mark.integration
+    def test_deleted_sprites_leave_the_index(self, mock_window):
+        from pycat.window import SpriteWithTagDoesNotExist
+
+        window = mock_window
+        a = window.create_sprite(tag='coin')
+        a.delete()
+        a.add_tag('gem')
+        assert window.get_sprites_with_tag('coin') == []
+        assert window.get_sprites_with_tag('gem') == []
+        with pytest.raises(SpriteWithTagDoesNotExist):
+            window.get_sprite_with_tag('coin')
+
+    @pytest.mark.integration
+    def test_multi_tag_queries(self, mock_window):
+        window = mock_window
+        a = window.create_sprite(tags=['enemy', 'flying'])
+        b = window.create_sprite(tags=['enemy'])
+        c = window.create_sprite(tags=['flying'])
+
+        assert window.get_sprites_with_all_tags(['enemy', 'flying']) == [a]
+        assert window.get_sprites_with_any_tag(['enemy', 'flying']) == [a, b, c]
+        assert window.get_sprites_with_all_tags(['enemy', 'missing']) == []
+        assert window.get_sprites_with_all_tags([]) == []
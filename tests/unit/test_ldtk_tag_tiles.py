@@ -0,0 +1,41 @@
+"""Unit tests for merging LDtk IntGrid cells into rectangles."""
+
+import numpy
+import pytest
+from pycat.experimental.ldtk import _merge_cells
+
+
+def _paint(rects, shape):
+    painted = numpy.zeros(shape, dtype=int)
+    for row, col, rows, cols, value in rects:
+        region = painted[row:row + rows, col:col + cols]
+        assert not region.any(), 'rectangles overlap'
+        region[...] = value
+    return painted
+
+
+@pytest.mark.unit
+def test_solid_ground_becomes_one_rectangle():
+    grid = numpy.zeros((6, 10), dtype=int)
+    grid[4:, :] = 1
+    assert _merge_cells(grid) == [(4, 0, 2, 10, 1)]
+
+
+@pytest.mark.unit
+def test_different_values_are_not_merged():
+    grid = numpy.array([[1, 1, 2],
+                        [1, 1, 2],
+                        [0, 1, 1]])
+    rects = _merge_cells(grid)
+    assert rects == [(0, 0, 2, 2, 1), (0, 2, 2, 1, 2), (2, 1, 1, 2, 1)]
+
+
+@pytest.mark.unit
+def test_random_grids_are_covered_exactly():
+    rng = numpy.random.default_rng(2)
+    for _ in range(20):
+        grid = rng.integers(0, 3, size=(15, 20))
+        grid[rng.random(grid.shape) < 0.3] = 0
+        rects = _merge_cells(grid)
+        assert numpy.array_equal(_paint(rects, grid.shape), grid)
+        assert len(rects) <= numpy.count_nonzero(grid)
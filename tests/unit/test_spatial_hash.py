@@ -0,0 +1,60 @@
+"""Unit tests for the SpatialHash broadphase."""
+
+import pytest
+from pycat.geometry.spatial_hash import SpatialHash
+
+
+@pytest.mark.unit
+def test_query_returns_overlapping_items_in_insertion_order():
+    grid = SpatialHash(cell_size=10)
+    grid.insert('b', 0, 0, 5, 5)
+    grid.insert('a', 3, 3, 8, 8)
+    grid.insert('c', 50, 50, 60, 60)
+
+    assert grid.query(4, 4, 6, 6) == ['b', 'a']
+    assert grid.query(55, 55, 55, 55) == ['c']
+    assert grid.query(20, 20, 30, 30) == []
+
+
+@pytest.mark.unit
+def test_touching_boxes_are_included():
+    grid = SpatialHash(cell_size=10)
+    grid.insert('a', 0, 0, 10, 10)
+
+    assert grid.query(10, 10, 20, 20) == ['a']
+    assert grid.query_point(0, 0) == ['a']
+
+
+@pytest.mark.unit
+def test_update_and_remove():
+    grid = SpatialHash(cell_size=10)
+    grid.insert('a', 0, 0, 1, 1)
+    grid.update('a', 100, 100, 101, 101)
+
+    assert grid.query(0, 0, 1, 1) == []
+    assert grid.query(100, 100, 100, 100) == ['a']
+    assert grid.get_bounds('a') == (100, 100, 101, 101)
+
+    grid.remove('a')
+    grid.remove('a')  # removing twice is ignored
+    assert 'a' not in grid
+    assert len(grid) == 0
+    assert grid.query(-1000, -1000, 1000, 1000) == []
+
+
+@pytest.mark.unit
+def test_negative_coordinates_and_large_items():
+    grid = SpatialHash(cell_size=10)
+    grid.insert('small', -15, -15, -12, -12)
+    grid.insert('large', -1000, -1000, 1000, 1000)
+
+    assert 'large' in grid.get_large_items()
+    assert 'small' in grid.get_cell(-2, -2)
+    assert grid.query(-13, -13, -13, -13) == ['small', 'large']
+    assert grid.query(500, 500, 501, 501) == ['large']
+
+
+@pytest.mark.unit
+def test_invalid_cell_size():
+    with pytest.raises(ValueError):
+        SpatialHash(cell_size=0)
@@ -0,0 +1,84 @@
+"""Unit tests for the TileCollisionMap tile grid collision."""
+
+from unittest.mock import Mock
+
+import numpy
+import pytest
+from pycat.experimental.tile_collision_map import TileCollisionMap
+
+# top row first, like LDtk's int_grid_csv
+CSV = [
+    0, 0, 0, 0, 0,
+    0, 0, 0, 2, 0,
+    0, 0, 0, 1, 0,
+    1, 1, 1, 1, 1,
+]
+
+
+@pytest.fixture
+def tiles():
+    return TileCollisionMap.from_csv(CSV, 5, 4, 10,
+                                     identifiers={1: 'ground', 2: 'spikes'})
+
+
+@pytest.mark.unit
+def test_rows_are_bottom_first(tiles):
+    assert tiles.values.shape == (4, 5)
+    assert tiles.get_value_at(5, 5) == 1
+    assert tiles.get_value_at(35, 25) == 2
+    assert tiles.get_value_at(35, 35) == 0
+    assert tiles.get_value_at(-5, 5) == 0
+    assert tiles.get_tile_rect(3, 2) == (30, 20, 40, 30)
+
+
+@pytest.mark.unit
+def test_identifiers(tiles):
+    assert tiles.get_value('spikes') == 2
+    assert tiles.get_identifier(1) == 'ground'
+    assert tiles.get_tiles_with_identifier('spikes') == [(3, 2)]
+    assert tiles.get_tiles_with_identifier('missing') == []
+
+
+@pytest.mark.unit
+def test_overlapping_tiles(tiles):
+    assert tiles.get_overlapping_tiles(5, 5, 15, 15) == [(0, 0), (1, 0)]
+    assert tiles.get_overlapping_tiles(25, 5, 38, 28, 'spikes') == [(3, 2)]
+    # touching the top of the ground is not overlapping
+    assert not tiles.is_overlapping(0, 10, 20, 20)
+    assert tiles.is_overlapping(0, 9.5, 20, 20)
+    assert not tiles.is_overlapping(100, 100, 200, 200)
+
+
+@pytest.mark.unit
+def test_falling_box_lands_on_ground(tiles):
+    dx, dy, hit_x, hit_y = tiles.move_box((2, 15, 8, 21), 0, -12)
+    assert (dx, dy, hit_x, hit_y) == (0, -5, False, True)
+    # resting on the ground, it can still move sideways
+    dx, dy, hit_x, hit_y = tiles.move_box((2, 10, 8, 16), 7, -1)
+    assert (dx, dy, hit_x, hit_y) == (7, 0, False, True)
+
+
+@pytest.mark.unit
+def test_walls_block_sideways_moves(tiles):
+    dx, dy, hit_x, hit_y = tiles.move_box((12, 12, 18, 18), 30, 0)
+    assert (dx, hit_x) == (12, True)
+    dx, dy, hit_x, hit_y = tiles.move_box((42, 12, 48, 18), -30, 0)
+    assert (dx, hit_x) == (-2, True)
+    # the box moves along x, then along y from its new position
+    dx, dy, hit_x, hit_y = tiles.move_box((42, 12, 48, 30), -1, 30)
+    assert (dx, dy, hit_x, hit_y) == (-1, 30, False, False)
+
+
+@pytest.mark.unit
+def test_solid_values(tiles):
+    hazards = TileCollisionMap(numpy.array([[2, 1]]), 10, solid_values=[2])
+    assert hazards.is_overlapping(0, 0, 20, 10)
+    assert not hazards.is_overlapping(10, 0, 20, 10)
+
+
+@pytest.mark.unit
+def test_move_sprite(tiles):
+    sprite = Mock(x=5, y=18)
+    sprite.get_bounding_box.return_value = (2, 15, 8, 21)
+    assert tiles.move_sprite(sprite, 0, -12) == (False, True)
+    assert sprite.position == (5, 13)